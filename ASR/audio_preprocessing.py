@@ -0,0 +1,142 @@
+import io
+import os
+import subprocess
+import wave
+
+import numpy as np
+
+# Sarvam speech models work on 16 kHz mono audio
+TARGET_SAMPLE_RATE = int(os.getenv("ASR_TARGET_SAMPLE_RATE", "16000"))
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+# Codec the trimmed audio is sent in: "opus" (Ogg, close to the browser's
+# own bitrate), "flac" (lossless) or "wav" (uncompressed, largest)
+OUTPUT_CODEC = os.getenv("ASR_OUTPUT_CODEC", "opus").lower()
+OPUS_BITRATE = os.getenv("ASR_OPUS_BITRATE", "24k")
+
+# File extension and ffmpeg output arguments per compressed codec
+ENCODERS = {
+    "opus": (".ogg", ["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip", "-f", "ogg"]),
+    "flac": (".flac", ["-c:a", "flac", "-f", "flac"]),
+}
+
+# Voice activity detection settings
+FRAME_MS = 30
+PADDING_MS = int(os.getenv("ASR_VAD_PADDING_MS", "250"))
+MIN_SPEECH_DBFS = float(os.getenv("ASR_VAD_MIN_DBFS", "-45"))
+NOISE_MARGIN_DB = float(os.getenv("ASR_VAD_NOISE_MARGIN_DB", "10"))
+
+
+def decode_to_pcm(content: bytes) -> np.ndarray:
+    """Decode any ffmpeg-readable audio to mono 16-bit PCM at the target rate"""
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-ac", "1",
+            "-ar", str(TARGET_SAMPLE_RATE),
+            "-f", "s16le", "pipe:1",
+        ],
+        input=content,
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def find_speech_bounds(samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE):
+    """
+    Locate the first and last speech sample with an energy-based VAD.
+
+    Frames louder than both ``MIN_SPEECH_DBFS`` and the estimated noise floor
+    plus ``NOISE_MARGIN_DB`` count as speech. Returns ``None`` when no frame
+    qualifies.
+    """
+    frame_length = sample_rate * FRAME_MS // 1000
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return None
+
+    frames = samples[:frame_count * frame_length].astype(np.float32).reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames / 32768.0), axis=1))
+    dbfs = 20 * np.log10(np.maximum(rms, 1e-10))
+
+    noise_floor = np.percentile(dbfs, 10)
+    threshold = max(MIN_SPEECH_DBFS, noise_floor + NOISE_MARGIN_DB)
+    speech_frames = np.flatnonzero(dbfs > threshold)
+    if speech_frames.size == 0:
+        return None
+
+    padding = sample_rate * PADDING_MS // 1000
+    start = max(0, speech_frames[0] * frame_length - padding)
+    end = min(len(samples), (speech_frames[-1] + 1) * frame_length + padding)
+    return int(start), int(end)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE) -> tuple:
+    """Encode mono 16-bit PCM with OUTPUT_CODEC, returning the bytes and their file extension"""
+    if OUTPUT_CODEC == "wav":
+        return encode_wav(samples, sample_rate), ".wav"
+    if OUTPUT_CODEC not in ENCODERS:
+        raise ValueError(f"Unknown ASR_OUTPUT_CODEC {OUTPUT_CODEC!r}, expected one of wav, {', '.join(ENCODERS)}")
+    extension, codec_args = ENCODERS[OUTPUT_CODEC]
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+            *codec_args, "pipe:1",
+        ],
+        input=samples.tobytes(),
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode audio: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout, extension
+
+
+def preprocess_audio(content: bytes) -> tuple:
+    """
+    Decode, downmix, resample and silence-trim an uploaded recording.
+
+    Runs in a worker process. Returns the audio to send, its file extension
+    and statistics about the bytes and seconds saved. The extension is None
+    when the re-encoded audio would not be smaller than the upload, which is
+    then sent as it is. If no speech is detected the whole resampled
+    recording is kept so the ASR model still gets to decide.
+    """
+    samples = decode_to_pcm(content)
+    original_seconds = len(samples) / TARGET_SAMPLE_RATE
+
+    bounds = find_speech_bounds(samples)
+    speech_detected = bounds is not None
+    if speech_detected:
+        samples = samples[bounds[0]:bounds[1]]
+
+    processed, extension = encode_audio(samples)
+    processed_seconds = len(samples) / TARGET_SAMPLE_RATE
+    sent_original = len(processed) >= len(content)
+    if sent_original:
+        processed, extension, processed_seconds = content, None, original_seconds
+    stats = {
+        "original_bytes": len(content),
+        "processed_bytes": len(processed),
+        "bytes_saved": len(content) - len(processed),
+        "original_seconds": round(original_seconds, 2),
+        "processed_seconds": round(processed_seconds, 2),
+        "seconds_saved": round(original_seconds - processed_seconds, 2),
+        "speech_detected": speech_detected,
+        "sent_original": sent_original,
+    }
+    return processed, extension, stats
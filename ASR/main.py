@@ -1,19 +1,30 @@
 import time
 import tempfile
 import os
+import sys
+import asyncio
 import logging
 import uvicorn
 import mimetypes
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from sarvamai import SarvamAI
 from dotenv import load_dotenv
+from concurrent.futures import ProcessPoolExecutor
+from audio_preprocessing import preprocess_audio
+
+# service_common sits next to this directory in the repo and inside it in the Docker image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_common.profiling import install_profiling
+from service_common.resilience import CircuitOpen, DependencyUnavailable, dependency, install_resilience
+from service_common.tracing import configure_tracing, context_from_headers, tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
+configure_tracing("insurebot-asr")
 
 app = FastAPI(title="Audio Transcription API", version="1.0.0")
 
@@ -24,6 +35,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_profiling(app)
+install_resilience(app)
 
 # Initialize SarvamAI client
 try:
@@ -35,6 +48,26 @@ except Exception as e:
     logger.error(f"Failed to initialize SarvamAI client: {e}")
     raise
 
+# Decode, silence-trim and resample uploads before sending them to Sarvam
+PREPROCESS_ENABLED = os.getenv("ASR_PREPROCESS", "true").lower() == "true"
+PREPROCESS_WORKERS = int(os.getenv("ASR_PREPROCESS_WORKERS", "2"))
+preprocess_pool = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS) if PREPROCESS_ENABLED else None
+
+# Circuit breaker and adaptive concurrency limit for Sarvam speech-to-text (SARVAM_ASR_* settings)
+sarvam_asr = dependency("sarvam_asr", timeout=15.0)
+
+def unavailable(error: DependencyUnavailable) -> HTTPException:
+    """503 telling the caller when to retry instead of waiting on a struggling upstream"""
+    retry_after = error.retry_after if isinstance(error, CircuitOpen) else 1
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(max(1, round(retry_after)))})
+
+def sarvam_translate(path: str):
+    with open(path, 'rb') as audio_file:
+        return client.speech_to_text.translate(
+            file=audio_file,
+            model="saaras:v2.5"
+        )
+
 def get_audio_extension(content_type: str, filename: str) -> str:
     """Get appropriate file extension based on content type and filename"""
     # Map content types to extensions
@@ -74,7 +107,12 @@ def get_audio_extension(content_type: str, filename: str) -> str:
     return '.wav'
 
 @app.post("/transcribe/")
-async def transcribe_audio(file: UploadFile = File(...)):
+async def transcribe_audio(request: Request, file: UploadFile = File(...)):
+    with tracer.start_as_current_span("asr.transcribe", context=context_from_headers(request.headers)):
+        return await _transcribe(file)
+
+
+async def _transcribe(file: UploadFile):
     logger.info(f"Received transcription request for file: {file.filename}")
     logger.info(f"Content type: {file.content_type}")
     
@@ -83,29 +121,55 @@ async def transcribe_audio(file: UploadFile = File(...)):
         logger.warning(f"Invalid file type: {file.content_type}")
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
+    # Fail fast while Sarvam is down instead of preprocessing audio that cannot be sent
+    try:
+        sarvam_asr.check()
+    except DependencyUnavailable as e:
+        raise unavailable(e)
+    
     # Get appropriate file extension
     file_extension = get_audio_extension(file.content_type, file.filename)
     logger.info(f"Using file extension: {file_extension}")
     
+    # Read the uploaded file content
+    content = await file.read()
+    
+    # Trim silence and resample in a worker process; fall back to the raw upload on failure
+    preprocessing = None
+    if preprocess_pool is not None:
+        try:
+            preprocess_start = time.time()
+            loop = asyncio.get_running_loop()
+            with tracer.start_as_current_span("asr.preprocess"):
+                content, processed_extension, preprocessing = await loop.run_in_executor(
+                    preprocess_pool, preprocess_audio, content
+                )
+            preprocessing["duration"] = round(time.time() - preprocess_start, 3)
+            # None when the original upload was smaller and is sent unchanged
+            file_extension = processed_extension or file_extension
+            logger.info(
+                f"Preprocessed audio: {preprocessing['original_bytes']} -> {preprocessing['processed_bytes']} bytes, "
+                f"{preprocessing['original_seconds']}s -> {preprocessing['processed_seconds']}s "
+                f"in {preprocessing['duration']:.3f} seconds"
+            )
+        except Exception as e:
+            logger.warning(f"Audio preprocessing failed, sending original audio: {e}")
+    
     # Create temporary file with correct extension
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-        # Read the uploaded file content
-        content = await file.read()
-        # Write content to temporary file
-        temp_file.write(content)
-        temp_file_path = temp_file.name
+    with tracer.start_as_current_span("asr.temp_file_write", attributes={"asr.bytes": len(content)}):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
+            # Write content to temporary file
+            temp_file.write(content)
+            temp_file_path = temp_file.name
     
     try:
         # Start transcription timing
         start_time = time.time()
         logger.info(f"Starting transcription for: {temp_file_path}")
         
-        # For SarvamAI, we need to open the file in binary mode
-        with open(temp_file_path, 'rb') as audio_file:
-            response = client.speech_to_text.translate(
-                file=audio_file,
-                model="saaras:v2.5"
-            )
+        # Runs in a thread under the Sarvam breaker, so a slow upstream no longer blocks the event loop
+        with tracer.start_as_current_span("asr.sarvam_call"):
+            response = await sarvam_asr.acall(sarvam_translate, temp_file_path)
         
         # End timing
         end_time = time.time()
@@ -127,9 +191,14 @@ async def transcribe_audio(file: UploadFile = File(...)):
             "transcription": transcription_text,
             "duration": round(transcription_time, 2),
             "filename": file.filename,
-            "content_type": file.content_type
+            "content_type": file.content_type,
+            "preprocessing": preprocessing
         }
         
+    except DependencyUnavailable as e:
+        logger.warning(f"Transcription rejected: {e}")
+        raise unavailable(e)
+    
     except Exception as e:
         logger.error(f"Transcription failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
@@ -0,0 +1,79 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_preprocessing
+from audio_preprocessing import FFMPEG_BINARY, preprocess_audio
+
+pytestmark = pytest.mark.skipif(shutil.which(FFMPEG_BINARY) is None, reason="ffmpeg is not installed")
+
+# What MediaRecorder produces in the browser (AudioPipeline.jsx): 48 kHz Opus in WebM
+BROWSER_RATE = 48000
+BROWSER_BITRATE = "32k"
+
+
+def speech_like(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    """Harmonics with a syllable-rate envelope plus a little breath noise"""
+    t = np.arange(int(seconds * BROWSER_RATE)) / BROWSER_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / BROWSER_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    return 0.25 * voice * envelope + 0.01 * rng.standard_normal(t.size)
+
+
+def browser_webm(signal: np.ndarray) -> bytes:
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    result = subprocess.run(
+        [
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(BROWSER_RATE), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", BROWSER_BITRATE, "-f", "webm", "pipe:1",
+        ],
+        input=pcm.tobytes(),
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def test_webm_with_silence_is_sent_smaller():
+    rng = np.random.default_rng(7)
+    silence = 0.002 * rng.standard_normal(int(2.0 * BROWSER_RATE))
+    upload = browser_webm(np.concatenate([silence, speech_like(3.0, rng), silence]))
+
+    audio, extension, stats = preprocess_audio(upload)
+
+    assert extension == ".ogg"
+    assert stats["speech_detected"]
+    assert stats["seconds_saved"] > 3
+    assert len(audio) == stats["processed_bytes"] < len(upload)
+    assert stats["bytes_saved"] > 0
+
+
+def test_webm_without_silence_is_never_sent_larger():
+    upload = browser_webm(speech_like(4.0, np.random.default_rng(7)))
+
+    audio, extension, stats = preprocess_audio(upload)
+
+    assert len(audio) <= len(upload)
+    assert stats["bytes_saved"] >= 0
+    if stats["sent_original"]:
+        assert audio == upload and extension is None
+
+
+def test_wav_output_falls_back_to_the_smaller_upload(monkeypatch):
+    monkeypatch.setattr(audio_preprocessing, "OUTPUT_CODEC", "wav")
+    upload = browser_webm(speech_like(4.0, np.random.default_rng(7)))
+
+    audio, extension, stats = preprocess_audio(upload)
+
+    assert stats["sent_original"]
+    assert audio == upload and extension is None
+    assert stats["bytes_saved"] == 0
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import logging
+import httpx
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from dotenv import load_dotenv
+from opentelemetry import trace
+
+# service_common sits next to this directory in the repo and inside it in the Docker image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_common.tracing import configure_tracing, context_from_headers, current_traceparent, tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+configure_tracing("insurebot-gateway")
+
+ASR_URL = os.getenv("ASR_URL", "http://localhost:3001")
+RASA_URL = os.getenv("RASA_URL", "http://localhost:5005")
+TTS_URL = os.getenv("TTS_URL", "http://localhost:5050")
+# System initializer endpoint that starts retrieval from the transcript; empty disables it
+SPECULATE_URL = os.getenv("SPECULATE_URL", "")
+UPSTREAM_TIMEOUT = float(os.getenv("GATEWAY_UPSTREAM_TIMEOUT", "60"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", "20"))
+MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "100"))
+
+# Shared keep-alive connection pool to the ASR, Rasa and TTS services
+http_client: httpx.AsyncClient = None
+
+# The event loop holds only weak references to tasks; keep them alive until they finish
+_background_tasks = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT),
+        limits=httpx.Limits(
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=MAX_CONNECTIONS,
+        ),
+    )
+    logger.info(f"Voice gateway started (ASR={ASR_URL}, Rasa={RASA_URL}, TTS={TTS_URL})")
+    yield
+    await http_client.aclose()
+
+
+app = FastAPI(title="Voice Gateway API", version="1.0.0", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+async def transcribe(content: bytes, filename: str, content_type: str) -> str:
+    """Send the recorded audio to the ASR service and return the transcript"""
+    with tracer.start_as_current_span("gateway.asr"):
+        response = await http_client.post(
+            f"{ASR_URL}/transcribe/",
+            files={"file": (filename, content, content_type)},
+            headers=_trace_headers(),
+        )
+        response.raise_for_status()
+        return response.json().get("transcription", "")
+
+
+async def speculate(sender: str, transcript: str):
+    """Let retrieval for the likely action start while Rasa classifies the transcript"""
+    try:
+        await http_client.post(SPECULATE_URL, json={"sender": sender, "text": transcript}, timeout=2.0)
+    except Exception as e:
+        logger.warning(f"Speculative retrieval request failed: {e}")
+
+
+async def ask_rasa(sender: str, message: str) -> list:
+    """Send the transcript to the Rasa REST channel and return the bot messages"""
+    with tracer.start_as_current_span("gateway.rasa"):
+        # Rasa hands the metadata to the action server, which continues the trace
+        response = await http_client.post(
+            f"{RASA_URL}/webhooks/rest/webhook",
+            json={"sender": sender, "message": message, "metadata": {"traceparent": current_traceparent()}},
+            headers=_trace_headers(),
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def synthesize_batch(texts: list, lang: str, audio_format: Optional[str] = None):
+    """Synthesize all bot messages with one TTS batch request, yielding its events in order"""
+    with tracer.start_as_current_span("gateway.tts", attributes={"tts.segments": len(texts)}):
+        async with http_client.stream(
+            "POST",
+            f"{TTS_URL}/speak/batch/",
+            json={"texts": texts, "lang": lang, "format": audio_format},
+            headers=_trace_headers(),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield line
+
+
+def _trace_headers() -> dict:
+    traceparent = current_traceparent()
+    return {"traceparent": traceparent} if traceparent else {}
+
+
+def _event(payload: dict) -> bytes:
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+@app.post("/turn/")
+async def voice_turn(
+    request: Request,
+    file: UploadFile = File(...),
+    sender: str = Form("test_user"),
+    lang: str = Form("Hindi"),
+    audio_format: Optional[str] = Form(None, alias="format"),
+):
+    """
+    Run one voice turn (ASR -> Rasa -> TTS) on the server.
+
+    The response is newline-delimited JSON. Events are emitted as soon as they
+    are available: ``transcript`` first, then one ``message`` per bot reply,
+    and ``audio`` events (base64 encoded) in message order, relayed from the
+    TTS batch endpoint so later segments are synthesized while earlier ones play.
+    ``format`` (``wav``, ``opus`` or ``mp3``) selects the audio codec.
+    A ``traceparent`` header from the client becomes the parent of the turn's
+    spans and is propagated to every upstream service.
+    """
+    if not file.content_type or not file.content_type.startswith('audio/'):
+        raise HTTPException(status_code=400, detail="File must be an audio file")
+
+    content = await file.read()
+    start_time = time.time()
+
+    # The span stays open while the response streams, so it is ended in event_stream
+    turn_span = tracer.start_span(
+        "gateway.turn",
+        context=context_from_headers(request.headers),
+        attributes={"gateway.sender": sender, "gateway.lang": lang},
+    )
+
+    try:
+        with trace.use_span(turn_span):
+            transcript = await transcribe(content, file.filename or "recording.webm", file.content_type)
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        turn_span.end()
+        raise HTTPException(status_code=502, detail=f"Transcription failed: {e}")
+    asr_time = time.time() - start_time
+
+    async def event_stream():
+        with trace.use_span(turn_span, end_on_exit=True):
+            async for event in turn_events():
+                yield event
+
+    async def turn_events():
+        yield _event({"type": "transcript", "text": transcript, "duration": round(asr_time, 2)})
+
+        if not transcript:
+            yield _event({"type": "done", "duration": round(time.time() - start_time, 2)})
+            return
+
+        if SPECULATE_URL:
+            run_in_background(speculate(sender, transcript))
+
+        try:
+            messages = await ask_rasa(sender, transcript)
+        except Exception as e:
+            logger.error(f"Rasa request failed: {e}")
+            yield _event({"type": "error", "stage": "rasa", "detail": str(e)})
+            return
+
+        texts = [message["text"] for message in messages if message.get("text")]
+        for index, text in enumerate(texts):
+            yield _event({"type": "message", "index": index, "text": text})
+
+        if texts:
+            try:
+                async for line in synthesize_batch(texts, lang, audio_format):
+                    yield (line + "\n").encode("utf-8")
+            except Exception as e:
+                logger.error(f"Speech synthesis failed: {e}")
+                yield _event({"type": "error", "stage": "tts", "detail": str(e)})
+
+        total_time = time.time() - start_time
+        logger.info(f"Voice turn for {sender} completed in {total_time:.2f} seconds ({len(texts)} messages)")
+        yield _event({"type": "done", "duration": round(total_time, 2)})
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@app.get("/")
+async def root():
+    return {"message": "Voice Gateway API is running", "version": "1.0.0"}
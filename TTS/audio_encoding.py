@@ -0,0 +1,137 @@
+import asyncio
+import os
+import subprocess
+from typing import AsyncIterator, Optional
+
+# Output formats: name -> (media type, file extension, ffmpeg encoder arguments)
+AUDIO_FORMATS = {
+    "wav": ("audio/wav", "wav", None),
+    "opus": ("audio/ogg", "ogg", ["-c:a", "libopus", "-b:a", os.getenv("TTS_OPUS_BITRATE", "24k"), "-application", "voip", "-f", "ogg"]),
+    "mp3": ("audio/mpeg", "mp3", ["-c:a", "libmp3lame", "-b:a", os.getenv("TTS_MP3_BITRATE", "48k"), "-f", "mp3"]),
+}
+
+# Media types accepted in the Accept header, mapped to output formats
+_MEDIA_TYPE_FORMATS = {
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+}
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+ENCODER_WORKERS = int(os.getenv("TTS_ENCODER_WORKERS", str(os.cpu_count() or 2)))
+STREAM_CHUNK_SIZE = 16 * 1024
+
+_encoder_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_encoder_slots() -> asyncio.Semaphore:
+    # Created lazily so it binds to the server's event loop
+    global _encoder_slots
+    if _encoder_slots is None:
+        _encoder_slots = asyncio.Semaphore(ENCODER_WORKERS)
+    return _encoder_slots
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Pick the output format from an explicit request or the Accept header.
+
+    An explicit ``requested`` format wins. Otherwise media types in ``accept``
+    are tried in order of their q-value, falling back to WAV.
+    """
+    if requested:
+        requested = requested.lower()
+        if requested not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported audio format: {requested}")
+        return requested
+
+    if not accept:
+        return "wav"
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, position, media_type.lower()))
+
+    for negative_quality, _, media_type in sorted(candidates):
+        if negative_quality == 0:
+            continue
+        if media_type in _MEDIA_TYPE_FORMATS:
+            return _MEDIA_TYPE_FORMATS[media_type]
+    return "wav"
+
+
+def _ffmpeg_command(fmt: str) -> list:
+    return [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", *AUDIO_FORMATS[fmt][2], "pipe:1"]
+
+
+def encode(wav_bytes: bytes, fmt: str) -> bytes:
+    """Encode WAV bytes to the given format in one go (blocking)"""
+    if AUDIO_FORMATS[fmt][2] is None:
+        return wav_bytes
+    result = subprocess.run(_ffmpeg_command(fmt), input=wav_bytes, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {fmt}: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+async def encode_async(wav_bytes: bytes, fmt: str) -> bytes:
+    """Encode WAV bytes in an encoder worker without blocking the event loop"""
+    chunks = [chunk async for chunk in encode_stream(wav_bytes, fmt)]
+    return b"".join(chunks)
+
+
+async def encode_stream(wav_bytes: bytes, fmt: str) -> AsyncIterator[bytes]:
+    """
+    Encode WAV bytes and yield the output as the encoder produces it.
+
+    At most ``TTS_ENCODER_WORKERS`` encoder processes run at once; further
+    requests wait for a free slot.
+    """
+    if AUDIO_FORMATS[fmt][2] is None:
+        for start in range(0, len(wav_bytes), STREAM_CHUNK_SIZE):
+            yield wav_bytes[start:start + STREAM_CHUNK_SIZE]
+        return
+
+    async with _get_encoder_slots():
+        process = await asyncio.create_subprocess_exec(
+            *_ffmpeg_command(fmt),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def feed():
+            try:
+                process.stdin.write(wav_bytes)
+                await process.stdin.drain()
+            finally:
+                process.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                chunk = await process.stdout.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            await feeder
+            stderr = await process.stderr.read()
+            if await process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to encode {fmt}: {stderr.decode(errors='replace').strip()}")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            feeder.cancel()
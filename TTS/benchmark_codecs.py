@@ -0,0 +1,73 @@
+"""
+Benchmark TTS output codecs.
+
+Encodes WAV samples with every supported output format and reports payload
+size, compression ratio, encode time and the estimated transfer time on a
+mobile link. Samples come from WAV files given on the command line, or are
+synthesized with Sarvam from --text.
+
+Usage:
+    python benchmark_codecs.py sample1.wav sample2.wav
+    python benchmark_codecs.py --text "Your premium is due next week." --lang Hindi
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from audio_encoding import AUDIO_FORMATS, encode
+
+
+def load_samples(args) -> list:
+    samples = [(Path(path).name, Path(path).read_bytes()) for path in args.files]
+    if args.text:
+        # Imported lazily so file-based runs do not need Sarvam credentials
+        from main import synthesize
+        for index, text in enumerate(args.text):
+            samples.append((f"text[{index}]", synthesize(text, args.lang)))
+    return samples
+
+
+def benchmark(samples: list, repeat: int, link_kbps: float):
+    print(f"{'sample':<20} {'format':<6} {'bytes':>10} {'ratio':>7} {'encode ms':>10} {'transfer ms':>12}")
+    totals = {fmt: {"bytes": 0, "encode": 0.0} for fmt in AUDIO_FORMATS}
+
+    for name, wav_bytes in samples:
+        for fmt in AUDIO_FORMATS:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                encoded = encode(wav_bytes, fmt)
+                timings.append(time.perf_counter() - start)
+
+            encode_ms = statistics.median(timings) * 1000
+            transfer_ms = len(encoded) * 8 / link_kbps
+            totals[fmt]["bytes"] += len(encoded)
+            totals[fmt]["encode"] += encode_ms
+            print(f"{name:<20} {fmt:<6} {len(encoded):>10} {len(wav_bytes) / len(encoded):>7.1f} {encode_ms:>10.1f} {transfer_ms:>12.1f}")
+
+    print("\nTotals")
+    wav_total = totals["wav"]["bytes"]
+    for fmt, total in totals.items():
+        transfer_ms = total["bytes"] * 8 / link_kbps
+        print(f"{fmt:<6} {total['bytes']:>10} bytes  {wav_total / total['bytes']:>5.1f}x smaller  "
+              f"encode {total['encode']:>8.1f} ms  transfer {transfer_ms:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TTS output codecs")
+    parser.add_argument("files", nargs="*", help="WAV files to encode")
+    parser.add_argument("--text", action="append", default=[], help="Text to synthesize with Sarvam (repeatable)")
+    parser.add_argument("--lang", default="Hindi", help="Language for --text samples")
+    parser.add_argument("--repeat", type=int, default=5, help="Encodes per sample and format (median is reported)")
+    parser.add_argument("--link-kbps", type=float, default=1000.0, help="Link speed used for the transfer estimate")
+    args = parser.parse_args()
+
+    samples = load_samples(args)
+    if not samples:
+        parser.error("Provide WAV files or --text")
+    benchmark(samples, args.repeat, args.link_kbps)
+
+
+if __name__ == "__main__":
+    main()
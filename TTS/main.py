@@ -1,23 +1,38 @@
 import time
 import tempfile
 import os
+import sys
 import logging
 import uvicorn
 import mimetypes
 import base64
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sarvamai import SarvamAI
 from dotenv import load_dotenv
 from io import BytesIO
+from audio_encoding import AUDIO_FORMATS, encode_async, encode_stream, negotiate_format
+from opentelemetry import context as otel_context
+
+# service_common sits next to this directory in the repo and inside it in the Docker image
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_common.profiling import install_profiling
+from service_common.resilience import CircuitOpen, DependencyUnavailable, dependency, install_resilience
+from service_common.tracing import configure_tracing, context_from_headers, tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
+configure_tracing("insurebot-tts")
 
 app = FastAPI(title="Speech to Text API", version="1.0.0")
 
@@ -25,6 +40,12 @@ app = FastAPI(title="Speech to Text API", version="1.0.0")
 class TTSRequest(BaseModel):
     text: str
     lang: str
+    format: Optional[str] = None
+
+class TTSBatchRequest(BaseModel):
+    texts: List[str]
+    lang: str
+    format: Optional[str] = None
 
 class TTSResponse(BaseModel):
     message: str
@@ -38,6 +59,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_profiling(app)
+install_resilience(app)
+
+LANGUAGE_CODES = {
+    "Hindi": "hi-IN",
+    "Bengali": "bn-IN",
+    "Telugu": "te-IN",
+    "Marathi": "mr-IN",
+    "Tamil": "ta-IN",
+    "Urdu": "ur-IN",
+    "Gujarati": "gu-IN",
+    "Kannada": "kn-IN",
+    "Odia": "or-IN",
+    "Malayalam": "ml-IN",
+    "Punjabi": "pa-IN",
+}
+
+# Maximum number of concurrent Sarvam calls per batch request
+BATCH_CONCURRENCY = int(os.getenv("TTS_BATCH_CONCURRENCY", "4"))
+MAX_BATCH_SIZE = int(os.getenv("TTS_MAX_BATCH_SIZE", "16"))
+
+# Recently synthesized audio, keyed by (language, text); warmed by the FAQ warmup job
+AUDIO_CACHE_SIZE = int(os.getenv("TTS_AUDIO_CACHE_SIZE", "256"))
+audio_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+audio_cache_lock = threading.Lock()
+
+# Circuit breaker and adaptive concurrency limit for Sarvam text-to-speech (SARVAM_TTS_* settings)
+sarvam_tts = dependency("sarvam_tts", timeout=10.0)
 
 # Initialize SarvamAI client
 try:
@@ -56,50 +105,155 @@ async def read_root():
 
 
 
-@app.post("/speak/", response_model=TTSResponse)
-async def play_audio(request: TTSRequest):
-    """Convert text to speech and return audio file"""
-    
-    language = {
-    "Hindi": "hi-IN",
-    "Bengali": "bn-IN",
-    "Telugu": "te-IN",
-    "Marathi": "mr-IN",
-    "Tamil": "ta-IN",
-    "Urdu": "ur-IN",
-    "Gujarati": "gu-IN",
-    "Kannada": "kn-IN",
-    "Odia": "or-IN",
-    "Malayalam": "ml-IN",
-    "Punjabi": "pa-IN",
-    }
+def cached_audio(text: str, lang: str) -> Optional[bytes]:
+    key = (lang, text)
+    with audio_cache_lock:
+        if key in audio_cache:
+            audio_cache.move_to_end(key)
+            return audio_cache[key]
+    return None
 
-    # Validate language
-    if request.lang not in language:
-        raise HTTPException(status_code=400, detail=f"Unsupported language: {request.lang}")
 
-    try:
+def synthesize(text: str, lang: str) -> bytes:
+    """Synthesize a single text with Sarvam and return the decoded WAV bytes"""
+    key = (lang, text)
+    with tracer.start_as_current_span("tts.sarvam_call", attributes={"tts.text_length": len(text)}):
         response = client.text_to_speech.convert(
-            text=request.text,
-            target_language_code=language[request.lang],
+            text=text,
+            target_language_code=LANGUAGE_CODES[lang],
         )
-                
-        # Decode base64 to bytes
+    # Decode base64 to bytes
+    with tracer.start_as_current_span("tts.base64_decode"):
         audio_bytes = base64.b64decode(response.audios[0])
-        
-        # Return as streaming response
-        return StreamingResponse(
-            BytesIO(audio_bytes),
-            media_type="audio/wav",
-            headers={
-                "Content-Disposition": "inline; filename=speech.wav",
-                "X-Language": request.lang,
-                "X-Text-Length": str(len(request.text))
-            }
-        )
-        
-    except Exception as e:
-        logger.error(f"Error during text-to-speech conversion: {e}")
-        raise HTTPException(status_code=500, detail="Text-to-speech conversion failed")
-    
 
+    if AUDIO_CACHE_SIZE > 0:
+        with audio_cache_lock:
+            audio_cache[key] = audio_bytes
+            while len(audio_cache) > AUDIO_CACHE_SIZE:
+                audio_cache.popitem(last=False)
+    return audio_bytes
+
+
+async def synthesize_guarded(text: str, lang: str) -> bytes:
+    """Cached audio if there is any, otherwise a Sarvam call under the breaker
+
+    Raises DependencyUnavailable at once while Sarvam is failing or saturated,
+    so cached phrases keep playing during an outage and the rest fail fast.
+    """
+    audio_bytes = cached_audio(text, lang)
+    if audio_bytes is not None:
+        return audio_bytes
+    return await sarvam_tts.acall(synthesize, text, lang)
+
+
+def unavailable(error: DependencyUnavailable) -> HTTPException:
+    """503 telling the caller when to retry instead of waiting on a struggling upstream"""
+    retry_after = error.retry_after if isinstance(error, CircuitOpen) else 1
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(max(1, round(retry_after)))})
+
+
+def resolve_format(accept: Optional[str], requested: Optional[str]) -> str:
+    """Negotiate the output format, rejecting unknown explicit formats"""
+    try:
+        return negotiate_format(accept, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/speak/", response_model=TTSResponse)
+async def play_audio(request: TTSRequest, http_request: Request, accept: Optional[str] = Header(None)):
+    """Convert text to speech and return audio file
+
+    The output format is WAV unless ``format`` (``wav``, ``opus`` or ``mp3``)
+    is given or the Accept header asks for ``audio/ogg`` or ``audio/mpeg``.
+    Compressed output is streamed while it is being encoded.
+    """
+
+    # Validate language
+    if request.lang not in LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {request.lang}")
+    fmt = resolve_format(accept, request.format)
+    media_type, extension, _ = AUDIO_FORMATS[fmt]
+
+    with tracer.start_as_current_span("tts.speak", context=context_from_headers(http_request.headers)):
+        try:
+            audio_bytes = await synthesize_guarded(request.text, request.lang)
+        except DependencyUnavailable as e:
+            logger.warning(f"Text-to-speech rejected: {e}")
+            raise unavailable(e)
+        except Exception as e:
+            logger.error(f"Error during text-to-speech conversion: {e}")
+            raise HTTPException(status_code=500, detail="Text-to-speech conversion failed")
+
+    # Return as streaming response, encoding on the fly for compressed formats
+    return StreamingResponse(
+        encode_stream(audio_bytes, fmt),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"inline; filename=speech.{extension}",
+            "X-Language": request.lang,
+            "X-Text-Length": str(len(request.text)),
+            "Vary": "Accept"
+        }
+    )
+
+
+@app.post("/speak/batch/")
+async def speak_batch(request: TTSBatchRequest, http_request: Request, accept: Optional[str] = Header(None)):
+    """
+    Convert several texts to speech in one request.
+
+    Texts are synthesized concurrently (up to ``TTS_BATCH_CONCURRENCY`` at a
+    time) and streamed back in request order as newline-delimited JSON, one
+    ``audio`` event per text with base64 audio data, so the first segment can be
+    played while later ones are still being synthesized. ``format`` or the
+    Accept header selects the per-segment codec as for ``/speak/``.
+    """
+    if request.lang not in LANGUAGE_CODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {request.lang}")
+    if len(request.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} texts per batch")
+    # The response itself is NDJSON, so only an explicit audio media type in Accept counts
+    fmt = resolve_format(accept, request.format)
+    media_type = AUDIO_FORMATS[fmt][0]
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    parent = context_from_headers(http_request.headers) or otel_context.get_current()
+
+    async def synthesize_limited(index: int, text: str) -> bytes:
+        with tracer.start_as_current_span("tts.segment", context=parent, attributes={"tts.index": index}):
+            async with semaphore:
+                audio_bytes = await synthesize_guarded(text, request.lang)
+            with tracer.start_as_current_span("tts.encode", attributes={"tts.format": fmt}):
+                return await encode_async(audio_bytes, fmt)
+
+    tasks = [asyncio.create_task(synthesize_limited(index, text)) for index, text in enumerate(request.texts)]
+
+    async def event_stream():
+        try:
+            for index, task in enumerate(tasks):
+                try:
+                    audio_bytes = await task
+                except DependencyUnavailable as e:
+                    logger.warning(f"Text-to-speech of segment {index} rejected: {e}")
+                    event = {"type": "error", "stage": "tts", "index": index, "detail": "Text-to-speech temporarily unavailable"}
+                except Exception as e:
+                    logger.error(f"Error during text-to-speech conversion of segment {index}: {e}")
+                    event = {"type": "error", "stage": "tts", "index": index, "detail": "Text-to-speech conversion failed"}
+                else:
+                    event = {
+                        "type": "audio",
+                        "index": index,
+                        "content_type": media_type,
+                        "audio": base64.b64encode(audio_bytes).decode("ascii"),
+                    }
+                yield (json.dumps(event) + "\n").encode("utf-8")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Language": request.lang, "X-Segment-Count": str(len(request.texts))}
+    )
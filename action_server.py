@@ -0,0 +1,166 @@
+"""
+Prefork Rasa Action Server
+Loads the embedding model and read-only index metadata once, then forks
+worker processes that share those pages copy-on-write
+"""
+import argparse
+import gc
+import inspect
+import os
+import signal
+import socket
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+
+def preload():
+    """Load everything that is safe to share between workers"""
+    start = time.time()
+
+    # Importing the action package pulls in LangChain and the RAG modules
+    import actions.actions  # noqa: F401
+    from actions.rag_components.embeddings import Embeddings
+    from actions.rag_components.vector_store import DatabaseManager
+
+    Embeddings.get_embeddings()
+
+    # Scenario centroid matrices are computed once and shared with the workers
+    for spec in actions.actions.ACTION_REGISTRY.values():
+        if spec.router is not None:
+            spec.router.centroids
+
+    # Cache collection and tenant metadata, then drop only the connections before forking
+    try:
+        DatabaseManager.ensure_collection_exists()
+        tenants = DatabaseManager.list_tenants()
+        print(f"Preloaded {len(tenants)} tenants")
+    except Exception as e:
+        print(f"Could not preload index metadata, workers will load it lazily: {e}")
+    finally:
+        DatabaseManager.close_connections()
+
+    # Move everything allocated so far out of the collector's reach so that
+    # garbage collection in the workers does not dirty the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"Preload finished in {time.time() - start:.2f} seconds")
+
+
+def create_listener(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def add_resilience_route(app):
+    """Serve this worker's circuit breaker state and concurrency limits"""
+    from sanic.response import json as json_response
+    from service_common.resilience import snapshot
+
+    async def resilience(request):
+        return json_response({"pid": os.getpid(), "dependencies": snapshot()})
+
+    async def llm_scheduler(request):
+        from actions.rag_components.llm import LLM
+        return json_response({"pid": os.getpid(), "scheduler": LLM.scheduler_stats()})
+
+    app.add_route(resilience, "/resilience", methods=["GET"])
+    app.add_route(llm_scheduler, "/llm_scheduler", methods=["GET"])
+
+
+def run_worker(sock: socket.socket, worker_id: int, torch_threads: int):
+    """Serve actions from a forked worker on the shared listening socket"""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    from rasa_sdk.endpoint import create_app
+
+    app = create_app("actions", cors_origins="*")
+    add_resilience_route(app)
+    run_kwargs = {"sock": sock, "access_log": False}
+    # Newer Sanic versions start their own worker manager unless told otherwise
+    if "single_process" in inspect.signature(app.run).parameters:
+        run_kwargs["single_process"] = True
+    print(f"Action worker {worker_id} (pid {os.getpid()}) serving")
+    app.run(**run_kwargs)
+
+
+def spawn_worker(sock: socket.socket, worker_id: int, torch_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            run_worker(sock, worker_id, torch_threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Rasa action server with preforked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ACTION_SERVER_WORKERS", os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("The prefork action server needs os.fork, which this platform lacks; "
+                 "run a single server with `rasa run actions` (start.bat) instead")
+
+    torch_threads = max(1, (os.cpu_count() or 1) // args.workers)
+    # Workers split the LLM quota between them
+    os.environ["ACTION_SERVER_WORKERS"] = str(args.workers)
+
+    preload()
+    sock = create_listener(args.host, args.port)
+    print(f"🚀 Starting {args.workers} action workers on {args.host}:{args.port}...")
+
+    workers = {}
+    for worker_id in range(args.workers):
+        workers[spawn_worker(sock, worker_id, torch_threads)] = worker_id
+
+    shutting_down = False
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Supervise workers, replacing any that exit unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_id = workers.pop(pid, None)
+        if worker_id is None or shutting_down:
+            continue
+        print(f"⚠️ Action worker {worker_id} (pid {pid}) exited with status {status}, restarting...")
+        workers[spawn_worker(sock, worker_id, torch_threads)] = worker_id
+
+    sock.close()
+    print("🛑 Action server stopped")
+
+
+if __name__ == "__main__":
+    main()
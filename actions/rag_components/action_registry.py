@@ -0,0 +1,109 @@
+import os
+from typing import Dict, List, Optional
+
+import yaml
+from dotenv import load_dotenv
+
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.rag_response import INTENT_DOCUMENT_MAPPING, RAG_PROMPT, RetrievalSpec
+from actions.rag_components.scenario_router import ScenarioRouter
+
+load_dotenv()
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ACTION_REGISTRY_PATH = os.getenv("ACTION_REGISTRY_CONFIG", os.path.join(project_root, "action_registry.yml"))
+
+SPEC_SETTINGS = ("k", "max_docs", "token_budget", "max_words", "cache", "cache_ttl")
+
+
+class ActionSpec:
+    """A configured RAG action: its query template and one compiled RetrievalSpec per intent
+
+    Scenario actions pick a scenario per message, either by keyword rules or,
+    with ``router: embedding``, by the nearest scenario centroid (falling back
+    to the keyword rules when no centroid is close enough).
+    """
+
+    def __init__(self, name: str, config: dict, defaults: dict, prompts: Dict[str, str]):
+        self.name = name
+        self.intent: Optional[str] = config.get("intent")
+        self.query_template: str = config.get("query_template", "{text}")
+        self.fallback_message: Optional[str] = config.get("fallback_message")
+        self.default_scenario: str = config.get("default_scenario", "general")
+        self.scenarios: List[dict] = [
+            {**scenario, "keyword": scenario["keyword"].lower()} for scenario in config.get("scenarios") or []
+        ]
+
+        settings = {
+            key: config[key] if key in config else defaults[key]
+            for key in SPEC_SETTINGS if key in config or key in defaults
+        }
+        prompt_name = config.get("prompt", defaults.get("prompt", "default"))
+        if prompt_name not in prompts:
+            raise ValueError(f"Action '{name}' uses unknown prompt '{prompt_name}'")
+        self._tenants = config.get("tenants")
+        self._settings = {**settings, "prompt": prompts[prompt_name]}
+        self._specs: Dict[Optional[str], RetrievalSpec] = {}
+        self.router: Optional[ScenarioRouter] = None
+        if self.scenarios and config.get("router") == "embedding":
+            self.router = ScenarioRouter(self.scenarios, min_score=config.get("router_min_score", 0.3))
+
+        # Compile every intent this action can route to up front
+        for intent in {self.intent, *(scenario.get("intent") for scenario in self.scenarios)}:
+            if intent is not None:
+                self.spec_for(intent)
+
+    def spec_for(self, intent: Optional[str]) -> RetrievalSpec:
+        if intent not in self._specs:
+            tenants = self._tenants if self._tenants is not None else INTENT_DOCUMENT_MAPPING.get(intent)
+            self._specs[intent] = RetrievalSpec(tenants=tenants, **self._settings)
+        return self._specs[intent]
+
+    def keyword_route(self, text: str) -> Optional[dict]:
+        """First scenario whose keyword occurs in the message"""
+        lowered = text.lower()
+        return next((rule for rule in self.scenarios if rule["keyword"] in lowered), None)
+
+    def build_query(self, text: str, message_intent: Optional[str]) -> dict:
+        """Return the query_rag_system arguments for a user message"""
+        intent = self.intent or message_intent
+        scenario = None
+        pinned_docs = []
+        query_vector = None
+
+        if self.router is not None:
+            # Embed the message once; retrieval reuses the vector
+            query_vector = Embeddings.get_embeddings().embed_query(text)
+            scenario, _ = self.router.route(query_vector)
+            if scenario is not None:
+                section = self.router.section_document(scenario)
+                pinned_docs = [section] if section is not None else []
+        if scenario is None and self.scenarios:
+            scenario = self.keyword_route(text)
+
+        if scenario is not None:
+            intent = scenario.get("intent", intent)
+        query = self.query_template.format(
+            text=text,
+            scenario=scenario.get("scenario", self.default_scenario) if scenario else self.default_scenario
+        )
+        return {
+            "question": query,
+            "intent": intent,
+            "spec": self.spec_for(intent),
+            "pinned_docs": pinned_docs,
+            "query_vector": query_vector,
+        }
+
+
+def load_action_registry(path: str = ACTION_REGISTRY_PATH) -> Dict[str, ActionSpec]:
+    """Load and compile the action table from action_registry.yml"""
+    with open(path, encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    defaults = config.get("defaults") or {}
+    prompts = {"default": RAG_PROMPT, **(config.get("prompts") or {})}
+    return {
+        name: ActionSpec(name, action_config or {}, defaults, prompts)
+        for name, action_config in (config.get("actions") or {}).items()
+    }
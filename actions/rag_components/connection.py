@@ -0,0 +1,188 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import weaviate
+from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.exceptions import WeaviateConnectionError
+from dotenv import load_dotenv
+from actions.rag_components.structured_log import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+
+class WeaviateSettings:
+    """Connection settings for Weaviate, read from the environment."""
+
+    def __init__(self):
+        self.host = os.getenv("WEAVIATE_HOST", "localhost")
+        self.port = int(os.getenv("WEAVIATE_PORT", "8080"))
+        self.secure = os.getenv("WEAVIATE_SECURE", "false").lower() == "true"
+        self.grpc_host = os.getenv("WEAVIATE_GRPC_HOST", self.host)
+        self.grpc_port = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
+        self.grpc_secure = os.getenv("WEAVIATE_GRPC_SECURE", "false").lower() == "true"
+        self.pool_size = int(os.getenv("WEAVIATE_POOL_SIZE", "4"))
+        self.max_concurrent_queries = int(os.getenv("WEAVIATE_MAX_CONCURRENT_QUERIES", "8"))
+        self.health_check_interval = float(os.getenv("WEAVIATE_HEALTH_CHECK_INTERVAL", "30"))
+        self.reconnect_attempts = int(os.getenv("WEAVIATE_RECONNECT_ATTEMPTS", "5"))
+        self.reconnect_backoff = float(os.getenv("WEAVIATE_RECONNECT_BACKOFF", "0.5"))
+        self.query_timeout = int(os.getenv("WEAVIATE_QUERY_TIMEOUT", "30"))
+        self.checkout_timeout = float(os.getenv("WEAVIATE_CHECKOUT_TIMEOUT", "10"))
+
+    def connection_kwargs(self) -> dict:
+        return {
+            "http_host": self.host,
+            "http_port": self.port,
+            "http_secure": self.secure,
+            "grpc_host": self.grpc_host,
+            "grpc_port": self.grpc_port,
+            "grpc_secure": self.grpc_secure,
+            "additional_config": AdditionalConfig(
+                timeout=Timeout(init=10, query=self.query_timeout, insert=120)
+            ),
+        }
+
+
+def _backoff_delays(settings: WeaviateSettings):
+    """Yield exponential backoff delays, one per reconnect attempt."""
+    for attempt in range(settings.reconnect_attempts):
+        yield settings.reconnect_backoff * (2 ** attempt)
+
+
+def connect_with_backoff(settings: WeaviateSettings) -> weaviate.WeaviateClient:
+    """Open a synchronous client, retrying with exponential backoff."""
+    last_error = None
+    for delay in _backoff_delays(settings):
+        try:
+            client = weaviate.connect_to_custom(**settings.connection_kwargs())
+            if client.is_ready():
+                return client
+            client.close()
+            last_error = Exception("Weaviate is not ready")
+        except Exception as e:
+            last_error = e
+        log.warning("vector_store.connect_retry", "Weaviate connection failed, retrying", error=str(last_error), delay=round(delay, 1))
+        time.sleep(delay)
+    raise ConnectionError(f"Could not connect to Weaviate at {settings.host}:{settings.port}: {last_error}")
+
+
+class PoolCheckoutTimeout(TimeoutError):
+    """No pooled Weaviate client became available within the checkout deadline."""
+
+
+class _PooledClient:
+    """A pooled client together with the time it was last known to be healthy."""
+
+    def __init__(self, client: weaviate.WeaviateClient):
+        self.client = client
+        self.last_checked = time.monotonic()
+
+
+class ClientPool:
+    """
+    Thread-safe pool of synchronous Weaviate clients.
+
+    Clients are created lazily up to ``pool_size``, health-checked when they
+    have been idle longer than ``health_check_interval`` and replaced when a
+    check or a query fails. ``max_concurrent_queries`` bounds the number of
+    queries in flight across all clients.
+    """
+
+    def __init__(self, settings: Optional[WeaviateSettings] = None):
+        self.settings = settings or WeaviateSettings()
+        self._idle: "queue.LifoQueue[_PooledClient]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._query_slots = threading.BoundedSemaphore(self.settings.max_concurrent_queries)
+
+    def _is_healthy(self, pooled: _PooledClient) -> bool:
+        if time.monotonic() - pooled.last_checked < self.settings.health_check_interval:
+            return True
+        try:
+            healthy = pooled.client.is_ready()
+        except Exception:
+            healthy = False
+        if healthy:
+            pooled.last_checked = time.monotonic()
+        return healthy
+
+    def _discard(self, pooled: _PooledClient):
+        try:
+            pooled.client.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _checkout(self) -> _PooledClient:
+        deadline = time.monotonic() + self.settings.checkout_timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.settings.pool_size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return _PooledClient(connect_with_backoff(self.settings))
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                # Wait briefly, then recheck: a discarded client frees a slot without
+                # putting anything back on the idle queue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolCheckoutTimeout(
+                        f"No Weaviate client available within {self.settings.checkout_timeout:g}s "
+                        f"(pool size {self.settings.pool_size})"
+                    )
+                try:
+                    pooled = self._idle.get(timeout=min(remaining, 0.1))
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(pooled):
+                return pooled
+            log.warning("vector_store.reconnect", "Discarding unhealthy pooled Weaviate client, reconnecting")
+            self._discard(pooled)
+
+    @contextmanager
+    def client(self):
+        """Borrow a healthy client for the duration of the block."""
+        pooled = self._checkout()
+        try:
+            yield pooled.client
+        except WeaviateConnectionError:
+            self._discard(pooled)
+            raise
+        except Exception:
+            self._idle.put(pooled)
+            raise
+        else:
+            self._idle.put(pooled)
+
+    @contextmanager
+    def query_client(self):
+        """Borrow a client while holding one of the query concurrency slots."""
+        with self._query_slots:
+            with self.client() as client:
+                yield client
+
+    def close(self):
+        """Close every idle client and reset the pool."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+        with self._lock:
+            self._created = 0
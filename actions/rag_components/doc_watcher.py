@@ -0,0 +1,278 @@
+"""
+Keep the live index in step with the policy document store.
+
+Watches DOC_WATCH_PATH (default: the policy_docs directory) for added,
+changed and removed .txt files, using inotify on Linux and polling the file
+modification times elsewhere (DOC_WATCH_MODE=poll forces polling). Bursts of
+events are debounced until the directory has been quiet for
+DOC_WATCH_DEBOUNCE seconds. Each affected document is then synced chunk by
+chunk (DocumentIndexer.sync_file), and cached answers built from it are
+invalidated.
+
+Indexing lag, the time from a file change to its chunks being searchable, is
+logged with every sync and kept in DocumentWatcher.stats.
+
+Usage:
+    python actions/rag_components/doc_watcher.py
+    python actions/rag_components/doc_watcher.py --mode poll --debounce 5
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Set
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+
+from actions.rag_components.indexing import DOCUMENTS_PATH, DocumentIndexer
+from actions.rag_components.response_cache import ResponseCache
+from actions.rag_components.structured_log import get_logger
+from actions.rag_components.vector_store import DatabaseManager
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+WATCH_PATH = os.getenv("DOC_WATCH_PATH", DOCUMENTS_PATH)
+WATCH_MODE = os.getenv("DOC_WATCH_MODE", "auto")
+DEBOUNCE_SECONDS = float(os.getenv("DOC_WATCH_DEBOUNCE", "2"))
+POLL_INTERVAL = float(os.getenv("DOC_WATCH_POLL_INTERVAL", "5"))
+SYNC_ON_START = os.getenv("DOC_WATCH_SYNC_ON_START", "true").lower() == "true"
+
+DOCUMENT_SUFFIX = ".txt"
+DUMMY_TENANT = "dummy_example_tenant"
+
+# inotify(7) event masks
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifySource:
+    """Changed file names from inotify on the watched directory"""
+
+    mode = "inotify"
+
+    def __init__(self, path: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+        if libc.inotify_add_watch(self._fd, os.fsencode(path), mask) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+
+    def read(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, 64 * 1024)
+        names = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            start = offset + _EVENT_HEADER.size
+            name = data[start:start + length].rstrip(b"\0").decode("utf-8", "replace")
+            if name:
+                names.add(name)
+            offset = start + length
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingSource:
+    """Changed file names from comparing modification times and sizes"""
+
+    mode = "poll"
+
+    def __init__(self, path: str, interval: float = POLL_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout: float) -> Set[str]:
+        time.sleep(max(0.0, min(timeout, self._next_scan - time.monotonic())))
+        if time.monotonic() < self._next_scan:
+            return set()
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {
+            name for name in set(snapshot) | set(self._snapshot)
+            if snapshot.get(name) != self._snapshot.get(name)
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_source(path: str, mode: str = WATCH_MODE):
+    if mode in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifySource(path)
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            log.warning("doc_watcher.inotify_unavailable", "inotify unavailable, polling instead", error=str(e))
+    return PollingSource(path)
+
+
+class DocumentWatcher:
+    """Background thread that syncs changed policy documents into the live index"""
+
+    def __init__(self, path: str = WATCH_PATH, mode: str = WATCH_MODE, debounce: float = DEBOUNCE_SECONDS,
+                 indexer: Optional[DocumentIndexer] = None):
+        self.path = path
+        self.mode = mode
+        self.debounce = debounce
+        self.indexer = indexer or DocumentIndexer()
+        self._pending: Dict[str, float] = {}
+        self._last_event = 0.0
+        self._lags = deque(maxlen=200)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "mode": None,
+            "path": path,
+            "syncs": 0,
+            "errors": 0,
+            "pending": 0,
+            "last_lag_seconds": None,
+            "p95_lag_seconds": None,
+            "max_lag_seconds": None,
+            "last_result": None,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="doc-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def sync_all(self):
+        """Reconcile the index with the directory, for changes made while nobody was watching"""
+        names = {name for name in os.listdir(self.path) if name.endswith(DOCUMENT_SUFFIX)}
+        tenants = {self.indexer._create_tennant_name(name): name for name in names}
+        for tenant in DatabaseManager.list_tenants():
+            if tenant != DUMMY_TENANT and tenant not in tenants:
+                names.add(f"{tenant}{DOCUMENT_SUFFIX}")
+        now = time.time()
+        for name in names:
+            self._pending.setdefault(name, now)
+        self.flush()
+
+    def run(self):
+        source = open_source(self.path, self.mode)
+        self.stats["mode"] = source.mode
+        log.info("doc_watcher.started", "Watching policy documents", path=self.path, mode=source.mode)
+        try:
+            if SYNC_ON_START:
+                self.sync_all()
+            while not self._stop.is_set():
+                changed = source.read(self.debounce if self._pending else 1.0)
+                now = time.time()
+                for name in changed:
+                    if name.endswith(DOCUMENT_SUFFIX):
+                        self._pending.setdefault(name, now)
+                        self._last_event = now
+                self.stats["pending"] = len(self._pending)
+                if self._pending and now - self._last_event >= self.debounce:
+                    self.flush()
+        finally:
+            source.close()
+
+    def _rebuild_running(self) -> bool:
+        from actions.rag_components.index_versions import rebuild_running
+        return rebuild_running()
+
+    def flush(self):
+        """Sync every pending document, unless a full rebuild is writing a new version"""
+        if self._rebuild_running():
+            return
+        pending, self._pending = self._pending, {}
+        for name, first_seen in sorted(pending.items()):
+            path = os.path.join(self.path, name)
+            try:
+                if os.path.exists(path):
+                    result = self.indexer.sync_file(path)
+                    if result is None:
+                        # Unreadable, most likely mid-write; retry after the next quiet period
+                        self._pending.setdefault(name, first_seen)
+                        continue
+                    changed = result["added"] or result["removed"]
+                else:
+                    result = self.indexer.remove_file(path)
+                    changed = True
+                if changed:
+                    result["invalidated_answers"] = ResponseCache.invalidate_tenant(result["tenant"])
+                self._record(name, first_seen, result)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.error("doc_watcher.sync_failed", "Failed to sync document", file=name, error=str(e))
+        self.stats["pending"] = len(self._pending)
+
+    def _record(self, name: str, first_seen: float, result: dict):
+        # Lag runs from the file's last write (or the event, for deletions) to the sync finishing
+        try:
+            changed_at = min(first_seen, os.path.getmtime(os.path.join(self.path, name)))
+        except OSError:
+            changed_at = first_seen
+        lag = max(0.0, time.time() - changed_at)
+        self._lags.append(lag)
+        ordered = sorted(self._lags)
+        self.stats.update({
+            "syncs": self.stats["syncs"] + 1,
+            "last_lag_seconds": round(lag, 3),
+            "p95_lag_seconds": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            "max_lag_seconds": round(max(self.stats["max_lag_seconds"] or 0.0, lag), 3),
+            "last_result": result,
+        })
+        log.info("doc_watcher.synced", "Document reindexed", file=name, lag_seconds=round(lag, 3), **result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reindex policy documents as they change")
+    parser.add_argument("--path", default=WATCH_PATH)
+    parser.add_argument("--mode", choices=["auto", "inotify", "poll"], default=WATCH_MODE)
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS)
+    args = parser.parse_args()
+
+    watcher = DocumentWatcher(args.path, args.mode, args.debounce)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print(json.dumps(watcher.stats, indent=2))
+    finally:
+        DatabaseManager.close_client()
@@ -0,0 +1,154 @@
+"""
+Shared embedding inference service.
+
+Holds a single copy of the embedding model and serves it over HTTP or a UNIX
+socket. Concurrent requests that arrive within a short window are grouped
+into one micro-batch, so throughput under load grows with batch size instead
+of each caller running the model on its own.
+
+Run with:
+    python -m actions.rag_components.embedding_server --port 8600
+    python -m actions.rag_components.embedding_server --uds /tmp/insurebot-embeddings.sock
+
+Then set EMBEDDING_SERVER_URL (or EMBEDDING_SERVER_SOCKET) for the processes
+that should use it.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+import uvicorn
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from actions.rag_components.embeddings import Embeddings
+
+BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+
+class QueryRequest(BaseModel):
+    text: str
+
+
+class DocumentsRequest(BaseModel):
+    texts: List[str]
+
+
+class MicroBatcher:
+    """
+    Collects texts from concurrent callers and embeds them together.
+
+    The first text to arrive opens a window of ``window_ms``; everything that
+    arrives before it closes (up to ``max_batch_size`` texts) is embedded in a
+    single model call on a worker thread.
+    """
+
+    def __init__(self, model, window_ms: float = BATCH_WINDOW_MS, max_batch_size: int = MAX_BATCH_SIZE):
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.texts = 0
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self.queue.put((text, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await asyncio.to_thread(self.model.embed_documents, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+batcher: MicroBatcher = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global batcher
+    batcher = MicroBatcher(Embeddings.load_local_model())
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="InsureBot Embedding Service", version="1.0.0", lifespan=lifespan)
+
+
+@app.post("/embed_query")
+async def embed_query(request: QueryRequest):
+    vectors = await batcher.embed([request.text])
+    return {"embedding": vectors[0]}
+
+
+@app.post("/embed_documents")
+async def embed_documents(request: DocumentsRequest):
+    return {"embeddings": await batcher.embed(request.texts)}
+
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "batches": batcher.batches,
+        "texts": batcher.texts,
+        "average_batch_size": round(batcher.texts / batcher.batches, 2) if batcher.batches else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the shared embedding service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--uds", help="Serve on this UNIX socket path instead of TCP")
+    args = parser.parse_args()
+
+    if args.uds:
+        uvicorn.run(app, uds=args.uds, log_level="info")
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="info")
@@ -1,19 +1,95 @@
+from langchain_core.embeddings import Embeddings as BaseEmbeddings
 from langchain_huggingface import HuggingFaceEmbeddings
+from typing import List
+import httpx
+import os
 import time
 
+from actions.rag_components.structured_log import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class EmbeddingServiceClient(BaseEmbeddings):
+    """LangChain embeddings backed by the shared embedding service."""
+
+    def __init__(self, url: str = None, socket_path: str = None, timeout: float = 30.0):
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self.base_url = url or "http://embeddings"
+        self._client = httpx.Client(base_url=self.base_url, transport=self._transport, timeout=timeout)
+
+    @property
+    def _transport(self):
+        return httpx.HTTPTransport(uds=self._socket_path) if self._socket_path else None
+
+    def reset_after_fork(self):
+        """Open a fresh connection pool; sockets must not be shared across a fork"""
+        self._client = httpx.Client(base_url=self.base_url, transport=self._transport, timeout=self._timeout)
+
+    def ping(self) -> bool:
+        try:
+            return self._client.get("/health").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def embed_query(self, text: str) -> List[float]:
+        response = self._client.post("/embed_query", json={"text": text})
+        response.raise_for_status()
+        return response.json()["embedding"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.post("/embed_documents", json={"texts": texts})
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+
 class Embeddings:
-    """Singleton class to manage the embeddings model instance."""
+    """Singleton class to manage the embeddings model instance.
+
+    When EMBEDDING_SERVER_URL or EMBEDDING_SERVER_SOCKET is set and the
+    service answers, a client for the shared embedding service is used instead
+    of loading a model copy in this process.
+    """
     _embeddings = None
 
     @classmethod
-    def get_embeddings(cls, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        start = time.time()
+    def get_embeddings(cls, model_name=DEFAULT_MODEL_NAME):
         if cls._embeddings is None:
-            print("Loading HuggingFace embedding model...")
-            cls._embeddings = HuggingFaceEmbeddings(
-                model_name=model_name,
-                encode_kwargs={"normalize_embeddings": True}
-            )
-            end = time.time()
-            print(f"Time taken to load embeddings: {end - start:.2f} seconds")
-        return cls._embeddings
\ No newline at end of file
+            server_url = os.getenv("EMBEDDING_SERVER_URL")
+            server_socket = os.getenv("EMBEDDING_SERVER_SOCKET")
+            if server_url or server_socket:
+                client = EmbeddingServiceClient(url=server_url, socket_path=server_socket)
+                if client.ping():
+                    log.info("embeddings.service", "Using shared embedding service", address=server_socket or server_url)
+                    cls._embeddings = client
+                    return cls._embeddings
+                log.warning("embeddings.service_unavailable", "Shared embedding service unavailable, loading model locally")
+            cls._embeddings = cls.load_local_model(model_name)
+        return cls._embeddings
+
+    @staticmethod
+    def load_local_model(model_name=DEFAULT_MODEL_NAME):
+        """Load the HuggingFace embedding model in this process"""
+        start = time.time()
+        log.info("embeddings.loading", "Loading HuggingFace embedding model", model=model_name)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model_name,
+            encode_kwargs={"normalize_embeddings": True}
+        )
+        end = time.time()
+        log.info("embeddings.loaded", "Loaded HuggingFace embedding model", model=model_name, seconds=round(end - start, 2))
+        return embeddings
+
+    @classmethod
+    def reset_after_fork(cls):
+        """Reconnect a service client after fork; a local model is shared copy-on-write"""
+        if isinstance(cls._embeddings, EmbeddingServiceClient):
+            cls._embeddings.reset_after_fork()
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=Embeddings.reset_after_fork)
@@ -0,0 +1,60 @@
+import os
+from typing import Dict, Optional
+
+import yaml
+from weaviate.classes.config import Configure, Reconfigure, VectorDistances
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INDEX_CONFIG_PATH = os.getenv("VECTOR_INDEX_CONFIG", os.path.join(project_root, "vector_index.yml"))
+
+_DISTANCES = {
+    "cosine": VectorDistances.COSINE,
+    "dot": VectorDistances.DOT,
+    "l2-squared": VectorDistances.L2_SQUARED,
+}
+
+
+def load_index_profiles(path: str = INDEX_CONFIG_PATH) -> Dict[str, dict]:
+    """Load every vector index profile from the config file"""
+    with open(path, encoding="utf-8") as f:
+        return (yaml.safe_load(f) or {}).get("profiles", {})
+
+
+def load_index_profile(name: Optional[str] = None, path: str = INDEX_CONFIG_PATH) -> dict:
+    """Load one profile, chosen by name or VECTOR_INDEX_PROFILE"""
+    name = name or os.getenv("VECTOR_INDEX_PROFILE", "default")
+    profiles = load_index_profiles(path)
+    if name not in profiles:
+        raise ValueError(f"Unknown vector index profile '{name}', available: {', '.join(profiles)}")
+    return profiles[name]
+
+
+def _quantizer(profile: dict):
+    quantizer = (profile.get("quantizer") or "none").lower()
+    if quantizer == "pq":
+        return Configure.VectorIndex.Quantizer.pq(
+            segments=profile.get("pq_segments", 0),
+            training_limit=profile.get("pq_training_limit", 100000)
+        )
+    if quantizer == "bq":
+        return Configure.VectorIndex.Quantizer.bq()
+    if quantizer != "none":
+        raise ValueError(f"Unknown quantizer '{quantizer}'")
+    return None
+
+
+def build_vector_index_config(profile: dict):
+    """Build the HNSW index configuration for collection creation"""
+    return Configure.VectorIndex.hnsw(
+        distance_metric=_DISTANCES[profile.get("distance", "cosine")],
+        ef=profile.get("ef", -1),
+        ef_construction=profile.get("ef_construction", 128),
+        max_connections=profile.get("max_connections", 32),
+        quantizer=_quantizer(profile)
+    )
+
+
+def build_query_reconfig(profile: dict):
+    """Build the query-time (mutable) part of a profile for an existing collection"""
+    return Reconfigure.VectorIndex.hnsw(ef=profile.get("ef", -1))
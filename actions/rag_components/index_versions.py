@@ -0,0 +1,301 @@
+"""
+Blue/green rebuilds of the document index.
+
+The live index is an alias named after DatabaseManager.COLLECTION_NAME that
+points at a versioned collection (e.g. InsuranceDocs_V20260101120000).
+A rebuild indexes the documents into a new version while the current one
+keeps serving, checks the new version against a smoke query set built from
+the NLU examples, and then repoints the alias in a single call. Older
+versions are kept for rollback up to INDEX_KEEP_VERSIONS and then deleted.
+
+The first rebuild over a plain (pre-alias) collection of the same name has
+to delete that collection before the alias can take its name, so queries
+fail for the moment between the two calls; every later swap is atomic.
+Aliases need Weaviate >= 1.32 and weaviate-client >= 4.16.
+
+Usage:
+    python actions/rag_components/index_versions.py rebuild
+    python actions/rag_components/index_versions.py list
+    python actions/rag_components/index_versions.py rollback
+    python actions/rag_components/index_versions.py gc
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+from weaviate.classes.query import MetadataQuery
+
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.indexing import DOCUMENTS_PATH, DocumentIndexer
+from actions.rag_components.rag_response import INTENT_DOCUMENT_MAPPING
+from actions.rag_components.response_cache import ResponseCache
+from actions.rag_components.structured_log import get_logger
+from actions.rag_components.training_data import load_nlu_examples
+from actions.rag_components.vector_store import DatabaseManager
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+SMOKE_EXAMPLES_PER_INTENT = int(os.getenv("INDEX_SMOKE_EXAMPLES", "3"))
+SMOKE_TOP_K = int(os.getenv("INDEX_SMOKE_TOP_K", "2"))
+SMOKE_MIN_HIT_RATE = float(os.getenv("INDEX_SMOKE_MIN_HIT_RATE", "0.6"))
+
+DUMMY_TENANT = "dummy_example_tenant"
+VERSION_SEPARATOR = "_V"
+
+_rebuild_lock = threading.Lock()
+
+
+def rebuild_running() -> bool:
+    return _rebuild_lock.locked()
+
+
+class IndexValidationError(RuntimeError):
+    """A freshly built index version failed its smoke checks"""
+
+
+def new_version_name() -> str:
+    return f"{DatabaseManager.COLLECTION_NAME}{VERSION_SEPARATOR}{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def list_versions(client=None) -> List[str]:
+    """Every version collection of the index, oldest first"""
+    client = client or DatabaseManager.get_client()
+    prefix = f"{DatabaseManager.COLLECTION_NAME}{VERSION_SEPARATOR}".lower()
+    return sorted(name for name in client.collections.list_all(simple=True) if name.lower().startswith(prefix))
+
+
+def _document_names(collection_name: str) -> List[str]:
+    return [name for name in DatabaseManager.list_tenants(collection_name) if name != DUMMY_TENANT]
+
+
+def _chunks_by_document(collection_name: str) -> Dict[str, List[str]]:
+    """Chunk texts of a version, grouped by document"""
+    collection = DatabaseManager.get_client().collections.get(collection_name)
+    chunks = defaultdict(list)
+    if DatabaseManager.is_shared_schema():
+        for obj in collection.iterator(return_properties=["text", "document_name"]):
+            chunks[obj.properties.get("document_name")].append(obj.properties.get("text", ""))
+        return dict(chunks)
+    for document in _document_names(collection_name):
+        for obj in collection.with_tenant(document).iterator(return_properties=["text"]):
+            chunks[document].append(obj.properties.get("text", ""))
+    return dict(chunks)
+
+
+def _content_digest(texts: List[str]) -> str:
+    return hashlib.sha1(json.dumps(sorted(texts)).encode("utf-8")).hexdigest()
+
+
+def changed_documents(old_collection: Optional[str], new_collection: str) -> List[str]:
+    """Documents whose chunks differ between two versions (all of them when there is no old one)"""
+    new_chunks = _chunks_by_document(new_collection)
+    if old_collection is None:
+        return sorted(new_chunks)
+    old_chunks = _chunks_by_document(old_collection)
+    return sorted(
+        document for document in set(old_chunks) | set(new_chunks)
+        if _content_digest(old_chunks.get(document, [])) != _content_digest(new_chunks.get(document, []))
+    )
+
+
+def _closest_documents(collection_name: str, documents: List[str], query_vector) -> List[str]:
+    """Documents ranked by their best chunk's distance to the query"""
+    collection = DatabaseManager.get_client().collections.get(collection_name)
+    if DatabaseManager.is_shared_schema():
+        response = collection.query.near_vector(
+            near_vector=query_vector,
+            limit=SMOKE_TOP_K * 4,
+            return_metadata=MetadataQuery(distance=True),
+            return_properties=["document_name"]
+        )
+        ranked = []
+        for obj in response.objects:
+            name = obj.properties.get("document_name")
+            if name not in ranked:
+                ranked.append(name)
+        return ranked
+
+    best = {}
+    for document in documents:
+        response = collection.with_tenant(document).query.near_vector(
+            near_vector=query_vector,
+            limit=1,
+            return_metadata=MetadataQuery(distance=True)
+        )
+        if response.objects:
+            best[document] = response.objects[0].metadata.distance
+    return sorted(best, key=best.get)
+
+
+def validate_version(collection_name: str) -> dict:
+    """
+    Smoke-test a version before it goes live.
+
+    Every document referenced by INTENT_DOCUMENT_MAPPING must hold chunks, and
+    for a sample of NLU examples per intent one of the intent's documents must
+    rank in the top SMOKE_TOP_K documents at least SMOKE_MIN_HIT_RATE of the time.
+    Raises IndexValidationError otherwise.
+    """
+    chunks = _chunks_by_document(collection_name)
+    expected = sorted({document for documents in INTENT_DOCUMENT_MAPPING.values() for document in documents})
+    missing = [document for document in expected if not chunks.get(document)]
+    if missing:
+        raise IndexValidationError(f"{collection_name} has no chunks for: {', '.join(missing)}")
+
+    examples = load_nlu_examples()
+    queries = [
+        (text, intent)
+        for intent in INTENT_DOCUMENT_MAPPING
+        for text in examples.get(intent, [])[:SMOKE_EXAMPLES_PER_INTENT]
+    ]
+    if not queries:
+        raise IndexValidationError("No NLU examples available for the smoke query set")
+
+    vectors = Embeddings.get_embeddings().embed_documents([text for text, _ in queries])
+    documents = sorted(chunks)
+    misses = []
+    for (text, intent), vector in zip(queries, vectors):
+        ranked = _closest_documents(collection_name, documents, vector)[:SMOKE_TOP_K]
+        if not set(ranked) & set(INTENT_DOCUMENT_MAPPING[intent]):
+            misses.append({"query": text, "intent": intent, "got": ranked})
+
+    hit_rate = 1 - len(misses) / len(queries)
+    result = {
+        "collection": collection_name,
+        "documents": {document: len(texts) for document, texts in chunks.items()},
+        "queries": len(queries),
+        "hit_rate": round(hit_rate, 3),
+        "misses": misses[:10],
+    }
+    if hit_rate < SMOKE_MIN_HIT_RATE:
+        raise IndexValidationError(
+            f"{collection_name} smoke hit rate {hit_rate:.2f} is below {SMOKE_MIN_HIT_RATE:.2f}: {json.dumps(result['misses'][:3])}"
+        )
+    return result
+
+
+def swap_alias(collection_name: str) -> Optional[str]:
+    """Point the live alias at a version, returning the version it pointed at before"""
+    client = DatabaseManager.get_client()
+    alias_name = DatabaseManager.COLLECTION_NAME
+    previous = DatabaseManager.alias_target(client)
+
+    if previous is not None:
+        client.alias.update(alias_name=alias_name, new_target_collection=collection_name)
+    else:
+        if client.collections.exists(alias_name):
+            # One-time migration: the plain collection must go before the alias can take its name
+            log.warning("index_versions.legacy_collection_replaced", "Replacing plain collection with an alias", collection=alias_name)
+            client.collections.delete(alias_name)
+        client.alias.create(alias_name=alias_name, target_collection=collection_name)
+
+    DatabaseManager.reset_index_state()
+    log.info("index_versions.swapped", "Live index switched", alias=alias_name, collection=collection_name, previous=previous)
+    return previous
+
+
+def gc_versions(keep: int = KEEP_VERSIONS) -> List[str]:
+    """Delete all but the newest ``keep`` versions, never the live one"""
+    client = DatabaseManager.get_client()
+    live = DatabaseManager.alias_target(client)
+    versions = list_versions(client)
+    stale = [name for name in versions[:max(0, len(versions) - keep)] if name != live]
+    for name in stale:
+        client.collections.delete(name)
+        log.info("index_versions.deleted", "Deleted old index version", collection=name)
+    return stale
+
+
+def rebuild_index(path: str = DOCUMENTS_PATH, keep: int = KEEP_VERSIONS) -> dict:
+    """Build, validate and switch to a new index version while the current one keeps serving"""
+    if not _rebuild_lock.acquire(blocking=False):
+        raise RuntimeError("An index rebuild is already running")
+    try:
+        client = DatabaseManager.get_client()
+        version = new_version_name()
+        started = time.perf_counter()
+        log.info("index_versions.build_started", "Building index version", collection=version, path=path)
+
+        try:
+            DatabaseManager.create_collection(client, version)
+            error = DocumentIndexer().index_directory(path, collection_name=version)
+            if error is not None:
+                raise RuntimeError(str(error))
+            validation = validate_version(version)
+        except Exception:
+            # Leave the live version alone and drop the half-built one
+            if client.collections.exists(version):
+                client.collections.delete(version)
+            raise
+
+        previous = DatabaseManager.alias_target(client)
+        changed = changed_documents(previous, version)
+        swap_alias(version)
+
+        # Only answers built from documents whose chunks changed are stale
+        invalidated = sum(ResponseCache.invalidate_tenant(document) for document in changed)
+        deleted = gc_versions(keep)
+
+        summary = {
+            "collection": version,
+            "previous": previous,
+            "build_seconds": round(time.perf_counter() - started, 2),
+            "validation": validation,
+            "changed_documents": changed,
+            "invalidated_answers": invalidated,
+            "deleted_versions": deleted,
+        }
+        log.info("index_versions.build_finished", "Index version live", **summary)
+        return summary
+    finally:
+        _rebuild_lock.release()
+
+
+def rollback() -> str:
+    """Point the alias back at the newest version older than the live one"""
+    client = DatabaseManager.get_client()
+    live = DatabaseManager.alias_target(client)
+    older = [name for name in list_versions(client) if live is None or name < live]
+    if not older:
+        raise RuntimeError("No older index version to roll back to")
+    target = older[-1]
+    changed = changed_documents(live, target)
+    swap_alias(target)
+    for document in changed:
+        ResponseCache.invalidate_tenant(document)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue/green rebuilds of the document index")
+    parser.add_argument("command", choices=["rebuild", "list", "rollback", "gc"])
+    parser.add_argument("--path", default=DOCUMENTS_PATH, help="Directory of .txt policy documents")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Versions to keep, including the live one")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "rebuild":
+            print(json.dumps(rebuild_index(args.path, args.keep), indent=2))
+        elif args.command == "list":
+            live = DatabaseManager.alias_target()
+            for name in list_versions():
+                print(f"{name}{'  (live)' if name == live else ''}")
+        elif args.command == "rollback":
+            print(f"Live index is now {rollback()}")
+        else:
+            print(f"Deleted: {', '.join(gc_versions(args.keep)) or 'nothing'}")
+    finally:
+        DatabaseManager.close_client()
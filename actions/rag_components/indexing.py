@@ -1,7 +1,7 @@
 import os
 import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,7 +11,13 @@ sys.path.insert(0, project_root)
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import TextLoader
 from langchain.schema import Document
+from weaviate.util import generate_uuid5
 from actions.rag_components.vector_store import DatabaseManager
+from actions.rag_components.structured_log import get_logger
+
+log = get_logger(__name__)
+
+DOCUMENTS_PATH = os.getenv("INDEX_DOCUMENTS_PATH", os.path.join(project_root, "actions", "document_store", "policy_docs"))
 
 class DocumentIndexer:
     """
@@ -86,10 +92,55 @@ class DocumentIndexer:
             
         return collection_name.lower()
     
-    def index_directory(self, path: str):
+    @staticmethod
+    def chunk_id(tenant_name: str, text: str) -> str:
+        """Deterministic chunk UUID, so an unchanged chunk keeps its id across edits of its file"""
+        return generate_uuid5(f"{tenant_name}\n{text}")
+    
+    def sync_file(self, file_path: str) -> Optional[dict]:
+        """
+        Bring one document's chunks in the live index in line with its file.
+        
+        Only chunks whose text is new are embedded and inserted, and only
+        chunks no longer in the file are deleted. Returns the counts, or None
+        when the file could not be read (e.g. it is still being written).
+        """
+        tenant_name = self._create_tennant_name(file_path)
+        if os.path.getsize(file_path) == 0:
+            chunks = []
+        else:
+            documents = self._load_document(file_path)
+            if not documents:
+                return None
+            chunks = self._split_documents(documents)
+        
+        wanted = {}
+        for chunk in chunks:
+            wanted.setdefault(self.chunk_id(tenant_name, chunk.page_content), chunk)
+        existing = set(DatabaseManager.chunk_ids(tenant_name))
+        added = [chunk_id for chunk_id in wanted if chunk_id not in existing]
+        removed = [chunk_id for chunk_id in existing if chunk_id not in wanted]
+        
+        DatabaseManager.add_chunks(tenant_name, [wanted[chunk_id] for chunk_id in added], added)
+        DatabaseManager.delete_chunks(tenant_name, removed)
+        
+        result = {"tenant": tenant_name, "added": len(added), "removed": len(removed), "unchanged": len(wanted) - len(added)}
+        log.info("indexing.synced", "Synced document", file=Path(file_path).name, **result)
+        return result
+    
+    def remove_file(self, file_path: str) -> dict:
+        """Drop a deleted file's document from the live index"""
+        tenant_name = self._create_tennant_name(file_path)
+        DatabaseManager.delete_document(tenant_name)
+        return {"tenant": tenant_name, "deleted": True}
+    
+    def index_directory(self, path: str, collection_name: str = None):
         """
         Index all documents in a directory with multi-tenancy.
         
+        Args:
+            path: Directory of .txt documents
+            collection_name: Collection version to write into instead of the live index
         """
         files = list(Path(path).glob("*.txt"))
         
@@ -113,10 +164,15 @@ class DocumentIndexer:
                 # Create tenant name from file path
                 tenant_name = self._create_tennant_name(str(file_path))
                 
+                # The ids sync_file uses, so the watcher finds these chunks unchanged
+                chunks = {}
+                for chunk in chunked_docs:
+                    chunks.setdefault(self.chunk_id(tenant_name, chunk.page_content), chunk)
+                
                 # Add documents to the specific tenant
-                DatabaseManager.add_documents_to_tenant(tenant_name, chunked_docs)
+                DatabaseManager.add_documents_to_tenant(tenant_name, list(chunks.values()), collection_name, ids=list(chunks))
                 
-                print(f"Indexed {len(chunked_docs)} chunks from {file_path.name} into tenant '{tenant_name}'")
+                log.info("indexing.indexed", "Indexed document", file=file_path.name, tenant=tenant_name, chunks=len(chunks))
             
         except Exception as e:
             return Exception(f"Indexing failed: {e}")
@@ -124,4 +180,4 @@ class DocumentIndexer:
 if __name__ == "__main__":
     # Example usage
     indexer = DocumentIndexer(chunk_size=1000, chunk_overlap=200)
-    indexer.index_directory("actions\document_store\policy_docs")
+    indexer.index_directory(DOCUMENTS_PATH)
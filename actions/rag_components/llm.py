@@ -1,28 +1,355 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
+import heapq
+import itertools
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from opentelemetry import trace
+from service_common.resilience import CircuitOpen, ConcurrencyLimited, DependencyUnavailable, dependency
+from actions.rag_components.structured_log import get_logger
 
 load_dotenv()
 
+log = get_logger(__name__)
+
+# Circuit breaker and adaptive concurrency limit for Gemini (GEMINI_* settings)
+gemini = dependency("gemini", timeout=20.0)
+# Client-side retries multiply the time a caller waits on a struggling API
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Provider quota for the whole deployment; each prefork worker gets an equal share
+LLM_RPM = float(os.getenv("LLM_RPM", "30"))
+LLM_TPM = float(os.getenv("LLM_TPM", "15000"))
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+# Requests dispatched together, and how long the first one waits for company
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "4"))
+LLM_BATCH_WINDOW = float(os.getenv("LLM_BATCH_WINDOW", "0.02"))
+# Longest a request may wait for quota before the caller falls back
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "8"))
+# Output tokens counted against the TPM quota per request, up front
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "100"))
+
+
+def estimate_tokens(prompt) -> int:
+    """Prompt tokens (about four characters each) plus the expected answer"""
+    text = prompt if isinstance(prompt, str) else str(prompt)
+    return max(1, len(text) // 4) + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+class QueueTimeout(DependencyUnavailable):
+    def __init__(self, waited: float):
+        super().__init__("gemini", f"no quota within {waited:.1f}s")
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units evenly over a minute, holding at most a minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class _Request:
+    __slots__ = ("prompt", "conversation", "tokens", "finish_tag", "enqueued_at", "dispatched_at",
+                 "completed_at", "done", "result", "error", "cancelled", "probe")
+
+    def __init__(self, prompt, conversation: str, tokens: int):
+        self.prompt = prompt
+        self.conversation = conversation
+        self.tokens = tokens
+        self.finish_tag = 0.0
+        self.enqueued_at = time.monotonic()
+        self.dispatched_at = None
+        self.completed_at = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        # Whether the request's Gemini slot is the half-open probe
+        self.probe = False
+
+
+class LLMScheduler:
+    """
+    Queue in front of Gemini that keeps the process within its quota.
+
+    Requests are ordered by start-time fair queuing: each gets a finish tag
+    of max(virtual time, its conversation's last tag) + its estimated tokens,
+    and the smallest tag goes first. A conversation with many requests thus
+    cannot starve the others, and short prompts overtake long ones. A request
+    is dispatched only when the requests-per-minute and tokens-per-minute
+    buckets can pay for it and the Gemini breaker admits it, which reserves
+    one concurrency slot per request; up to LLM_BATCH_SIZE such requests are
+    sent together with ``batch``. Queue wait and model latency are recorded
+    separately.
+    """
+
+    def __init__(self, rpm: float, tpm: float, batch_size: int = LLM_BATCH_SIZE,
+                 batch_window: float = LLM_BATCH_WINDOW, queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.queue_timeout = queue_timeout
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_tag: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max(2, int(gemini.max_limit)), thread_name_prefix="llm-batch")
+        self._queue_waits = deque(maxlen=500)
+        self._model_latencies = deque(maxlen=500)
+        self.counters = {"submitted": 0, "dispatched": 0, "batches": 0, "queue_timeouts": 0, "throttled": 0, "failed": 0}
+        threading.Thread(target=self._dispatch_loop, name="llm-scheduler", daemon=True).start()
+
+    def submit(self, prompt, conversation: Optional[str] = None):
+        """Queue a prompt and block until its answer (or error) is back"""
+        try:
+            gemini.check()
+        except ConcurrencyLimited:
+            pass  # Waits in the queue for a free slot
+        request = _Request(prompt, conversation or "", estimate_tokens(prompt))
+        with self._cond:
+            start = max(self._virtual_time, self._last_tag.get(request.conversation, 0.0))
+            request.finish_tag = start + request.tokens
+            self._last_tag[request.conversation] = request.finish_tag
+            heapq.heappush(self._heap, (request.finish_tag, next(self._sequence), request))
+            self.counters["submitted"] += 1
+            self._cond.notify()
+
+        if not request.done.wait(self.queue_timeout):
+            with self._cond:
+                if request.dispatched_at is None:
+                    request.cancelled = True
+                    self.counters["queue_timeouts"] += 1
+                    raise QueueTimeout(time.monotonic() - request.enqueued_at)
+            request.done.wait()
+
+        span = trace.get_current_span()
+        span.set_attribute("llm.queue_wait_ms", round((request.dispatched_at - request.enqueued_at) * 1000, 1))
+        span.set_attribute("llm.model_ms", round((request.completed_at - request.dispatched_at) * 1000, 1))
+        span.set_attribute("llm.tokens_estimate", request.tokens)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _pop_live(self) -> Optional[_Request]:
+        while self._heap:
+            request = self._heap[0][2]
+            if not request.cancelled:
+                return request
+            heapq.heappop(self._heap)
+        return None
+
+    def _fail_queued(self, error: Exception):
+        while self._heap:
+            request = heapq.heappop(self._heap)[2]
+            if not request.cancelled:
+                request.dispatched_at = request.completed_at = time.monotonic()
+                request.error = error
+                request.done.set()
+
+    def _next_batch(self) -> List[_Request]:
+        """Wait for work and quota, then take the next batch off the queue"""
+        with self._cond:
+            while True:
+                head = self._pop_live()
+                if head is None:
+                    self._cond.wait()
+                    continue
+
+                # Give concurrent requests a moment to join the batch
+                deadline = head.enqueued_at + self.batch_window
+                while len(self._heap) < self.batch_size and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+
+                batch = []
+                wait = 0.0
+                limited = False
+                while len(batch) < self.batch_size:
+                    request = self._pop_live()
+                    if request is None:
+                        break
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(request.tokens))
+                    if wait > 0:
+                        break
+                    try:
+                        request.probe = gemini.admit()
+                    except CircuitOpen as e:
+                        # Nothing queued would get through; let the callers fall back now
+                        self._fail_queued(e)
+                        break
+                    except ConcurrencyLimited:
+                        # Stays queued until a running request frees its slot
+                        limited = True
+                        break
+                    heapq.heappop(self._heap)
+                    self.requests.take(1)
+                    self.tokens.take(request.tokens)
+                    self._virtual_time = request.finish_tag - request.tokens
+                    request.dispatched_at = time.monotonic()
+                    batch.append(request)
+                if batch:
+                    self._prune_tags()
+                    return batch
+
+                if limited:
+                    self._cond.wait(0.05)
+                elif wait > 0:
+                    self.counters["throttled"] += 1
+                    self._cond.wait(wait)
+
+    def _prune_tags(self):
+        # Conversations whose last request is already behind the virtual clock need no tag
+        if len(self._last_tag) > 1024:
+            self._last_tag = {key: tag for key, tag in self._last_tag.items() if tag > self._virtual_time}
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._next_batch()
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[_Request]):
+        # Each request already holds a Gemini slot, reserved by the dispatcher
+        started = time.monotonic()
+        try:
+            llm, _ = LLM.get_instance()
+            if len(batch) == 1:
+                results = [llm.invoke(batch[0].prompt)]
+            else:
+                # A failed prompt fails only its own request
+                results = llm.batch([request.prompt for request in batch],
+                                    config={"max_concurrency": len(batch)}, return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(batch)
+        completed = time.monotonic()
+        model_latency = completed - started
+        for request, result in zip(batch, results):
+            gemini.finish(request.probe, model_latency, ok=not isinstance(result, Exception))
+
+        with self._cond:
+            self.counters["dispatched"] += len(batch)
+            self.counters["batches"] += 1
+            self._model_latencies.append(model_latency)
+            for request, result in zip(batch, results):
+                self._queue_waits.append(request.dispatched_at - request.enqueued_at)
+                request.completed_at = completed
+                if isinstance(result, Exception):
+                    self.counters["failed"] += 1
+                    request.error = result
+                else:
+                    request.result = result
+                request.done.set()
+            # Wake the dispatcher if it is waiting for a free slot
+            self._cond.notify()
+        log.info("llm.batch_completed", "LLM batch completed", size=len(batch),
+                 model_ms=round(model_latency * 1000, 1),
+                 max_queue_wait_ms=round(max(r.dispatched_at - r.enqueued_at for r in batch) * 1000, 1))
+
+    def stats(self) -> dict:
+        def percentiles(values):
+            ordered = sorted(values)
+            if not ordered:
+                return {"p50_ms": None, "p95_ms": None}
+            return {
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+            }
+
+        with self._cond:
+            return {
+                "queued": sum(1 for _, _, request in self._heap if not request.cancelled),
+                "rpm_available": round(self.requests.level, 1),
+                "tpm_available": round(self.tokens.level),
+                "queue_wait": percentiles(self._queue_waits),
+                "model_latency": percentiles(self._model_latencies),
+                **self.counters,
+            }
+
 
 class LLM:
 
     _instance = None
+    _scheduler: Optional[LLMScheduler] = None
+    _scheduler_lock = threading.Lock()
     
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            print("Initializing Google Generative AI LLM...")
+            log.info("llm.initializing", "Initializing Google Generative AI LLM")
             try:
                 cls._instance = ChatGoogleGenerativeAI(
                     model="gemma-3-12b-it",
                     google_api_key=os.getenv("GOOGLE_API_KEY"),
                     temperature=0.1,
-                    max_output_tokens=1024
+                    max_output_tokens=1024,
+                    timeout=gemini.timeout,
+                    max_retries=LLM_MAX_RETRIES
                 )
-                print("Google Generative AI LLM initialized successfully.")
+                log.info("llm.initialized", "Google Generative AI LLM initialized")
             except Exception as e:
-                print(f"Error initializing Google Generative AI LLM: {e}")
+                log.error("llm.init_failed", "Error initializing Google Generative AI LLM", error=str(e))
                 raise
         return cls._instance, True
+
+    @classmethod
+    def get_scheduler(cls) -> LLMScheduler:
+        if cls._scheduler is None:
+            with cls._scheduler_lock:
+                if cls._scheduler is None:
+                    # Prefork workers share the provider quota equally
+                    workers = max(1, int(os.getenv("ACTION_SERVER_WORKERS", "1")))
+                    cls._scheduler = LLMScheduler(LLM_RPM / workers, LLM_TPM / workers)
+        return cls._scheduler
+
+    @classmethod
+    def invoke(cls, prompt, conversation_id: Optional[str] = None):
+        """Generate through the quota scheduler and the Gemini circuit breaker
+
+        Raises DependencyUnavailable without calling the API while the circuit
+        is open, or when no quota frees up within LLM_QUEUE_TIMEOUT.
+        """
+        if LLM_SCHEDULER_ENABLED:
+            return cls.get_scheduler().submit(prompt, conversation_id)
+        gemini.check()
+        llm, _ = cls.get_instance()
+        return gemini.call(llm.invoke, prompt)
+
+    @classmethod
+    def scheduler_stats(cls) -> Optional[dict]:
+        return cls._scheduler.stats() if cls._scheduler is not None else None
+
+    @classmethod
+    def reset_after_fork(cls):
+        """Drop the client inherited from a parent process; gRPC channels are not fork-safe"""
+        cls._instance = None
+        # The dispatcher thread does not survive a fork; start a new one lazily
+        cls._scheduler = None
+        cls._scheduler_lock = threading.Lock()
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=LLM.reset_after_fork)
         
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Migrate indexed documents from the per-document tenant layout to the single
+shared collection used by WEAVIATE_SCHEMA_MODE=shared.
+
+Objects are copied with their stored vectors, so nothing is re-embedded, and
+keep their UUIDs, so running the migration again overwrites instead of
+duplicating. The source collection is left untouched.
+
+Usage:
+    python actions/rag_components/migrate_schema.py
+    python actions/rag_components/migrate_schema.py --tenants payment_methods,scenario_responses
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from weaviate.classes.query import Filter
+from actions.rag_components.vector_store import DatabaseManager
+
+DUMMY_TENANT = "dummy_example_tenant"
+
+
+def _object_vector(obj):
+    # Named-vector clients return a dict, older ones a plain list
+    vector = obj.vector
+    if isinstance(vector, dict):
+        return vector.get("default") or next(iter(vector.values()), None)
+    return vector
+
+
+def migrate_tenants_to_shared(tenant_names=None, batch_size: int = 200) -> dict:
+    """Copy every (or the given) tenant into the shared collection, returning counts per document"""
+    client = DatabaseManager.get_client()
+    source_name = DatabaseManager.TENANT_COLLECTION_NAME
+    target_name = DatabaseManager.SHARED_COLLECTION_NAME
+
+    if not client.collections.exists(source_name):
+        raise RuntimeError(f"Source collection '{source_name}' does not exist")
+    DatabaseManager.create_shared_collection(client, target_name)
+
+    source = client.collections.get(source_name)
+    target = client.collections.get(target_name)
+    if tenant_names is None:
+        tenant_names = [name for name in source.tenants.get().keys() if name != DUMMY_TENANT]
+
+    counts = {}
+    for tenant_name in tenant_names:
+        copied = 0
+        with target.batch.fixed_size(batch_size=batch_size) as batch:
+            for obj in source.with_tenant(tenant_name).iterator(include_vector=True):
+                properties = dict(obj.properties)
+                properties["document_name"] = tenant_name
+                batch.add_object(properties=properties, vector=_object_vector(obj), uuid=obj.uuid)
+                copied += 1
+        failed = target.batch.failed_objects
+        if failed:
+            raise RuntimeError(f"{len(failed)} objects from tenant '{tenant_name}' failed to migrate: {failed[0].message}")
+        counts[tenant_name] = copied
+        print(f"Migrated {copied} objects from tenant '{tenant_name}'")
+    return counts
+
+
+def verify_migration(counts: dict) -> bool:
+    """Check that the shared collection holds as many objects per document as were copied"""
+    target = DatabaseManager.get_client().collections.get(DatabaseManager.SHARED_COLLECTION_NAME)
+    ok = True
+    for tenant_name, expected in counts.items():
+        actual = target.aggregate.over_all(
+            filters=Filter.by_property("document_name").equal(tenant_name),
+            total_count=True
+        ).total_count
+        status = "ok" if actual == expected else "MISMATCH"
+        ok = ok and actual == expected
+        print(f"{tenant_name}: expected {expected}, found {actual} [{status}]")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate tenant-per-document data to the shared collection")
+    parser.add_argument("--tenants", help="Comma separated tenants to migrate (default: all)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    tenants = [name.strip() for name in args.tenants.split(",")] if args.tenants else None
+    try:
+        migrated = migrate_tenants_to_shared(tenants, args.batch_size)
+        if verify_migration(migrated):
+            print("Migration complete. Set WEAVIATE_SCHEMA_MODE=shared to use the shared collection.")
+        else:
+            sys.exit(1)
+    finally:
+        DatabaseManager.close_client()
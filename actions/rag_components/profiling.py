@@ -0,0 +1,27 @@
+import functools
+import os
+
+from service_common import profiling
+from service_common.profiling import list_profiles, profile, profile_path
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# An action runs on a single thread, so cprofile sees all of it
+profiling.set_defaults(mode="cprofile", directory=os.path.join(project_root, "profiles"))
+
+PROFILE_SAMPLE_RATE = profiling.PROFILE_SAMPLE_RATE
+PROFILE_MODE = profiling.PROFILE_MODE
+
+
+def profiled_action(run):
+    """Decorator for Action.run that profiles a sample of runs"""
+    @functools.wraps(run)
+    def wrapper(self, dispatcher, tracker, domain):
+        metadata = {
+            "sender_id": tracker.sender_id,
+            "intent": (tracker.latest_message.get("intent") or {}).get("name"),
+            "text": tracker.latest_message.get("text"),
+        }
+        with profile("action", self.name(), metadata):
+            return run(self, dispatcher, tracker, domain)
+    return wrapper
@@ -1,10 +1,15 @@
-import logging
+import os
+import re
 from typing import List, Optional, Dict
 from langchain_core.prompts import ChatPromptTemplate
 from .llm import LLM
 from .vector_store import DatabaseManager
+from .response_cache import ResponseCache
+from .speculative import SpeculativeRetrieval
+from .structured_log import get_logger
+from .tracing import tracer
 
-logger = logging.getLogger(__name__)
+log = get_logger(__name__)
 
 # Intent to document mapping
 INTENT_DOCUMENT_MAPPING = {
@@ -44,108 +49,200 @@ Your task is to assist customers in paying their **pending insurance premiums**
 
 **Veena's Response:**"""
 
-def get_document_filter(intent: str) -> Optional[Dict]:
-    """Get document filter based on intent"""
-    if not intent or intent not in INTENT_DOCUMENT_MAPPING:
+# Every tenant named in the mapping, searched when an intent has no mapping
+ALL_TENANTS = tuple(sorted({tenant for tenants in INTENT_DOCUMENT_MAPPING.values() for tenant in tenants}))
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+
+def extractive_answer(question: str, docs: List, max_words: int) -> Optional[str]:
+    """The context sentences sharing the most words with the question, in document order
+
+    Used instead of a generated answer while the LLM is unavailable.
+    """
+    question_words = set(_WORD.findall(question.lower()))
+    sentences = [
+        sentence.strip()
+        for doc in docs
+        for sentence in _SENTENCE_END.split(doc.page_content.replace("\n", " "))
+        if sentence.strip()
+    ]
+    if not sentences:
         return None
-    
-    target_documents = INTENT_DOCUMENT_MAPPING[intent]
-    
-    # Create OR filter for multiple documents
-    if len(target_documents) == 1:
-        return {"document_name": target_documents[0]}
-    else:
-        # For multiple documents, we'll search each separately and combine
-        return {"documents": target_documents}
-
-def query_rag_system(question: str, intent: str = None) -> str:
-    """Main function called by Rasa actions with intent-guided retrieval using multi-tenancy"""
+    overlap = [len(question_words & set(_WORD.findall(sentence.lower()))) for sentence in sentences]
+    # Sentences unrelated to the question only pad the answer; keep the opening one if none relate
+    ranked = sorted((index for index in range(len(sentences)) if overlap[index]), key=lambda index: -overlap[index]) or [0]
+    chosen, words = [], 0
+    for index in ranked:
+        length = len(sentences[index].split())
+        if chosen and words + length > max_words:
+            break
+        chosen.append(index)
+        words += length
+    answer = " ".join(sentences[index] for index in sorted(chosen)).split()
+    return " ".join(answer[:max_words]) + ("..." if len(answer) > max_words else "")
+
+
+class RetrievalSpec:
+    """
+    Retrieval and generation settings for one action, compiled once.
+
+    ``k`` hits are taken per tenant when several tenants are searched and
+    ``max_docs`` caps the chunks placed in the prompt (it is also the limit
+    for single-tenant and fallback searches). ``token_budget`` bounds the
+    approximate size of that context. Without ``tenants`` every known tenant
+    is searched.
+    """
+    _prompts: Dict[str, ChatPromptTemplate] = {}
+    _intent_specs: Dict[Optional[str], "RetrievalSpec"] = {}
+
+    def __init__(self, tenants: Optional[List[str]] = None, k: int = 2, max_docs: int = 3,
+                 token_budget: Optional[int] = None, max_words: int = 35, cache: bool = True,
+                 cache_ttl: Optional[float] = None, prompt: str = RAG_PROMPT):
+        self.tenants = tuple(tenants or ())
+        self.k = k
+        self.max_docs = max_docs
+        self.token_budget = token_budget
+        self.max_words = max_words
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.prompt = self.compile_prompt(prompt)
+
+    @classmethod
+    def compile_prompt(cls, template: str) -> ChatPromptTemplate:
+        """Parse a prompt template once and share it between specs"""
+        if template not in cls._prompts:
+            cls._prompts[template] = ChatPromptTemplate.from_template(template)
+        return cls._prompts[template]
+
+    @classmethod
+    def for_intent(cls, intent: Optional[str]) -> "RetrievalSpec":
+        """Default spec for an intent, searching the tenants mapped to it"""
+        if intent not in cls._intent_specs:
+            cls._intent_specs[intent] = cls(tenants=INTENT_DOCUMENT_MAPPING.get(intent))
+        return cls._intent_specs[intent]
+
+    def retrieve(self, question: str, query_vector=None, exclude: tuple = (), limit: Optional[int] = None) -> List:
+        """Search this spec's tenants, skipping ``exclude`` (e.g. already pinned documents)"""
+        limit = self.max_docs if limit is None else limit
+        if limit <= 0:
+            return []
+        tenants = [tenant for tenant in self.tenants if tenant not in exclude]
+        if len(tenants) > 1:
+            # Search each document tenant and combine
+            return DatabaseManager.search_tenants(tenants, question, k=self.k, query_vector=query_vector)[:limit]
+        if len(tenants) == 1:
+            try:
+                return DatabaseManager.search_tenant(tenant_name=tenants[0], query=question, k=limit, query_vector=query_vector)
+            except Exception as e:
+                log.warning("rag.search_failed", "Failed to search tenant", tenant=tenants[0], error=str(e))
+                return []
+        if self.tenants:
+            # Every mapped tenant is already covered by pinned documents
+            return []
+        tenants = [tenant for tenant in ALL_TENANTS if tenant not in exclude]
+        return DatabaseManager.search_all_tenants(question, tenants, k=limit, query_vector=query_vector)
+
+    def fit_context(self, docs: List) -> List:
+        """Keep the best chunks that fit in the token budget (always at least one)"""
+        if not self.token_budget:
+            return docs
+        kept, used = [], 0
+        for doc in docs:
+            used += approx_tokens(doc.page_content)
+            if kept and used > self.token_budget:
+                break
+            kept.append(doc)
+        return kept
+
+
+def query_rag_system(question: str, intent: str = None, spec: RetrievalSpec = None,
+                     pinned_docs: Optional[List] = None, query_vector=None,
+                     conversation_id: Optional[str] = None) -> str:
+    """Main function called by Rasa actions with intent-guided retrieval using multi-tenancy
+
+    ``spec`` carries the calling action's retrieval settings; without it the
+    tenants mapped to ``intent`` are searched with the default settings.
+    ``pinned_docs`` are placed first in the context and their tenants are not
+    searched again; ``query_vector`` reuses an embedding computed by the caller.
+    ``conversation_id`` (the sender) keys fair queuing in the LLM scheduler.
+    """
+    pinned_docs = pinned_docs or []
+    spec = spec or RetrievalSpec.for_intent(intent)
     try:
-        # Get LLM instance
-        llm, _ = LLM.get_instance()
-        
-        # Get intent-based document filter
-        doc_filter = get_document_filter(intent)
+        # Serve precomputed or previously generated answers first
+        if spec.cache:
+            with tracer.start_as_current_span("rag.cache_lookup") as span:
+                cached_response = ResponseCache.get(question, intent)
+                span.set_attribute("cache.hit", cached_response is not None)
+            if cached_response is not None:
+                log.info("rag.cache_hit", "Response cache hit", intent=intent)
+                return cached_response
         
-        docs = []
+        exclude = tuple(doc.tenant for doc in pinned_docs)
+        limit = spec.max_docs - len(pinned_docs)
         
-        if doc_filter and "documents" in doc_filter:
-            # Search multiple specific document tenants
-            target_docs = doc_filter["documents"]
-            for doc_name in target_docs:
-                try:
-                    doc_results = DatabaseManager.search_tenant(
-                        tenant_name=doc_name,
-                        query=question, 
-                        k=2
-                    )
-                    docs.extend(doc_results)
-                except Exception as e:
-                    logger.warning(f"Failed to search tenant {doc_name}: {e}")
-                    continue
-            
-            # Limit total results
-            docs = docs[:3]
-            
-        elif doc_filter and len(doc_filter) == 1 and "document_name" in doc_filter:
-            # Search single specific document tenant
-            doc_name = doc_filter["document_name"]
-            try:
-                docs = DatabaseManager.search_tenant(
-                    tenant_name=doc_name,
-                    query=question,
-                    k=3
-                )
-            except Exception as e:
-                logger.warning(f"Failed to search tenant {doc_name}: {e}")
-                docs = []
-        else:
-            # Fallback to search across all known tenants if no intent mapping
-            # Get all known document tenants from the intent mapping
-            all_tenants = set()
-            for intent_docs in INTENT_DOCUMENT_MAPPING.values():
-                if isinstance(intent_docs, list):
-                    all_tenants.update(intent_docs)
-                else:
-                    all_tenants.add(intent_docs)
-            
-            docs = DatabaseManager.search_all_tenants(question, list(all_tenants), k=3)
+        # Retrieval started from the transcript while Rasa was classifying it, if it guessed right
+        with tracer.start_as_current_span("rag.speculative_take") as span:
+            retrieved = SpeculativeRetrieval.take(conversation_id, question, intent, spec, exclude, limit)
+            span.set_attribute("rag.speculative_hit", retrieved is not None)
+        if retrieved is None:
+            retrieved = spec.retrieve(question, query_vector=query_vector, exclude=exclude, limit=limit)
+        docs = spec.fit_context(pinned_docs + retrieved)
         
         if not docs:
-            logger.warning(f"No documents found for intent: {intent}, question: {question}")
+            log.warning("rag.no_documents", "No documents found", intent=intent, question=question)
             return "I apologize, but I couldn't find relevant information. Could you please rephrase your question?"
         
-        # Log which documents were retrieved
-        retrieved_docs = [doc.metadata.get('source_file', 'Unknown') for doc in docs]
-        retrieved_tenants = [doc.metadata.get('tenant', 'Unknown') for doc in docs]
-        logger.info(f"Intent: {intent} -> Retrieved from tenants: {retrieved_tenants}, files: {retrieved_docs}")
+        # Log which documents were retrieved (sampled, see LOG_SAMPLE_RATES)
+        retrieved_tenants = [doc.tenant or 'Unknown' for doc in docs]
+        log.info("rag.retrieved", "Retrieved context", intent=intent, tenants=retrieved_tenants,
+                 files=[doc.source or 'Unknown' for doc in docs])
         
-        # Combine contexts
-        context_text = "\n".join([
-            f"[{doc.metadata.get('source_file', 'Policy Document')}] {doc.page_content}" 
-            for doc in docs
-        ])
-        
-        # Generate response
-        prompt = ChatPromptTemplate.from_template(RAG_PROMPT)
-        response = llm.invoke(
-            prompt.format(
+        with tracer.start_as_current_span("rag.prompt_build") as span:
+            # Combine contexts
+            context_text = "\n".join([
+                f"[{os.path.basename(doc.source) if doc.source else 'Policy Document'}] {doc.text}" 
+                for doc in docs
+            ])
+            
+            prompt_text = spec.prompt.format(
                 context=context_text,
                 question=question,
                 intent=intent or "general_query"
             )
-        )
+            span.set_attribute("rag.prompt_chars", len(prompt_text))
+        
+        # Generate response; while Gemini is failing, answer from the cache or the context instead
+        try:
+            with tracer.start_as_current_span("rag.llm"):
+                response = LLM.invoke(prompt_text, conversation_id)
+        except Exception as e:
+            fallback = ResponseCache.get_stale(question, intent) or extractive_answer(question, docs, spec.max_words)
+            if fallback is None:
+                raise
+            log.warning("rag.llm_fallback", "LLM unavailable, answering without it", intent=intent, error=str(e))
+            return fallback
         
         # Extract and limit response
         response_text = response.content if hasattr(response, 'content') else str(response)
         words = response_text.split()
-        if len(words) > 35:
-            response_text = ' '.join(words[:35]) + "..."
+        if len(words) > spec.max_words:
+            response_text = ' '.join(words[:spec.max_words]) + "..."
         
+        if spec.cache:
+            ResponseCache.set(question, intent, response_text, retrieved_tenants, ttl=spec.cache_ttl)
         return response_text
         
     except Exception as e:
-        logger.error(f"Error in query_rag_system: {e}")
+        log.error("rag.failed", "Error in query_rag_system", intent=intent, error=str(e))
         return "I apologize for the technical issue. Please try rephrasing your question or contact customer service."
 
 
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from actions.rag_components.structured_log import get_logger
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ResponseCache:
+    """
+    Cache of generated RAG answers keyed by intent and normalized question.
+
+    A small in-process LRU sits in front of a SQLite file shared by every
+    process on the host, so answers precomputed by the warmup job (or by
+    another action worker) are visible to all workers. Each entry records
+    the tenants its context came from so it can be invalidated when those
+    documents change.
+    """
+    ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(project_root, ".cache", "responses.sqlite3"))
+    TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(6 * 3600)))
+    MEMORY_SIZE = int(os.getenv("RESPONSE_CACHE_MEMORY_SIZE", "512"))
+    # Bounds how long a worker can serve an entry another process invalidated
+    MEMORY_TTL = float(os.getenv("RESPONSE_CACHE_MEMORY_TTL", "60"))
+
+    _memory: "OrderedDict[str, tuple]" = OrderedDict()
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+    @classmethod
+    def make_key(cls, question: str, intent: Optional[str]) -> str:
+        return hashlib.sha1(f"{intent or ''}\n{cls.normalize(question)}".encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        connection = getattr(cls._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(cls.PATH), exist_ok=True)
+            connection = sqlite3.connect(cls.PATH, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, intent TEXT, question TEXT, answer TEXT, "
+                "tenants TEXT, created_at REAL, expires_at REAL)"
+            )
+            cls._local.connection = connection
+        return connection
+
+    @classmethod
+    def _remember(cls, key: str, answer: str, tenants: List[str], expires_at: float):
+        with cls._lock:
+            cls._memory[key] = (answer, tenants, min(expires_at, time.time() + cls.MEMORY_TTL))
+            cls._memory.move_to_end(key)
+            while len(cls._memory) > cls.MEMORY_SIZE:
+                cls._memory.popitem(last=False)
+
+    @classmethod
+    def get(cls, question: str, intent: Optional[str] = None) -> Optional[str]:
+        """Return a cached answer, or None"""
+        if not cls.ENABLED:
+            return None
+        key = cls.make_key(question, intent)
+        now = time.time()
+
+        with cls._lock:
+            entry = cls._memory.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    cls._memory.move_to_end(key)
+                    return entry[0]
+                del cls._memory[key]
+
+        try:
+            row = cls._connection().execute(
+                "SELECT answer, tenants, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.error("response_cache.read_failed", "Response cache read failed", error=str(e))
+            return None
+        if row is None or row[2] <= now:
+            return None
+        cls._remember(key, row[0], json.loads(row[1]), row[2])
+        return row[0]
+
+    @classmethod
+    def get_stale(cls, question: str, intent: Optional[str] = None) -> Optional[str]:
+        """Return a cached answer even if it has expired, as a fallback while the LLM is unavailable"""
+        if not cls.ENABLED:
+            return None
+        try:
+            row = cls._connection().execute(
+                "SELECT answer FROM responses WHERE key = ?", (cls.make_key(question, intent),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.error("response_cache.read_failed", "Response cache read failed", error=str(e))
+            return None
+        return row[0] if row is not None else None
+
+    @classmethod
+    def set(cls, question: str, intent: Optional[str], answer: str, tenants: List[str], ttl: Optional[float] = None):
+        """Store an answer together with the tenants its context came from"""
+        if not cls.ENABLED:
+            return
+        key = cls.make_key(question, intent)
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else cls.TTL)
+        tenants = sorted(set(tenants))
+        cls._remember(key, answer, tenants, expires_at)
+        try:
+            cls._connection().execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, intent, question, answer, json.dumps(tenants), now, expires_at)
+            )
+        except sqlite3.Error as e:
+            log.error("response_cache.write_failed", "Response cache write failed", error=str(e))
+
+    @classmethod
+    def invalidate_tenant(cls, tenant_name: str) -> int:
+        """Drop every answer built from the given tenant, returning the number removed"""
+        with cls._lock:
+            for key in [key for key, entry in cls._memory.items() if tenant_name in entry[1]]:
+                del cls._memory[key]
+        try:
+            cursor = cls._connection().execute(
+                "DELETE FROM responses WHERE EXISTS "
+                "(SELECT 1 FROM json_each(responses.tenants) WHERE json_each.value = ?)",
+                (tenant_name,)
+            )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            log.error("response_cache.invalidate_failed", "Response cache invalidation failed", error=str(e))
+            return 0
+
+    @classmethod
+    def clear(cls):
+        """Drop every cached answer"""
+        with cls._lock:
+            cls._memory.clear()
+        try:
+            cls._connection().execute("DELETE FROM responses")
+        except sqlite3.Error as e:
+            log.error("response_cache.clear_failed", "Response cache clear failed", error=str(e))
+
+    @classmethod
+    def reset_after_fork(cls):
+        """SQLite connections must not be shared across a fork"""
+        cls._local = threading.local()
+        cls._lock = threading.Lock()
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ResponseCache.reset_after_fork)
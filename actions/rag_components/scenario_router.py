@@ -0,0 +1,115 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.training_data import load_nlu_examples
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCENARIO_DOCUMENT = "scenario_responses"
+SCENARIO_RESPONSES_PATH = os.path.join(
+    project_root, "actions", "document_store", "policy_docs", f"{SCENARIO_DOCUMENT}.txt"
+)
+
+_SECTION_HEADER = re.compile(r"^Scenario (\d+):", re.MULTILINE)
+_CONCERN_LINE = re.compile(r'^Customer Concern:\s*"?(.*?)"?\s*$', re.MULTILINE)
+
+
+def load_scenario_sections(path: str = SCENARIO_RESPONSES_PATH) -> Dict[int, str]:
+    """Split scenario_responses.txt into its numbered "Scenario N: ..." sections"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    headers = list(_SECTION_HEADER.finditer(text))
+    sections = {}
+    for index, header in enumerate(headers):
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(text)
+        sections[int(header.group(1))] = text[header.start():end].strip()
+    return sections
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class ScenarioRouter:
+    """
+    Nearest-centroid scenario classifier over sentence embeddings.
+
+    Each scenario's centroid is the mean embedding of its section in
+    scenario_responses.txt, the customer concern quoted there and the NLU
+    examples of its intent. Routing a message is one matrix-vector product
+    against the precomputed centroid matrix, using the query embedding that
+    retrieval reuses afterwards.
+    """
+
+    def __init__(self, scenarios: List[dict], min_score: float = 0.3,
+                 examples: Optional[Dict[str, List[str]]] = None):
+        self.scenarios = scenarios
+        self.min_score = min_score
+        self._examples = examples
+        self._sections: Optional[Dict[int, str]] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def sections(self) -> Dict[int, str]:
+        if self._sections is None:
+            self._sections = load_scenario_sections()
+        return self._sections
+
+    def training_texts(self) -> List[List[str]]:
+        """Texts that define each scenario, in scenario order"""
+        examples = self._examples if self._examples is not None else load_nlu_examples()
+        texts = []
+        for scenario in self.scenarios:
+            scenario_texts = []
+            section = self.sections.get(scenario.get("section"))
+            if section:
+                scenario_texts.append(section)
+                scenario_texts.extend(_CONCERN_LINE.findall(section))
+            scenario_texts.extend(examples.get(scenario.get("intent"), []))
+            if not scenario_texts:
+                raise ValueError(f"Scenario '{scenario.get('scenario')}' has no section or NLU examples")
+            texts.append(scenario_texts)
+        return texts
+
+    @staticmethod
+    def centroids_from(vectors_per_scenario: List[np.ndarray]) -> np.ndarray:
+        """Unit-length mean of each scenario's (unit-length) vectors, stacked into a matrix"""
+        return normalize_rows(np.stack([normalize_rows(vectors).mean(axis=0) for vectors in vectors_per_scenario]))
+
+    def build(self):
+        """Embed the training texts and compute the centroid matrix"""
+        texts = self.training_texts()
+        flat = [text for scenario_texts in texts for text in scenario_texts]
+        vectors = np.asarray(Embeddings.get_embeddings().embed_documents(flat), dtype=np.float32)
+        bounds = np.cumsum([0] + [len(scenario_texts) for scenario_texts in texts])
+        self._centroids = self.centroids_from([vectors[start:end] for start, end in zip(bounds[:-1], bounds[1:])])
+
+    @property
+    def centroids(self) -> np.ndarray:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self.build()
+        return self._centroids
+
+    def route(self, query_vector) -> Tuple[Optional[dict], float]:
+        """Return the closest scenario and its cosine score, or None below min_score"""
+        scores = self.centroids @ normalize_rows(np.asarray(query_vector, dtype=np.float32))
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.scenarios[best] if score >= self.min_score else None), score
+
+    def section_document(self, scenario: dict):
+        """The scenario's section of scenario_responses.txt as a retrieval result"""
+        from actions.rag_components.vector_store import SearchHit
+        section = self.sections.get(scenario.get("section"))
+        if not section:
+            return None
+        return SearchHit(None, SCENARIO_DOCUMENT, None, f"{SCENARIO_DOCUMENT}.txt", section,
+                         {"section": scenario.get("section")})
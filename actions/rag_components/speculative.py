@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.response_cache import ResponseCache
+from actions.rag_components.scenario_router import ScenarioRouter, normalize_rows
+from actions.rag_components.structured_log import get_logger
+from actions.rag_components.training_data import load_intent_actions, load_nlu_examples
+from actions.rag_components.vector_store import SearchHit
+
+load_dotenv()
+
+log = get_logger(__name__)
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SPECULATIVE_ENABLED = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+SPECULATIVE_PATH = os.getenv("SPECULATIVE_PATH", os.path.join(project_root, ".cache", "speculative.sqlite3"))
+# Results older than this are ignored; a turn reaches its action well within it
+SPECULATIVE_TTL = float(os.getenv("SPECULATIVE_TTL", "30"))
+# How long an action waits for a speculative search that is still running
+SPECULATIVE_WAIT = float(os.getenv("SPECULATIVE_WAIT", "1.0"))
+# Below this cosine similarity to every intent centroid nothing is speculated
+SPECULATIVE_MIN_SCORE = float(os.getenv("SPECULATIVE_MIN_SCORE", "0.35"))
+
+
+def speculation_key(sender: str, question: str, intent: Optional[str], spec, exclude: tuple, limit: int) -> str:
+    """Identify a retrieval by everything that determines its result"""
+    parts = [sender, question, intent or "", ",".join(spec.tenants), str(spec.k), ",".join(sorted(exclude)), str(limit)]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class IntentPredictor:
+    """Nearest-centroid guess of the intent of a message, from the NLU examples of the intents that run RAG actions"""
+
+    def __init__(self, intents: List[str]):
+        self.intents = intents
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def centroids(self) -> np.ndarray:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    examples = load_nlu_examples()
+                    embeddings = Embeddings.get_embeddings()
+                    self._centroids = ScenarioRouter.centroids_from([
+                        np.asarray(embeddings.embed_documents(examples[intent]), dtype=np.float32)
+                        for intent in self.intents
+                    ])
+        return self._centroids
+
+    def predict(self, query_vector) -> Tuple[Optional[str], float]:
+        scores = self.centroids @ normalize_rows(np.asarray(query_vector, dtype=np.float32))
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.intents[best] if score >= SPECULATIVE_MIN_SCORE else None), score
+
+
+class SpeculativeRetrieval:
+    """
+    Retrieval started from the transcript while Rasa is still classifying it.
+
+    ``speculate`` guesses the intent, builds the exact query the matching
+    action would build and runs its search, stashing the documents in a
+    SQLite file shared by every process on the host (the action server may
+    be several prefork workers). ``take`` hands them to the action if its
+    query turned out the same, waiting briefly for a search still in flight;
+    anything else is a miss and the action searches as usual.
+    """
+    _local = threading.local()
+    _predictor: Optional[IntentPredictor] = None
+    _actions: Optional[Dict[str, object]] = None
+    _setup_lock = threading.Lock()
+
+    @classmethod
+    def _connection(cls) -> sqlite3.Connection:
+        connection = getattr(cls._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(SPECULATIVE_PATH), exist_ok=True)
+            connection = sqlite3.connect(SPECULATIVE_PATH, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS speculations ("
+                "key TEXT PRIMARY KEY, status TEXT, docs TEXT, created_at REAL)"
+            )
+            cls._local.connection = connection
+        return connection
+
+    @classmethod
+    def _setup(cls):
+        """Map intents to their registered actions and build the intent predictor"""
+        if cls._predictor is None:
+            with cls._setup_lock:
+                if cls._predictor is None:
+                    from actions.rag_components.action_registry import load_action_registry
+                    registry = load_action_registry()
+                    examples = load_nlu_examples()
+                    cls._actions = {
+                        intent: registry[action]
+                        for intent, action in load_intent_actions().items()
+                        if action in registry and examples.get(intent)
+                    }
+                    cls._predictor = IntentPredictor(sorted(cls._actions))
+        return cls._predictor
+
+    @classmethod
+    def warm(cls):
+        cls._setup().centroids
+
+    @classmethod
+    def speculate(cls, sender: str, text: str) -> Optional[dict]:
+        """Run the likely action's retrieval for a transcript and stash the result"""
+        if not SPECULATIVE_ENABLED or not text.strip():
+            return None
+        started = time.perf_counter()
+        predictor = cls._setup()
+        intent, score = predictor.predict(Embeddings.get_embeddings().embed_query(text))
+        if intent is None:
+            return {"intent": None, "score": round(score, 3)}
+
+        spec = cls._actions[intent]
+        query = spec.build_query(text, intent)
+        if query["spec"].cache and ResponseCache.get(query["question"], query["intent"]) is not None:
+            # The action will answer from the cache without searching
+            return {"intent": intent, "score": round(score, 3), "cached": True}
+
+        exclude = tuple(doc.tenant for doc in query["pinned_docs"])
+        limit = query["spec"].max_docs - len(query["pinned_docs"])
+        key = speculation_key(sender, query["question"], query["intent"], query["spec"], exclude, limit)
+        now = time.time()
+        connection = cls._connection()
+        connection.execute("DELETE FROM speculations WHERE created_at < ?", (now - SPECULATIVE_TTL,))
+        connection.execute("INSERT OR REPLACE INTO speculations VALUES (?, 'pending', NULL, ?)", (key, now))
+        try:
+            docs = query["spec"].retrieve(query["question"], query_vector=query["query_vector"], exclude=exclude, limit=limit)
+        except Exception:
+            connection.execute("DELETE FROM speculations WHERE key = ?", (key,))
+            raise
+        payload = json.dumps([
+            {"id": hit.id, "tenant": hit.tenant, "distance": hit.distance, "source": hit.source, "text": hit.text}
+            for hit in docs
+        ])
+        connection.execute("UPDATE speculations SET status = 'done', docs = ? WHERE key = ?", (payload, key))
+
+        result = {"intent": intent, "score": round(score, 3), "docs": len(docs),
+                  "ms": round((time.perf_counter() - started) * 1000, 1)}
+        log.debug("speculative.stored", "Speculative retrieval stored", sender=sender, **result)
+        return result
+
+    @classmethod
+    def take(cls, sender: str, question: str, intent: Optional[str], spec, exclude: tuple, limit: int) -> Optional[List]:
+        """The stashed documents for exactly this retrieval, or None on a miss"""
+        if not SPECULATIVE_ENABLED or not sender:
+            return None
+        key = speculation_key(sender, question, intent, spec, exclude, limit)
+        deadline = time.monotonic() + SPECULATIVE_WAIT
+        try:
+            connection = cls._connection()
+            while True:
+                row = connection.execute(
+                    "SELECT status, docs, created_at FROM speculations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[2] < time.time() - SPECULATIVE_TTL:
+                    return None
+                if row[0] == "done":
+                    connection.execute("DELETE FROM speculations WHERE key = ?", (key,))
+                    break
+                if time.monotonic() >= deadline:
+                    log.debug("speculative.too_slow", "Speculative retrieval still running", sender=sender)
+                    return None
+                time.sleep(0.01)
+        except sqlite3.Error as e:
+            log.error("speculative.read_failed", "Speculative retrieval lookup failed", error=str(e))
+            return None
+
+        return [
+            SearchHit(item["id"], item["tenant"], item["distance"], item["source"], item["text"])
+            for item in json.loads(row[1])
+        ]
+
+    @classmethod
+    def reset_after_fork(cls):
+        """SQLite connections must not be shared across a fork"""
+        cls._local = threading.local()
+        cls._setup_lock = threading.Lock()
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SpeculativeRetrieval.reset_after_fork)
@@ -0,0 +1,178 @@
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+ROOT_LOGGER = "actions"
+# Shared modules outside the actions package that log through the same writer
+SHARED_LOGGERS = ("service_common",)
+
+
+def _parse_map(value: str) -> Dict[str, str]:
+    """Parse "event=value,event=value" settings"""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {event.strip(): setting.strip() for event, setting in pairs}
+
+
+def _parse_levels(value: str) -> Dict[str, int]:
+    """Parse "event=LEVEL" overrides, skipping level names logging does not know"""
+    levels = {}
+    for event, name in _parse_map(value).items():
+        level = int(name) if name.isdigit() else logging.getLevelName(name.upper())
+        if not isinstance(level, int):
+            # Logging is not configured yet at import time
+            print(f"Ignoring LOG_EVENT_LEVELS entry {event}={name}: unknown level", file=sys.stderr)
+            continue
+        levels[event] = level
+    return levels
+
+
+# Fraction of records to keep per event, e.g. "rag.retrieved=0.1,rag.cache_hit=0.05"
+EVENT_SAMPLE_RATES = {
+    event: float(rate)
+    for event, rate in _parse_map(os.getenv("LOG_SAMPLE_RATES", "rag.retrieved=0.1,rag.cache_hit=0.1,llm.batch_completed=0.1")).items()
+}
+# Level override per event, e.g. "vector_store.tenant_created=DEBUG"
+EVENT_LEVELS = _parse_levels(os.getenv("LOG_EVENT_LEVELS", ""))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the event name and its fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        exception = getattr(record, "exception", None) or (record.exc_info and self.formatException(record.exc_info))
+        if exception:
+            payload["exception"] = exception
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the writer falls behind"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback in the caller, leaving JSON encoding to the writer
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exception = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler = None
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging():
+    """Route the "actions" loggers through a bounded queue to a background JSON writer"""
+    global _handler, _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+        _listener.start()
+
+        previous, _handler = _handler, DroppingQueueHandler(log_queue)
+        for name in (ROOT_LOGGER, *SHARED_LOGGERS):
+            root = logging.getLogger(name)
+            if previous is not None:
+                root.removeHandler(previous)
+            root.addHandler(_handler)
+            root.setLevel(LOG_LEVEL)
+            root.propagate = False
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def reset_after_fork():
+    """The writer thread does not survive a fork, so start a new one in the child"""
+    global _listener, _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+
+class EventLogger:
+    """
+    Logger for named events with structured fields.
+
+    Each event can be sampled (LOG_SAMPLE_RATES) or moved to another level
+    (LOG_EVENT_LEVELS). Records that are filtered out cost a dict lookup and
+    a level check; the rest are formatted and written on the background thread.
+    """
+
+    def __init__(self, name: str):
+        configure_logging()
+        self._logger = logging.getLogger(name if name.startswith(ROOT_LOGGER) else f"{ROOT_LOGGER}.{name}")
+
+    def log(self, level: int, event: str, message: str, exc_info=None, **fields):
+        level = EVENT_LEVELS.get(event, level)
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = EVENT_SAMPLE_RATES.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+        if rate is not None:
+            fields["sample_rate"] = rate
+        self._logger.log(level, message, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, message: str, **fields):
+        self.log(logging.DEBUG, event, message, **fields)
+
+    def info(self, event: str, message: str, **fields):
+        self.log(logging.INFO, event, message, **fields)
+
+    def warning(self, event: str, message: str, **fields):
+        self.log(logging.WARNING, event, message, **fields)
+
+    def error(self, event: str, message: str, **fields):
+        self.log(logging.ERROR, event, message, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(name)
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
@@ -0,0 +1,47 @@
+import functools
+from contextlib import contextmanager
+
+from opentelemetry import context, trace
+
+from service_common.tracing import context_from_headers, tracer
+
+
+@contextmanager
+def action_span(tracker, action_name: str):
+    """Span for one action run, parented on the traceparent in the message metadata"""
+    # The gateway puts the traceparent into the message metadata, read here like a header
+    parent = context_from_headers(tracker.latest_message.get("metadata") or {})
+    with tracer.start_as_current_span(
+        f"action.{action_name}",
+        context=parent,
+        kind=trace.SpanKind.SERVER,
+        attributes={
+            "rasa.action": action_name,
+            "rasa.sender_id": tracker.sender_id,
+            "rasa.intent": (tracker.latest_message.get("intent") or {}).get("name") or "",
+        },
+    ) as span:
+        yield span
+
+
+def traced_action(run):
+    """Decorator for Action.run that records it as a span"""
+    @functools.wraps(run)
+    def wrapper(self, dispatcher, tracker, domain):
+        with action_span(tracker, self.name()):
+            return run(self, dispatcher, tracker, domain)
+    return wrapper
+
+
+def in_current_context(fn):
+    """Wrap fn so it runs in the caller's trace context, e.g. on a worker thread"""
+    ctx = context.get_current()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = context.attach(ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            context.detach(token)
+    return wrapper
@@ -0,0 +1,63 @@
+import os
+import re
+from typing import Dict, List
+
+import yaml
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NLU_PATH = os.path.join(project_root, "data", "nlu.yml")
+STORIES_PATH = os.path.join(project_root, "data", "stories.yml")
+RULES_PATH = os.path.join(project_root, "data", "rules.yml")
+
+# Rasa entity annotations: [value](entity) or [value]{"entity": ...}
+_ENTITY_PATTERN = re.compile(r"\[([^\]]+)\](\([^)]*\)|\{[^}]*\})")
+
+
+def _clean_example(example: str) -> str:
+    return _ENTITY_PATTERN.sub(r"\1", example).strip()
+
+
+def load_nlu_examples(path: str = NLU_PATH) -> Dict[str, List[str]]:
+    """Load the labelled NLU examples as a mapping of intent to example texts"""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    examples: Dict[str, List[str]] = {}
+    for item in data.get("nlu", []):
+        intent = item.get("intent")
+        if not intent:
+            continue
+        lines = item.get("examples", "").splitlines()
+        texts = [_clean_example(line.strip()[2:]) for line in lines if line.strip().startswith("- ")]
+        examples.setdefault(intent, []).extend(text for text in texts if text)
+    return examples
+
+
+def load_stories(path: str = STORIES_PATH) -> List[Dict]:
+    """Load the training stories as a list of {"name", "steps"} dicts"""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return [
+        {"name": story.get("story", ""), "steps": story.get("steps", [])}
+        for story in data.get("stories", [])
+    ]
+
+
+def load_intent_actions(rules_path: str = RULES_PATH, stories_path: str = STORIES_PATH) -> Dict[str, str]:
+    """Map each intent to the first custom action that follows it in the rules, then stories"""
+    with open(rules_path, encoding="utf-8") as f:
+        rules = (yaml.safe_load(f) or {}).get("rules", [])
+    step_lists = [rule.get("steps", []) for rule in rules]
+    step_lists.extend(story["steps"] for story in load_stories(stories_path))
+
+    mapping: Dict[str, str] = {}
+    for steps in step_lists:
+        intent = None
+        for step in steps:
+            if "intent" in step:
+                intent = step["intent"]
+            elif intent and step.get("action", "").startswith("action_"):
+                mapping.setdefault(intent, step["action"])
+                intent = None
+    return mapping
@@ -1,73 +1,304 @@
+from langchain_core.documents import Document
 from langchain_weaviate.vectorstores import WeaviateVectorStore
 import weaviate
 import os
 import sys
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from weaviate.classes.tenants import Tenant
-from weaviate.classes.config import Configure
+from weaviate.classes.config import Configure, DataType, Property, Tokenization
+from weaviate.classes.query import Filter
+from weaviate.classes.aggregate import GroupByAggregate
 
 
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
 from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.structured_log import get_logger
+from actions.rag_components.tracing import in_current_context, tracer
+from actions.rag_components.index_config import (
+    build_query_reconfig,
+    build_vector_index_config,
+    load_index_profile,
+)
+from actions.rag_components.connection import (
+    ClientPool,
+    WeaviateSettings,
+    connect_with_backoff,
+)
+
+log = get_logger(__name__)
+
+
+class SearchHit:
+    """
+    One vector search result, without copying the object's properties.
+
+    Exposes ``page_content`` and ``metadata`` like a LangChain Document, with
+    ``metadata`` built on first access; ``to_document`` converts it for
+    consumers that need a real Document. The hot path reads the attributes.
+    """
+    __slots__ = ("id", "tenant", "distance", "source", "text", "_properties", "_metadata")
+
+    def __init__(self, id: str, tenant: Optional[str], distance: Optional[float], source: Optional[str],
+                 text: str, properties: Optional[dict] = None):
+        self.id = id
+        self.tenant = tenant
+        self.distance = distance
+        self.source = source
+        self.text = text
+        self._properties = properties
+        self._metadata = None
+
+    @classmethod
+    def from_object(cls, obj, tenant_name: str = None) -> "SearchHit":
+        properties = obj.properties
+        return cls(
+            str(obj.uuid),
+            tenant_name or properties.get('document_name'),
+            obj.metadata.distance if obj.metadata else None,
+            properties.get('source'),
+            properties.get('text', ''),
+            properties,
+        )
+
+    @property
+    def page_content(self) -> str:
+        return self.text
+
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            self._metadata = {'id': self.id, 'tenant': self.tenant, 'distance': self.distance, 'source': self.source}
+            self._metadata.update((key, value) for key, value in (self._properties or {}).items() if key != 'text')
+        return self._metadata
+
+    def to_document(self) -> Document:
+        return Document(page_content=self.text, metadata=self.metadata)
+
+    def __repr__(self) -> str:
+        return f"SearchHit(id={self.id!r}, tenant={self.tenant!r}, distance={self.distance!r})"
+
 
 class DatabaseManager:
     _client: Optional[weaviate.WeaviateClient] = None
+    _client_checked_at = 0.0
+    _pool: Optional[ClientPool] = None
+    _settings: Optional[WeaviateSettings] = None
+    _lock = threading.Lock()
     _vector_stores: Dict[str, WeaviateVectorStore] = {}
+    _known_tenants: set = set()
     _collection_initialized = False
+    _target_collection: Optional[str] = None
+    _target_checked_at = 0.0
 
-    COLLECTION_NAME = "InsuranceDocs"
+    # "tenants": one Weaviate tenant per policy document (default)
+    # "shared": one collection with a filterable document_name property
+    SCHEMA_MODE = os.getenv("WEAVIATE_SCHEMA_MODE", "tenants").lower()
+    TENANT_COLLECTION_NAME = "InsuranceDocs"
+    SHARED_COLLECTION_NAME = "InsuranceDocsShared"
+    COLLECTION_NAME = SHARED_COLLECTION_NAME if SCHEMA_MODE == "shared" else TENANT_COLLECTION_NAME
+
+    @classmethod
+    def is_shared_schema(cls) -> bool:
+        """Whether documents live in one shared collection instead of tenants"""
+        return cls.SCHEMA_MODE == "shared"
+
+    @classmethod
+    def get_settings(cls) -> WeaviateSettings:
+        """Get the Weaviate connection settings"""
+        if cls._settings is None:
+            cls._settings = WeaviateSettings()
+        return cls._settings
 
     @classmethod
     def get_client(cls):
-        """Get or create the single Weaviate client"""
-        if cls._client is None:
-            print("Connecting to Weaviate...")
-            cls._client = weaviate.connect_to_local()
-            print("Connected to Weaviate.")
-        return cls._client
+        """Get the primary Weaviate client used for schema and indexing operations.
+
+        The client is health-checked at most once per health check interval and
+        transparently reconnected with backoff if Weaviate has gone away.
+        """
+        settings = cls.get_settings()
+        # Health checks and reconnects talk to Weaviate, so they run outside the lock
+        client = cls._client
+        if client is not None:
+            if time.monotonic() - cls._client_checked_at < settings.health_check_interval:
+                return client
+            try:
+                healthy = client.is_ready()
+            except Exception:
+                healthy = False
+            if healthy:
+                cls._client_checked_at = time.monotonic()
+                return client
+            with cls._lock:
+                # Unless another thread has replaced it already
+                stale = cls._client is client
+                if stale:
+                    cls._client = None
+                    cls._vector_stores = {}
+            if stale:
+                log.warning("vector_store.reconnect", "Weaviate client unhealthy, reconnecting")
+                try:
+                    client.close()
+                except Exception:
+                    pass
+
+        current = cls._client
+        if current is not None:
+            return current
+        log.info("vector_store.connecting", "Connecting to Weaviate", host=settings.host, port=settings.port,
+                 grpc_host=settings.grpc_host, grpc_port=settings.grpc_port)
+        # May back off for several seconds; other threads can still take the lock meanwhile
+        client = connect_with_backoff(settings)
+        with cls._lock:
+            current = cls._client
+            if current is None:
+                cls._client = current = client
+                cls._client_checked_at = time.monotonic()
+        if current is not client:
+            # Another thread connected first
+            client.close()
+        else:
+            log.info("vector_store.connected", "Connected to Weaviate")
+        return current
+
+    @classmethod
+    def get_pool(cls) -> ClientPool:
+        """Get the pool of clients used for concurrent queries"""
+        if cls._pool is None:
+            with cls._lock:
+                if cls._pool is None:
+                    cls._pool = ClientPool(cls.get_settings())
+        return cls._pool
+
+    @classmethod
+    def is_healthy(cls) -> bool:
+        """Check whether Weaviate is reachable and ready"""
+        try:
+            return cls.get_client().is_ready()
+        except Exception:
+            return False
 
     @classmethod
     def ensure_collection_exists(cls):
-        """Ensure the InsuranceDocs collection exists with multi-tenancy enabled"""
+        """Ensure the live collection exists, either behind the alias or as a plain collection"""
         if cls._collection_initialized:
             return
             
         client = cls.get_client()
         
         try:
-            # Check if collection exists
-            if not client.collections.exists(cls.COLLECTION_NAME):
-                print(f"Creating collection '{cls.COLLECTION_NAME}' with multi-tenancy enabled...")
-                
-                # Create collection with multi-tenancy enabled
-                client.collections.create(
-                    name=cls.COLLECTION_NAME,
-                    multi_tenancy_config=Configure.multi_tenancy(enabled=True)
-                )
-                print(f"Collection '{cls.COLLECTION_NAME}' created successfully.")
-                
-                # Create a dummy tenant to avoid null type errors
-                cls._create_dummy_tenant()
-            else:
-                print(f"Collection '{cls.COLLECTION_NAME}' already exists.")
-                
+            # A blue/green rebuild serves the live version through an alias of the same name
+            if cls.alias_target(client) is None:
+                cls.create_collection(client, cls.COLLECTION_NAME)
             cls._collection_initialized = True
             
         except Exception as e:
-            print(f"Error ensuring collection exists: {e}")
+            log.error("vector_store.collection_error", "Error ensuring collection exists", collection=cls.COLLECTION_NAME, error=str(e))
             raise
 
     @classmethod
-    def _create_dummy_tenant(cls):
+    def create_collection(cls, client, name: str):
+        """Create a collection with the schema of the configured schema mode"""
+        if cls.is_shared_schema():
+            cls.create_shared_collection(client, name)
+            return
+        
+        # Check if collection exists
+        if not client.collections.exists(name):
+            log.info("vector_store.collection_creating", "Creating collection with multi-tenancy enabled", collection=name)
+            
+            # Create collection with multi-tenancy enabled; vectors come from our own embeddings
+            client.collections.create(
+                name=name,
+                multi_tenancy_config=Configure.multi_tenancy(enabled=True),
+                vectorizer_config=Configure.Vectorizer.none(),
+                vector_index_config=build_vector_index_config(load_index_profile())
+            )
+            log.info("vector_store.collection_created", "Collection created", collection=name)
+            
+            # Create a dummy tenant to avoid null type errors
+            cls._create_dummy_tenant(name)
+        else:
+            log.debug("vector_store.collection_exists", "Collection already exists", collection=name)
+
+    @classmethod
+    def alias_target(cls, client=None) -> Optional[str]:
+        """Collection behind the COLLECTION_NAME alias, or None when there is no alias"""
+        client = client or cls.get_client()
+        try:
+            alias = client.alias.get(alias_name=cls.COLLECTION_NAME)
+        except Exception as e:
+            # Aliases need weaviate-client >= 4.16 and Weaviate >= 1.32
+            log.debug("vector_store.alias_unavailable", "Could not resolve collection alias", alias=cls.COLLECTION_NAME, error=str(e))
+            return None
+        return alias.collection if alias is not None else None
+
+    @classmethod
+    def target_collection_name(cls) -> str:
+        """Concrete collection for schema and tenant operations, which do not go through aliases"""
+        now = time.monotonic()
+        if cls._target_collection is None or now - cls._target_checked_at >= cls.get_settings().health_check_interval:
+            cls._target_collection = cls.alias_target() or cls.COLLECTION_NAME
+            cls._target_checked_at = now
+        return cls._target_collection
+
+    @classmethod
+    def reset_index_state(cls):
+        """Forget cached stores, tenants and the alias target after the live index changed"""
+        cls._vector_stores = {}
+        cls._known_tenants = set()
+        cls._target_collection = None
+        cls._collection_initialized = False
+
+    @classmethod
+    def create_shared_collection(cls, client, name: str = None):
+        """Create the single shared collection with a filterable document_name property"""
+        name = name or cls.SHARED_COLLECTION_NAME
+        if client.collections.exists(name):
+            log.debug("vector_store.collection_exists", "Collection already exists", collection=name)
+            return
+        
+        log.info("vector_store.collection_creating", "Creating shared collection", collection=name)
+        client.collections.create(
+            name=name,
+            vectorizer_config=Configure.Vectorizer.none(),
+            vector_index_config=build_vector_index_config(load_index_profile()),
+            properties=[
+                Property(name="text", data_type=DataType.TEXT),
+                Property(
+                    name="document_name",
+                    data_type=DataType.TEXT,
+                    tokenization=Tokenization.FIELD,
+                    index_filterable=True,
+                    index_searchable=False
+                ),
+                Property(name="source", data_type=DataType.TEXT, index_searchable=False),
+            ]
+        )
+        log.info("vector_store.collection_created", "Collection created", collection=name)
+
+    @classmethod
+    def apply_query_profile(cls, profile_name: str = None):
+        """Apply the query-time settings (ef) of an index profile to the live collection"""
+        profile = load_index_profile(profile_name)
+        collection = cls.get_client().collections.get(cls.target_collection_name())
+        collection.config.update(vector_index_config=build_query_reconfig(profile))
+        log.info("vector_store.query_profile_applied", "Applied query profile", collection=cls.target_collection_name(), ef=profile.get('ef', -1))
+
+    @classmethod
+    def _create_dummy_tenant(cls, collection_name: str = None):
         """Create a dummy tenant to avoid null type errors"""
         try:
             client = cls.get_client()
-            collection = client.collections.get(cls.COLLECTION_NAME)
+            collection = client.collections.get(collection_name or cls.target_collection_name())
             
             dummy_tenant_name = "dummy_example_tenant"
-            print(f"Creating dummy tenant: {dummy_tenant_name}")
+            log.debug("vector_store.tenant_creating", "Creating dummy tenant", tenant=dummy_tenant_name)
             
             # Check if dummy tenant already exists using correct v4 API
             try:
@@ -79,19 +310,19 @@ class DatabaseManager:
                     else:
                         # Handle string objects directly
                         existing_tenants.append(str(tenant_obj))
-                print(f"Found existing tenants: {existing_tenants}")
+                log.debug("vector_store.tenants_listed", "Found existing tenants", tenants=existing_tenants)
             except Exception as e:
-                print(f"Could not retrieve existing tenants: {e}")
+                log.warning("vector_store.tenants_list_failed", "Could not retrieve existing tenants", error=str(e))
                 existing_tenants = []
             
             if dummy_tenant_name not in existing_tenants:
                 collection.tenants.create([Tenant(name=dummy_tenant_name)])
-                print(f"Dummy tenant '{dummy_tenant_name}' created successfully.")
+                log.info("vector_store.tenant_created", "Dummy tenant created", tenant=dummy_tenant_name)
             else:
-                print(f"Dummy tenant '{dummy_tenant_name}' already exists.")
+                log.debug("vector_store.tenant_exists", "Dummy tenant already exists", tenant=dummy_tenant_name)
                 
         except Exception as e:
-            print(f"Failed to create dummy tenant: {e}")
+            log.error("vector_store.tenant_create_failed", "Failed to create dummy tenant", tenant=dummy_tenant_name, error=str(e))
             raise
 
     @classmethod
@@ -114,17 +345,24 @@ class DatabaseManager:
                 text_key="text",
                 embedding=Embeddings.get_embeddings()
             )
-            print(f"Initialized vector store for tenant: {tenant_name}")
+            log.debug("vector_store.store_initialized", "Initialized vector store", tenant=tenant_name)
             
         return cls._vector_stores[tenant_name]
 
     @classmethod
-    def ensure_tenant_exists(cls, tenant_name: str):
-        """Create the tenant in Weaviate if it doesn't already exist"""
+    def ensure_tenant_exists(cls, tenant_name: str, collection_name: str = None):
+        """Create the tenant in Weaviate if it doesn't already exist
+
+        ``collection_name`` targets a specific collection version (e.g. one
+        being built) instead of the live one; tenants are then not cached.
+        """
+        if cls.is_shared_schema() or (collection_name is None and tenant_name in cls._known_tenants):
+            return
         try:
             client = cls.get_client()
-            collection = client.collections.get(cls.COLLECTION_NAME)
-            print(f"Ensuring tenant '{tenant_name}' exists in collection '{cls.COLLECTION_NAME}'...")
+            target = collection_name or cls.target_collection_name()
+            collection = client.collections.get(target)
+            log.debug("vector_store.tenant_ensuring", "Ensuring tenant exists", tenant=tenant_name, collection=target)
             
             # Get existing tenants properly using v4 API
             try:
@@ -136,98 +374,211 @@ class DatabaseManager:
                     else:
                         # Handle string objects directly
                         existing_tenants.append(str(tenant_obj))
-                print(f"Existing tenants: {existing_tenants}")
+                log.debug("vector_store.tenants_listed", "Found existing tenants", tenants=existing_tenants)
             except Exception as e:
-                print(f"Could not retrieve existing tenants: {e}")
+                log.warning("vector_store.tenants_list_failed", "Could not retrieve existing tenants", error=str(e))
                 existing_tenants = []
 
             if tenant_name not in existing_tenants:
                 collection.tenants.create([Tenant(name=tenant_name)])
-                print(f"Tenant '{tenant_name}' created.")
+                log.info("vector_store.tenant_created", "Tenant created", tenant=tenant_name)
             else:
-                print(f"Tenant '{tenant_name}' already exists.")
+                log.debug("vector_store.tenant_exists", "Tenant already exists", tenant=tenant_name)
+            cls._known_tenants.update(existing_tenants)
+            cls._known_tenants.add(tenant_name)
         except Exception as e:
-            print(f"Failed to ensure tenant '{tenant_name}': {e}")
+            log.error("vector_store.tenant_create_failed", "Failed to ensure tenant", tenant=tenant_name, error=str(e))
             raise
 
     @classmethod
-    def add_documents_to_tenant(cls, tenant_name: str, documents: list):
-        """Add documents to a specific tenant"""
+    def add_documents_to_tenant(cls, tenant_name: str, documents: list, collection_name: str = None,
+                                ids: List[str] = None):
+        """Add documents to a specific tenant
+
+        ``collection_name`` writes into a collection version other than the
+        live one; its vector stores are not kept for searching. ``ids`` are
+        the chunk UUIDs, random if not given.
+        """
         try:
             client = cls.get_client()
-            cls.ensure_collection_exists()
-            cls.ensure_tenant_exists(tenant_name)
+            if collection_name is None:
+                cls.ensure_collection_exists()
+            cls.ensure_tenant_exists(tenant_name, collection_name)
+            index_name = collection_name or cls.COLLECTION_NAME
+            # The store reads "ids" from kwargs even when it is None; leave it out to get random UUIDs
+            id_kwargs = {"ids": ids} if ids is not None else {}
             
-            # Use from_documents with tenant parameter
-            vector_store = WeaviateVectorStore.from_documents(
-                documents=documents,
-                embedding=Embeddings.get_embeddings(),
-                client=client,
-                index_name=cls.COLLECTION_NAME,
-                tenant=tenant_name
-            )
+            if cls.is_shared_schema():
+                # Tag each chunk with its document so searches can filter on it
+                for doc in documents:
+                    doc.metadata["document_name"] = tenant_name
+                vector_store = WeaviateVectorStore.from_documents(
+                    documents=documents,
+                    embedding=Embeddings.get_embeddings(),
+                    client=client,
+                    index_name=index_name,
+                    **id_kwargs
+                )
+            else:
+                # Use from_documents with tenant parameter
+                vector_store = WeaviateVectorStore.from_documents(
+                    documents=documents,
+                    embedding=Embeddings.get_embeddings(),
+                    client=client,
+                    index_name=index_name,
+                    tenant=tenant_name,
+                    **id_kwargs
+                )
             
-            print(f"Added {len(documents)} documents to tenant '{tenant_name}'")
+            log.info("vector_store.documents_added", "Added documents", tenant=tenant_name, count=len(documents), collection=index_name)
             
             # Store the vector store for later use
-            cls._vector_stores[tenant_name] = vector_store
+            if collection_name is None:
+                cls._vector_stores[tenant_name] = vector_store
             
         except Exception as e:
-            print(f"Failed to add documents to tenant '{tenant_name}': {e}")
+            log.error("vector_store.documents_add_failed", "Failed to add documents", tenant=tenant_name, error=str(e))
             raise
 
+    @staticmethod
+    def _embed_query(query: str):
+        """Embed a search query"""
+        with tracer.start_as_current_span("rag.embed"):
+            return Embeddings.get_embeddings().embed_query(query)
+
+    @staticmethod
+    def _document_filter(tenant_names: List[str]):
+        """Filter on document_name for the shared collection"""
+        if len(tenant_names) == 1:
+            return Filter.by_property("document_name").equal(tenant_names[0])
+        return Filter.by_property("document_name").contains_any(tenant_names)
+
+    @classmethod
+    def _near_vector(cls, client, query_vector, tenant_names: List[str], limit: int, collection_name: str = None):
+        """Run one vector query over the given tenants (a single tenant in tenant mode)"""
+        collection = client.collections.get(collection_name or cls.COLLECTION_NAME)
+        if cls.is_shared_schema():
+            return collection.query.near_vector(
+                near_vector=query_vector,
+                limit=limit,
+                filters=cls._document_filter(tenant_names),
+                return_metadata=weaviate.classes.query.MetadataQuery(distance=True)
+            )
+        return collection.with_tenant(tenant_names[0]).query.near_vector(
+            near_vector=query_vector,
+            limit=limit,
+            return_metadata=weaviate.classes.query.MetadataQuery(distance=True)
+        )
+
     @classmethod
-    def search_tenant(cls, tenant_name: str, query: str, k: int = 5):
-        """Search within a specific tenant using direct Weaviate client"""
+    def search_tenant(cls, tenant_name: str, query: str, k: int = 5, query_vector: Optional[List[float]] = None):
+        """Search within a specific tenant using a pooled Weaviate client
+
+        Pass ``query_vector`` to reuse an embedding of the query computed earlier.
+        """
         try:
-            client = cls.get_client()
             cls.ensure_collection_exists()
             cls.ensure_tenant_exists(tenant_name)
             
-            # Get collection and perform search with tenant context
-            collection = client.collections.get(cls.COLLECTION_NAME)
-            
-            # Use tenant-specific collection for search
-            tenant_collection = collection.with_tenant(tenant_name)
-            
             # Get embeddings for the query
-            embeddings = Embeddings.get_embeddings()
-            query_vector = embeddings.embed_query(query)
-            
-            # Perform vector search
-            response = tenant_collection.query.near_vector(
-                near_vector=query_vector,
-                limit=k,
-                return_metadata=weaviate.classes.query.MetadataQuery(score=True)
-            )
+            if query_vector is None:
+                query_vector = cls._embed_query(query)
             
-            # Convert results to LangChain Document format
-            from langchain.schema import Document
-            results = []
-            for obj in response.objects:
-                doc = Document(
-                    page_content=obj.properties.get('text', ''),
-                    metadata={
-                        'id': str(obj.uuid),
-                        'tenant': tenant_name,
-                        'score': obj.metadata.score if obj.metadata else None,
-                        **obj.properties
-                    }
-                )
-                results.append(doc)
+            # Perform vector search with tenant context, bounded by the query limit
+            with tracer.start_as_current_span("rag.search_tenant", attributes={"rag.tenant": tenant_name, "rag.k": k}):
+                with cls.get_pool().query_client() as client:
+                    response = cls._near_vector(client, query_vector, [tenant_name], k)
             
-            return results
+            return cls._to_documents(response, tenant_name)
             
         except Exception as e:
-            print(f"Failed to search tenant '{tenant_name}': {e}")
+            log.error("vector_store.search_failed", "Failed to search tenant", tenant=tenant_name, error=str(e))
+            return []
+
+    @classmethod
+    def search_tenants(cls, tenant_names: List[str], query: str, k: int = 2, query_vector: Optional[List[float]] = None):
+        """Search several tenants, embedding the query only once
+
+        In tenant mode each tenant is queried concurrently for its top ``k``.
+        In shared mode a single filtered query returns the best
+        ``k * len(tenant_names)`` hits across all of them.
+        """
+        if not tenant_names:
+            return []
+        if cls.is_shared_schema():
+            return cls._search_shared(tenant_names, query, k * len(tenant_names), query_vector)
+        try:
+            cls.ensure_collection_exists()
+            if query_vector is None:
+                query_vector = cls._embed_query(query)
+        except Exception as e:
+            log.error("vector_store.search_failed", "Failed to prepare multi-tenant search", tenants=tenant_names, error=str(e))
+            return []
+
+        def _search(tenant_name):
+            try:
+                cls.ensure_tenant_exists(tenant_name)
+                with tracer.start_as_current_span("rag.search_tenant", attributes={"rag.tenant": tenant_name, "rag.k": k}):
+                    with cls.get_pool().query_client() as client:
+                        response = cls._near_vector(client, query_vector, [tenant_name], k)
+                return cls._to_documents(response, tenant_name)
+            except Exception as e:
+                log.error("vector_store.search_failed", "Failed to search tenant", tenant=tenant_name, error=str(e))
+                return []
+
+        workers = min(len(tenant_names), cls.get_settings().max_concurrent_queries)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            per_tenant = list(executor.map(in_current_context(_search), tenant_names))
+
+        # Preserve tenant order so callers keep their priority semantics
+        return [doc for docs in per_tenant for doc in docs]
+
+    @classmethod
+    def search_all_tenants(cls, query: str, tenant_names: List[str], k: int = 3, query_vector: Optional[List[float]] = None):
+        """Search the given tenants and return the overall top-k hits"""
+        if cls.is_shared_schema():
+            # A single filtered query already ranks hits across every document
+            return cls._search_shared(tenant_names, query, k, query_vector)
+        docs = cls.search_tenants(tenant_names, query, k=k, query_vector=query_vector)
+        # near_vector fills distance (lower is closer); score is only set for BM25/hybrid
+        docs.sort(key=lambda doc: doc.distance if doc.distance is not None else float("inf"))
+        return docs[:k]
+
+    @classmethod
+    def _search_shared(cls, tenant_names: List[str], query: str, limit: int, query_vector: Optional[List[float]] = None):
+        """Search several documents of the shared collection with one any_of query"""
+        try:
+            cls.ensure_collection_exists()
+            if query_vector is None:
+                query_vector = cls._embed_query(query)
+            with tracer.start_as_current_span("rag.search_shared", attributes={"rag.tenants": tenant_names, "rag.k": limit}):
+                with cls.get_pool().query_client() as client:
+                    response = cls._near_vector(client, query_vector, tenant_names, limit)
+            return cls._to_documents(response)
+        except Exception as e:
+            log.error("vector_store.search_failed", "Failed to search documents", tenants=tenant_names, error=str(e))
             return []
 
+    @staticmethod
+    def _to_documents(response, tenant_name: str = None) -> List[SearchHit]:
+        """Wrap Weaviate query results as SearchHits (call ``to_document`` for LangChain Documents)"""
+        return [SearchHit.from_object(obj, tenant_name) for obj in response.objects]
+
     @classmethod
-    def list_tenants(cls):
-        """List all tenants in the collection"""
+    def list_tenants(cls, collection_name: str = None):
+        """List all tenants in the collection (document names in shared mode)"""
         try:
             client = cls.get_client()
-            collection = client.collections.get(cls.COLLECTION_NAME)
+            target = collection_name or cls.target_collection_name()
+            collection = client.collections.get(target)
+            
+            if cls.is_shared_schema():
+                if not client.collections.exists(target):
+                    return []
+                response = collection.aggregate.over_all(
+                    group_by=GroupByAggregate(prop="document_name")
+                )
+                return [group.grouped_by.value for group in response.groups]
             
             tenant_names = []
             tenant_objects = collection.tenants.get()
@@ -238,41 +589,145 @@ class DatabaseManager:
                     # Handle string objects directly
                     tenant_names.append(str(tenant_obj))
             
+            if collection_name is None:
+                cls._known_tenants.update(tenant_names)
             return tenant_names
             
         except Exception as e:
-            print(f"Error listing tenants: {e}")
+            log.error("vector_store.tenants_list_failed", "Error listing tenants", error=str(e))
+            return []
+
+    @classmethod
+    def _document_collection(cls, client, tenant_name: str):
+        """The live collection scoped to one document: its tenant, or the whole shared collection"""
+        collection = client.collections.get(cls.target_collection_name())
+        return collection if cls.is_shared_schema() else collection.with_tenant(tenant_name)
+
+    @classmethod
+    def chunk_ids(cls, tenant_name: str) -> List[str]:
+        """UUIDs of the chunks indexed for a document"""
+        client = cls.get_client()
+        if cls.is_shared_schema():
+            collection = client.collections.get(cls.target_collection_name())
+            # The cursor lists documents of any size in full but takes no filter, so match here
+            return [
+                str(obj.uuid) for obj in collection.iterator(return_properties=["document_name"])
+                if obj.properties.get("document_name") == tenant_name
+            ]
+        if tenant_name not in cls.list_tenants():
             return []
+        return [str(obj.uuid) for obj in cls._document_collection(client, tenant_name).iterator(return_properties=[])]
+
+    @classmethod
+    def add_chunks(cls, tenant_name: str, documents: list, ids: List[str], batch_size: int = 200):
+        """Embed and insert chunks under the given UUIDs (existing UUIDs are overwritten)"""
+        if not documents:
+            return
+        client = cls.get_client()
+        cls.ensure_collection_exists()
+        cls.ensure_tenant_exists(tenant_name)
+        vectors = Embeddings.get_embeddings().embed_documents([doc.page_content for doc in documents])
+
+        collection = cls._document_collection(client, tenant_name)
+        with collection.batch.fixed_size(batch_size=batch_size) as batch:
+            for doc, uuid, vector in zip(documents, ids, vectors):
+                properties = {"text": doc.page_content, **doc.metadata}
+                if cls.is_shared_schema():
+                    properties["document_name"] = tenant_name
+                batch.add_object(properties=properties, vector=vector, uuid=uuid)
+        failed = collection.batch.failed_objects
+        if failed:
+            raise RuntimeError(f"{len(failed)} chunks of '{tenant_name}' failed to index: {failed[0].message}")
+
+    @classmethod
+    def delete_chunks(cls, tenant_name: str, ids: List[str]):
+        """Delete chunks of a document by UUID"""
+        if not ids:
+            return
+        collection = cls._document_collection(cls.get_client(), tenant_name)
+        collection.data.delete_many(where=Filter.by_id().contains_any(ids))
+
+    @classmethod
+    def delete_document(cls, tenant_name: str):
+        """Remove a document from the live index: its tenant, or its objects in shared mode"""
+        client = cls.get_client()
+        collection = client.collections.get(cls.target_collection_name())
+        if cls.is_shared_schema():
+            collection.data.delete_many(where=cls._document_filter([tenant_name]))
+        elif tenant_name in cls.list_tenants():
+            collection.tenants.remove([tenant_name])
+        cls._known_tenants.discard(tenant_name)
+        cls._vector_stores.pop(tenant_name, None)
+        log.info("vector_store.document_deleted", "Removed document from the index", tenant=tenant_name)
 
     @classmethod
     def delete_collection(cls):
         """Delete the entire collection and reset state"""
         try:
             client = cls.get_client()
-            if client.collections.exists(cls.COLLECTION_NAME):
+            target = cls.alias_target(client)
+            if target is not None:
+                # Drop the alias with the version it points to; older versions are left to gc
+                client.alias.delete(alias_name=cls.COLLECTION_NAME)
+                client.collections.delete(target)
+                log.info("vector_store.collection_deleted", "Deleted collection", collection=target, alias=cls.COLLECTION_NAME)
+            elif client.collections.exists(cls.COLLECTION_NAME):
                 client.collections.delete(cls.COLLECTION_NAME)
-                print(f"Deleted collection: {cls.COLLECTION_NAME}")
+                log.info("vector_store.collection_deleted", "Deleted collection", collection=cls.COLLECTION_NAME)
             
             # Reset state
-            cls._vector_stores = {}
-            cls._collection_initialized = False
+            cls.reset_index_state()
             
         except Exception as e:
-            print(f"Error deleting collection: {e}")
+            log.error("vector_store.collection_error", "Error deleting collection", collection=cls.COLLECTION_NAME, error=str(e))
             raise
 
     @classmethod
-    def close_client(cls):
-        """Close the Weaviate client connection"""
+    def close_connections(cls):
+        """Close the primary client and every pooled Weaviate connection, keeping schema knowledge
+
+        Used before forking workers: the collection and tenant caches stay
+        valid, only the connections (and the vector stores bound to them) go.
+        """
         try:
+            if cls._pool:
+                cls._pool.close()
+                cls._pool = None
             if cls._client:
                 cls._client.close()
                 cls._client = None
+                cls._client_checked_at = 0.0
                 cls._vector_stores = {}
-                cls._collection_initialized = False
-                print("Weaviate client connection closed")
+                log.info("vector_store.closed", "Weaviate client connection closed")
         except Exception as e:
-            print(f"Error closing client: {e}")
+            log.error("vector_store.close_failed", "Error closing client", error=str(e))
+
+    @classmethod
+    def close_client(cls):
+        """Close every Weaviate connection and forget the cached collection and tenant state"""
+        cls.close_connections()
+        cls._known_tenants = set()
+        cls._collection_initialized = False
+
+    @classmethod
+    def reset_after_fork(cls):
+        """Drop connections inherited from a parent process.
+
+        Sockets and gRPC channels must not be shared across a fork, so a child
+        forgets them without closing (which would disturb the parent) and
+        reconnects lazily. Schema knowledge such as the tenant list is kept.
+        """
+        cls._client = None
+        cls._client_checked_at = 0.0
+        cls._pool = None
+        cls._vector_stores = {}
+        cls._lock = threading.Lock()
+
+
+
+# Not available on Windows, where the action server runs in a single process
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=DatabaseManager.reset_after_fork)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""
+Precompute answers for the questions callers ask first.
+
+Runs the canonical questions from faq_warmup.yml through the custom action
+that handles each intent, exactly as a live turn would, so the answers land
+in the response cache before the first caller arrives. Optionally each answer
+is also sent to the TTS service so its audio is cached there.
+
+Usage:
+    python actions/rag_components/warmup.py
+    python actions/rag_components/warmup.py --interval 3600
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import httpx
+import yaml
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+from actions.rag_components.training_data import load_intent_actions, load_nlu_examples
+
+WARMUP_CONFIG_PATH = os.getenv("FAQ_WARMUP_CONFIG", os.path.join(project_root, "faq_warmup.yml"))
+TTS_URL = os.getenv("TTS_URL", "http://localhost:5050")
+
+
+def load_warmup_config(path: str = WARMUP_CONFIG_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def canonical_questions(config: dict) -> List[tuple]:
+    """Return (intent, question) pairs from the NLU examples and the extra questions"""
+    examples = load_nlu_examples()
+    per_intent = config.get("examples_per_intent", 5)
+    extra = config.get("questions") or {}
+
+    pairs = []
+    for intent in config.get("intents", []):
+        seen = set()
+        for question in examples.get(intent, [])[:per_intent] + extra.get(intent, []):
+            if question not in seen:
+                seen.add(question)
+                pairs.append((intent, question))
+    return pairs
+
+
+def _load_actions() -> Dict[str, Action]:
+    # Importing the modules registers every custom action as an Action subclass
+    import actions.actions  # noqa: F401
+
+    registry = {}
+    pending = list(Action.__subclasses__())
+    while pending:
+        action_class = pending.pop()
+        pending.extend(action_class.__subclasses__())
+        try:
+            action = action_class()
+            registry[action.name()] = action
+        except Exception:
+            continue
+    return registry
+
+
+def _tracker(intent: str, question: str) -> Tracker:
+    return Tracker.from_dict({
+        "sender_id": "faq_warmup",
+        "slots": {},
+        "latest_message": {"intent": {"name": intent, "confidence": 1.0}, "entities": [], "text": question},
+        "events": [],
+        "paused": False,
+        "followup_action": None,
+        "active_loop": {},
+        "latest_action_name": "action_listen",
+    })
+
+
+def run_warmup(config: dict = None) -> dict:
+    """Answer every canonical question once, returning a summary of the run"""
+    config = config or load_warmup_config()
+    intent_actions = load_intent_actions()
+    registry = _load_actions()
+    synthesize_audio = config.get("synthesize_audio", False)
+    tts_lang = config.get("tts_lang", "Hindi")
+    start = time.time()
+
+    def warm(pair):
+        intent, question = pair
+        action = registry.get(intent_actions.get(intent, ""))
+        if action is None:
+            return {"intent": intent, "question": question, "ok": False, "error": "no custom action for intent"}
+        try:
+            dispatcher = CollectingDispatcher()
+            question_start = time.time()
+            action.run(dispatcher, _tracker(intent, question), {})
+            answers = [message["text"] for message in dispatcher.messages if message.get("text")]
+            if synthesize_audio:
+                with httpx.Client(timeout=60) as client:
+                    for answer in answers:
+                        client.post(f"{TTS_URL}/speak/", json={"text": answer, "lang": tts_lang}).raise_for_status()
+            return {"intent": intent, "question": question, "ok": bool(answers), "seconds": round(time.time() - question_start, 2)}
+        except Exception as e:
+            return {"intent": intent, "question": question, "ok": False, "error": str(e)}
+
+    questions = canonical_questions(config)
+    with ThreadPoolExecutor(max_workers=config.get("concurrency", 2)) as executor:
+        results = list(executor.map(warm, questions))
+
+    summary = {
+        "questions": len(results),
+        "warmed": sum(1 for result in results if result["ok"]),
+        "seconds": round(time.time() - start, 2),
+        "failures": [result for result in results if not result["ok"]],
+    }
+    print(f"FAQ warmup: {summary['warmed']}/{summary['questions']} answers cached in {summary['seconds']} seconds")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute answers for canonical FAQ questions")
+    parser.add_argument("--interval", type=float, default=0, help="Repeat every N seconds (0 runs once)")
+    args = parser.parse_args()
+
+    while True:
+        run_warmup()
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
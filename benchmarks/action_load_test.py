@@ -0,0 +1,269 @@
+"""
+Concurrent conversation load generator for the Rasa action server.
+
+Replays the multi-turn stories in data/stories.yml as action server webhook
+calls. Conversations arrive as a Poisson process at each configured rate and
+every custom action in a story becomes one POST to /webhook, with a tracker
+built from an NLU example of the preceding intent. For each rate it reports
+throughput, per-action latency percentiles and error rates, and it flags the
+saturation point: the first rate at which p95 exceeds the latency budget,
+errors exceed the threshold, or conversations keep draining long after
+arrivals stop (the server is not keeping up).
+
+Usage:
+    # Against stubbed LLM and vector backends (starts a local stub server)
+    python benchmarks/action_load_test.py --stub --rates 1,2,5,10,20 --duration 30
+
+    # Against a running action server with real backends
+    python benchmarks/action_load_test.py --url http://localhost:5055/webhook --rates 1,2,5
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+import yaml
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from actions.rag_components.training_data import load_nlu_examples, load_stories
+
+DOMAIN_PATH = os.path.join(project_root, "domain.yml")
+
+SAMPLE_SLOTS = {
+    "policy_holder_name": "Pooja",
+    "policy_number": "VE12345678",
+    "product_name": "ValuEnable Wealth Plus",
+    "premium_due_date": "25 July",
+    "sum_assured": "Rs. 10,00,000",
+    "fund_value": "Rs. 5,20,000",
+    "outstanding_amount": "Rs. 1,00,000",
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_conversations(custom_actions):
+    """Turn each story into a list of (action, intent) webhook calls"""
+    conversations = []
+    for story in load_stories():
+        calls = []
+        intent = None
+        for step in story["steps"]:
+            if "intent" in step:
+                intent = step["intent"]
+            elif step.get("action") in custom_actions:
+                calls.append((step["action"], intent))
+        if calls:
+            conversations.append((story["name"], calls))
+    return conversations
+
+
+def build_payload(action, intent, text, sender_id, events, domain):
+    latest_message = {
+        "intent": {"name": intent, "confidence": 1.0},
+        "entities": [],
+        "text": text,
+        "message_id": uuid.uuid4().hex,
+        "metadata": {},
+    }
+    events.append({"event": "user", "timestamp": time.time(), "text": text, "parse_data": latest_message})
+    return {
+        "next_action": action,
+        "sender_id": sender_id,
+        "version": "3.1.0",
+        "domain": domain,
+        "tracker": {
+            "sender_id": sender_id,
+            "slots": SAMPLE_SLOTS,
+            "latest_message": latest_message,
+            "latest_event_time": time.time(),
+            "followup_action": None,
+            "paused": False,
+            "events": list(events),
+            "latest_input_channel": "rest",
+            "active_loop": {},
+            "latest_action": {"action_name": "action_listen"},
+            "latest_action_name": "action_listen",
+        },
+    }
+
+
+async def run_conversation(client, url, calls, examples, domain, results):
+    sender_id = f"load-{uuid.uuid4().hex[:12]}"
+    events = [{"event": "action", "timestamp": time.time(), "name": "action_session_start"}]
+    for action, intent in calls:
+        text = random.choice(examples.get(intent) or ["Tell me about my policy"])
+        payload = build_payload(action, intent, text, sender_id, events, domain)
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results[action].append((time.perf_counter() - start, ok))
+        events.append({"event": "action", "timestamp": time.time(), "name": action})
+        events.append({"event": "action", "timestamp": time.time(), "name": "action_listen"})
+
+
+async def run_rate(url, rate, duration, conversations, examples, domain, timeout):
+    """Start conversations at ``rate`` per second for ``duration`` seconds and wait for them"""
+    results = defaultdict(list)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        started = time.perf_counter()
+        story_cycle = itertools.cycle(random.sample(conversations, len(conversations)))
+        while time.perf_counter() - started < duration:
+            _, calls = next(story_cycle)
+            tasks.append(asyncio.create_task(run_conversation(client, url, calls, examples, domain, results)))
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return results, elapsed, len(tasks)
+
+
+def summarize(rate, results, elapsed, duration, conversations_started):
+    all_calls = [call for calls in results.values() for call in calls]
+    latencies = [latency for latency, _ in all_calls]
+    errors = sum(1 for _, ok in all_calls if not ok)
+    summary = {
+        "rate": rate,
+        "conversations": conversations_started,
+        "requests": len(all_calls),
+        "throughput_rps": round(len(all_calls) / elapsed, 2),
+        "drain_s": round(max(0.0, elapsed - duration), 2),
+        "error_rate": round(errors / len(all_calls), 4) if all_calls else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "actions": {},
+    }
+    for action, calls in sorted(results.items()):
+        action_latencies = [latency for latency, _ in calls]
+        summary["actions"][action] = {
+            "requests": len(calls),
+            "errors": sum(1 for _, ok in calls if not ok),
+            "mean_ms": round(statistics.mean(action_latencies) * 1000, 1),
+            "p50_ms": round(percentile(action_latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(action_latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(action_latencies, 0.99) * 1000, 1),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n=== {summary['rate']} conversations/s: {summary['requests']} requests, "
+          f"{summary['throughput_rps']} req/s, drain {summary['drain_s']} s, errors {summary['error_rate'] * 100:.2f}%, "
+          f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms")
+    print(f"{'action':<28} {'requests':>9} {'errors':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for action, stats in summary["actions"].items():
+        print(f"{action:<28} {stats['requests']:>9} {stats['errors']:>7} {stats['mean_ms']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def is_saturated(summary, latency_budget_ms, max_error_rate, max_calls):
+    # Conversations still running long after arrivals stopped means requests queued up
+    return (
+        summary["p95_ms"] > latency_budget_ms
+        or summary["error_rate"] > max_error_rate
+        or summary["drain_s"] > max_calls * latency_budget_ms / 1000
+    )
+
+
+def start_stub_server(port, llm_latency_ms, search_latency_ms):
+    process = subprocess.Popen([
+        sys.executable, os.path.join(project_root, "benchmarks", "stub_backends.py"),
+        "--port", str(port),
+        "--llm-latency-ms", str(llm_latency_ms),
+        "--search-latency-ms", str(search_latency_ms),
+    ])
+    health_url = f"http://127.0.0.1:{port}/health"
+    for _ in range(120):
+        try:
+            if httpx.get(health_url, timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("Stub action server exited during startup")
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Stub action server did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Rasa action server webhook")
+    parser.add_argument("--url", default="http://localhost:5055/webhook")
+    parser.add_argument("--rates", default="1,2,5,10", help="Comma separated conversation arrival rates per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of arrivals per rate")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--latency-budget-ms", type=float, default=3000, help="p95 above this marks saturation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--stub", action="store_true", help="Start a local action server with stubbed backends")
+    parser.add_argument("--stub-port", type=int, default=5056)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--search-latency-ms", type=float, default=20)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with open(DOMAIN_PATH, encoding="utf-8") as f:
+        domain = yaml.safe_load(f)
+    custom_actions = {action for action in domain.get("actions", []) if action.startswith("action_")}
+    conversations = build_conversations(custom_actions)
+    examples = load_nlu_examples()
+    max_calls = max(len(calls) for _, calls in conversations)
+    print(f"Replaying {len(conversations)} stories with custom actions")
+
+    stub_process = None
+    url = args.url
+    if args.stub:
+        stub_process = start_stub_server(args.stub_port, args.llm_latency_ms, args.search_latency_ms)
+        url = f"http://127.0.0.1:{args.stub_port}/webhook"
+
+    summaries = []
+    saturation_rate = None
+    try:
+        for rate in [float(rate) for rate in args.rates.split(",") if rate.strip()]:
+            results, elapsed, started = asyncio.run(
+                run_rate(url, rate, args.duration, conversations, examples, domain, args.timeout)
+            )
+            summary = summarize(rate, results, elapsed, args.duration, started)
+            summaries.append(summary)
+            print_summary(summary)
+            if saturation_rate is None and is_saturated(summary, args.latency_budget_ms, args.max_error_rate, max_calls):
+                saturation_rate = rate
+    finally:
+        if stub_process:
+            stub_process.terminate()
+            stub_process.wait()
+
+    if saturation_rate is None:
+        print("\nNo saturation observed at the tested rates")
+    else:
+        print(f"\nSaturation at {saturation_rate} conversations/s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"saturation_rate": saturation_rate, "results": summaries}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Retrieval quality vs. latency benchmark.
+
+Uses the labelled examples in data/nlu.yml as queries and
+INTENT_DOCUMENT_MAPPING as ground truth: a retrieved chunk is relevant when
+it comes from one of the documents mapped to the example's intent. For every
+combination of chunk size, chunk overlap and k it reports recall@k, hit rate,
+MRR, embedding time, search time and the approximate prompt size.
+
+Search is an exact in-process cosine search over all chunks, so quality
+numbers reflect chunking and k rather than index approximation.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py
+    python benchmarks/retrieval_benchmark.py --chunk-sizes 500,1000 --overlaps 100,200 --ks 2,3,5 --json results.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.indexing import DocumentIndexer
+from actions.rag_components.rag_response import INTENT_DOCUMENT_MAPPING, RAG_PROMPT
+from actions.rag_components.training_data import load_nlu_examples
+
+POLICY_DOCS_DIR = os.path.join(project_root, "actions", "document_store", "policy_docs")
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+def load_queries():
+    """Return (text, intent, relevant tenants) for every example of a mapped intent"""
+    queries = []
+    for intent, examples in load_nlu_examples().items():
+        relevant = set(INTENT_DOCUMENT_MAPPING.get(intent, []))
+        if not relevant:
+            continue
+        queries.extend((text, intent, relevant) for text in examples)
+    return queries
+
+
+def build_chunks(chunk_size: int, chunk_overlap: int):
+    """Split every policy document with the indexer's splitter"""
+    indexer = DocumentIndexer(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for file_path in sorted(Path(POLICY_DOCS_DIR).glob("*.txt")):
+        tenant = indexer._create_tennant_name(str(file_path))
+        for doc in indexer._split_documents(indexer._load_document(str(file_path))):
+            chunks.append((tenant, doc.page_content))
+    return chunks
+
+
+def evaluate(chunk_size, chunk_overlap, ks, queries, query_vectors, query_embed_ms, embeddings):
+    chunks = build_chunks(chunk_size, chunk_overlap)
+    start = time.perf_counter()
+    chunk_vectors = np.asarray(embeddings.embed_documents([text for _, text in chunks]), dtype=np.float32)
+    index_embed_s = time.perf_counter() - start
+    tenants = [tenant for tenant, _ in chunks]
+    max_k = max(ks)
+
+    search_ms = []
+    rankings = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        scores = chunk_vectors @ vector
+        top = np.argpartition(-scores, min(max_k, len(scores) - 1))[:max_k]
+        top = top[np.argsort(-scores[top])]
+        search_ms.append((time.perf_counter() - start) * 1000)
+        rankings.append(top)
+
+    results = []
+    for k in ks:
+        recalls, hits, reciprocal_ranks, prompt_tokens = [], [], [], []
+        for (text, intent, relevant), ranking in zip(queries, rankings):
+            top_k = ranking[:k]
+            found = {tenants[i] for i in top_k} & relevant
+            recalls.append(len(found) / len(relevant))
+            hits.append(1.0 if found else 0.0)
+            rank = next((position + 1 for position, i in enumerate(top_k) if tenants[i] in relevant), None)
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+            context = "\n".join(f"[{tenants[i]}] {chunks[i][1]}" for i in top_k)
+            prompt_tokens.append(approx_tokens(RAG_PROMPT.format(context=context, question=text, intent=intent)))
+
+        results.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "k": k,
+            "chunks": len(chunks),
+            "recall@k": round(statistics.mean(recalls), 3),
+            "hit@k": round(statistics.mean(hits), 3),
+            "mrr": round(statistics.mean(reciprocal_ranks), 3),
+            "index_embed_s": round(index_embed_s, 2),
+            "query_embed_ms": round(query_embed_ms, 2),
+            "search_ms": round(statistics.mean(search_ms), 3),
+            "prompt_tokens": round(statistics.mean(prompt_tokens)),
+        })
+    return results
+
+
+def parse_ints(value: str):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality against latency")
+    parser.add_argument("--chunk-sizes", type=parse_ints, default=[500, 750, 1000, 1500])
+    parser.add_argument("--overlaps", type=parse_ints, default=[0, 100, 200])
+    parser.add_argument("--ks", type=parse_ints, default=[1, 2, 3, 5])
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    queries = load_queries()
+    embeddings = Embeddings.get_embeddings()
+
+    # Query embeddings do not depend on chunking, so compute them once
+    timings = []
+    query_vectors = []
+    for text, _, _ in queries:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(text))
+        timings.append((time.perf_counter() - start) * 1000)
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    query_embed_ms = statistics.mean(timings)
+    print(f"{len(queries)} labelled queries, mean query embedding {query_embed_ms:.2f} ms\n")
+
+    columns = ["chunk_size", "chunk_overlap", "k", "chunks", "recall@k", "hit@k", "mrr",
+               "index_embed_s", "search_ms", "prompt_tokens"]
+    print("  ".join(f"{column:>13}" for column in columns))
+
+    all_results = []
+    for chunk_size in args.chunk_sizes:
+        for chunk_overlap in args.overlaps:
+            if chunk_overlap >= chunk_size:
+                continue
+            for row in evaluate(chunk_size, chunk_overlap, args.ks, queries, query_vectors, query_embed_ms, embeddings):
+                all_results.append(row)
+                print("  ".join(f"{row[column]:>13}" for column in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Scenario routing benchmark: keyword matching vs. embedding centroids.
+
+Uses the NLU examples of each scenario intent as labelled messages. The
+embedding router is scored with leave-one-out centroids, so a message never
+contributes to the centroid it is classified against. Reports accuracy and
+per-message latency for the keyword rules, the centroid router alone, and
+the router with keyword fallback below router_min_score as configured.
+
+Routing latency excludes the query embedding, which retrieval reuses; the
+embedding time is reported separately.
+
+Usage:
+    python benchmarks/scenario_router_benchmark.py
+    python benchmarks/scenario_router_benchmark.py --action action_scenario_response --verbose
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from actions.rag_components.action_registry import load_action_registry
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.scenario_router import ScenarioRouter, normalize_rows
+from actions.rag_components.training_data import load_nlu_examples
+
+
+def summarize(name, correct, latencies_ms):
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "method": name,
+        "accuracy": round(sum(correct) / len(correct), 3),
+        "mean_ms": round(statistics.mean(latencies_ms), 4),
+        "p95_ms": round(latencies_ms[int(0.95 * (len(latencies_ms) - 1))], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare keyword and embedding scenario routing")
+    parser.add_argument("--action", default="action_scenario_response")
+    parser.add_argument("--verbose", action="store_true", help="Print every misrouted message")
+    args = parser.parse_args()
+
+    spec = load_action_registry()[args.action]
+    scenarios = spec.scenarios
+    intents = [scenario["intent"] for scenario in scenarios]
+    examples = load_nlu_examples()
+    messages = [(text, intent) for intent in intents for text in examples.get(intent, [])]
+    print(f"{len(messages)} labelled messages across {len(scenarios)} scenarios\n")
+
+    embeddings = Embeddings.get_embeddings()
+
+    # Section texts only (no NLU examples); the examples are added per fold below
+    section_router = ScenarioRouter(scenarios, examples={})
+    section_vectors = [
+        np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        for texts in section_router.training_texts()
+    ]
+    example_vectors = normalize_rows(np.asarray(embeddings.embed_documents([text for text, _ in messages]), dtype=np.float32))
+
+    embed_ms = []
+    for text, _ in messages:
+        start = time.perf_counter()
+        embeddings.embed_query(text)
+        embed_ms.append((time.perf_counter() - start) * 1000)
+
+    min_score = spec.router.min_score if spec.router is not None else 0.3
+    keyword_correct, keyword_ms = [], []
+    router_correct, router_ms = [], []
+    fallback_correct = []
+    for index, (text, intent) in enumerate(messages):
+        start = time.perf_counter()
+        rule = spec.keyword_route(text)
+        keyword_intent = rule["intent"] if rule else spec.intent
+        keyword_ms.append((time.perf_counter() - start) * 1000)
+        keyword_correct.append(keyword_intent == intent)
+
+        # Leave-one-out centroids: every other example of each scenario plus its section
+        per_scenario = []
+        for position, scenario_intent in enumerate(intents):
+            members = [i for i, (_, label) in enumerate(messages) if label == scenario_intent and i != index]
+            per_scenario.append(np.vstack([section_vectors[position], example_vectors[members]]) if members else section_vectors[position])
+        centroids = ScenarioRouter.centroids_from(per_scenario)
+
+        start = time.perf_counter()
+        scores = centroids @ example_vectors[index]
+        best = int(np.argmax(scores))
+        router_ms.append((time.perf_counter() - start) * 1000)
+        router_intent = intents[best]
+        router_correct.append(router_intent == intent)
+
+        routed_intent = router_intent if scores[best] >= min_score else keyword_intent
+        fallback_correct.append(routed_intent == intent)
+
+        if args.verbose and router_intent != intent:
+            print(f"  router: {text!r} -> {router_intent} ({scores[best]:.2f}), expected {intent}")
+        if args.verbose and keyword_intent != intent:
+            print(f"  keyword: {text!r} -> {keyword_intent}, expected {intent}")
+
+    rows = [
+        summarize("keyword", keyword_correct, keyword_ms),
+        summarize("embedding", router_correct, router_ms),
+        summarize(f"embedding+kw@{min_score}", fallback_correct, router_ms),
+    ]
+    columns = ["method", "accuracy", "mean_ms", "p95_ms"]
+    if args.verbose:
+        print()
+    print("  ".join(f"{column:>20}" for column in columns))
+    for row in rows:
+        print("  ".join(f"{row[column]:>20}" for column in columns))
+    print(f"\nQuery embedding (shared with retrieval): mean {statistics.mean(embed_ms):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
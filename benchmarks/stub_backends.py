@@ -0,0 +1,94 @@
+"""
+Action server with stubbed LLM and vector store backends.
+
+Replaces the Gemini client and the Weaviate searches with fakes that sleep
+for a configurable latency, so the load generator can measure the action
+server itself without upstream quotas or an index.
+
+Usage:
+    python benchmarks/stub_backends.py --port 5056 --llm-latency-ms 800 --search-latency-ms 20
+"""
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeLLM:
+    """Stands in for ChatGoogleGenerativeAI with a fixed answer and latency"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+
+    def invoke(self, prompt, *args, **kwargs):
+        time.sleep(self.latency_s)
+        return FakeResponse("Your policy offers life cover and tax benefits. Would you like to pay the premium online today?")
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        import asyncio
+        await asyncio.sleep(self.latency_s)
+        return FakeResponse("Your policy offers life cover and tax benefits. Would you like to pay the premium online today?")
+
+
+def install_stubs(llm_latency_ms: float, search_latency_ms: float):
+    """Patch the LLM, the embeddings and the DatabaseManager search entry points with fakes"""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from actions.rag_components.embeddings import Embeddings
+    from actions.rag_components.llm import LLM
+    from actions.rag_components.vector_store import DatabaseManager, SearchHit
+
+    fake_llm = FakeLLM(llm_latency_ms / 1000)
+    search_latency_s = search_latency_ms / 1000
+
+    def fake_documents(tenant_name, k):
+        return [
+            SearchHit(f"{tenant_name}-{i}", tenant_name, i * 0.1, f"{tenant_name}.txt", f"Stub policy text {i} for {tenant_name}.")
+            for i in range(k)
+        ]
+
+    def search_tenant(tenant_name, query, k=5, query_vector=None):
+        time.sleep(search_latency_s)
+        return fake_documents(tenant_name, k)
+
+    def search_tenants(tenant_names, query, k=2, query_vector=None):
+        time.sleep(search_latency_s)
+        return [doc for tenant_name in tenant_names for doc in fake_documents(tenant_name, k)]
+
+    def search_all_tenants(query, tenant_names, k=3, query_vector=None):
+        return search_tenants(tenant_names, query, k)[:k]
+
+    LLM.get_instance = classmethod(lambda cls: (fake_llm, True))
+    # Used by the scenario router; keeps the stub server free of the real model
+    Embeddings._embeddings = DeterministicFakeEmbedding(size=384)
+    DatabaseManager.search_tenant = staticmethod(search_tenant)
+    DatabaseManager.search_tenants = staticmethod(search_tenants)
+    DatabaseManager.search_all_tenants = staticmethod(search_all_tenants)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the action server against stubbed backends")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--search-latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    install_stubs(args.llm_latency_ms, args.search_latency_ms)
+
+    from action_server import create_listener, run_worker
+
+    # Serve in this process so the patched modules are the ones handling requests
+    sock = create_listener(args.host, args.port)
+    run_worker(sock, 0, torch_threads=1)
+
+
+if __name__ == "__main__":
+    main()
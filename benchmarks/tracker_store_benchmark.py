@@ -0,0 +1,165 @@
+"""
+Tracker store benchmark: Rasa's in-memory store vs. the compacting store.
+
+Replays the stories in data/stories.yml as long voice calls: each sender
+runs story after story for the given number of turns, with an NLU example
+as the message, the story's actions, a bot answer of typical length and
+the sample slots set along the way. For each store it reports, at the end
+of the call, the events held per sender, the size of the tracker sent to
+the action server and the per-turn time to retrieve, serialize and save
+it. A second pass holds many senders at once and reports the store's
+memory from tracemalloc.
+
+Usage:
+    python benchmarks/tracker_store_benchmark.py
+    python benchmarks/tracker_store_benchmark.py --turns 50,200,500 --senders 500 --max-turns 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from rasa.core.tracker_store import InMemoryTrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, BotUttered, SessionStarted, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker, EventVerbosity
+
+from actions.rag_components.training_data import load_nlu_examples, load_stories
+from benchmarks.action_load_test import SAMPLE_SLOTS
+from tracker_stores.compacting import CompactingTrackerStore
+
+DOMAIN_PATH = os.path.join(project_root, "domain.yml")
+
+ANSWER = (
+    "Your ValuEnable Wealth Plus policy gives you life cover of ten lakh rupees along with market linked "
+    "returns, and the premium you pay qualifies for tax benefits under section 80C. Paying before the due "
+    "date keeps the cover active. Would you like me to send you the payment link now?"
+)
+
+
+def build_turns(domain):
+    """(intent, actions) pairs from the stories, in story order"""
+    actions = set(domain.action_names_or_texts)
+    turns = []
+    for story in load_stories():
+        for step in story["steps"]:
+            if "intent" in step:
+                turns.append((step["intent"], []))
+            elif turns and step.get("action") in actions:
+                turns[-1][1].append(step["action"])
+    return turns or [("greet", ["utter_greet"])]
+
+
+def turn_events(intent, actions, examples, slot_names, rng):
+    now = time.time()
+    text = rng.choice(examples.get(intent) or ["Tell me about my policy"])
+    events = [UserUttered(text, intent={"name": intent, "confidence": 1.0},
+                          parse_data={"intent": {"name": intent, "confidence": 1.0}, "entities": [], "text": text},
+                          timestamp=now)]
+    if slot_names and rng.random() < 0.3:
+        name = rng.choice(slot_names)
+        events.append(SlotSet(name, SAMPLE_SLOTS[name], timestamp=now))
+    for action in actions:
+        events.append(ActionExecuted(action, timestamp=now))
+        events.append(BotUttered(ANSWER, timestamp=now))
+    events.append(ActionExecuted(ACTION_LISTEN_NAME, timestamp=now))
+    return events
+
+
+async def run_call(store, domain, sender_id, turns, script, examples, slot_names, rng, timings=None):
+    """One sender talking for ``turns`` turns, optionally timing each turn"""
+    start = [ActionExecuted(ACTION_SESSION_START_NAME), SessionStarted(), ActionExecuted(ACTION_LISTEN_NAME)]
+    await store.save(DialogueStateTracker.from_events(sender_id, start, domain.slots))
+    payload_bytes = 0
+    for turn in range(turns):
+        intent, actions = script[turn % len(script)]
+        begin = time.perf_counter()
+        tracker = await store.retrieve(sender_id)
+        for event in turn_events(intent, actions, examples, slot_names, rng):
+            tracker.update(event, domain)
+        payload = json.dumps(tracker.current_state(EventVerbosity.ALL))
+        await store.save(tracker)
+        if timings is not None:
+            timings.append((time.perf_counter() - begin) * 1000)
+        payload_bytes = len(payload)
+    tracker = await store.retrieve_full_tracker(sender_id)
+    return len(tracker.events), payload_bytes
+
+
+def make_stores(domain, max_turns, max_senders, spill_dir):
+    return {
+        "in_memory": lambda: InMemoryTrackerStore(domain),
+        f"compacting@{max_turns}": lambda: CompactingTrackerStore(domain, max_turns=max_turns, max_senders=max_senders),
+        f"compacting@{max_turns}+spill": lambda: CompactingTrackerStore(
+            domain, max_turns=max_turns, max_senders=max_senders,
+            spill_path=os.path.join(spill_dir, f"trackers-{time.time_ns()}.sqlite3")
+        ),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare tracker store memory and per-turn serialization cost")
+    parser.add_argument("--turns", default="20,100,400", help="Comma-separated call lengths in user turns")
+    parser.add_argument("--senders", type=int, default=200, help="Concurrent senders for the memory pass")
+    parser.add_argument("--memory-turns", type=int, default=100, help="Turns per sender in the memory pass")
+    parser.add_argument("--max-turns", type=int, default=20)
+    parser.add_argument("--max-senders", type=int, default=100, help="In-memory senders of the compacting store")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    domain = Domain.load(DOMAIN_PATH)
+    examples = load_nlu_examples()
+    script = build_turns(domain)
+    slot_names = [slot.name for slot in domain.slots if slot.name in SAMPLE_SLOTS]
+    spill_dir = tempfile.mkdtemp(prefix="tracker-bench-")
+    stores = make_stores(domain, args.max_turns, args.max_senders, spill_dir)
+
+    print("Per-turn cost at the end of one call\n")
+    columns = ["store", "turns", "events", "payload_kb", "mean_ms", "last10_ms", "p95_ms"]
+    print("  ".join(f"{column:>22}" for column in columns))
+    for turns in [int(value) for value in args.turns.split(",")]:
+        for name, factory in stores.items():
+            timings = []
+            events, payload = await run_call(
+                factory(), domain, "caller", turns, script, examples, slot_names, random.Random(args.seed), timings
+            )
+            ordered = sorted(timings)
+            row = {
+                "store": name,
+                "turns": turns,
+                "events": events,
+                "payload_kb": round(payload / 1024, 1),
+                "mean_ms": round(statistics.mean(timings), 3),
+                "last10_ms": round(statistics.mean(timings[-10:]), 3),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            }
+            print("  ".join(f"{row[column]:>22}" for column in columns))
+
+    print(f"\nStore memory with {args.senders} senders of {args.memory_turns} turns\n")
+    for name, factory in stores.items():
+        rng = random.Random(args.seed)
+        tracemalloc.start()
+        store = factory()
+        started = time.perf_counter()
+        for index in range(args.senders):
+            await run_call(store, domain, f"caller-{index}", args.memory_turns, script, examples, slot_names, rng)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = store.stats() if hasattr(store, "stats") else {}
+        print(f"{name:>22}  current {current / 2**20:8.2f} MB  peak {peak / 2**20:8.2f} MB  "
+              f"{time.perf_counter() - started:7.1f} s  {json.dumps(stats)}")
+        del store
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
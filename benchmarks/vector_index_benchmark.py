@@ -0,0 +1,177 @@
+"""
+Vector index profile benchmark.
+
+For every profile in vector_index.yml, builds a scratch Weaviate collection
+with that HNSW/quantization configuration, loads the embedded policy chunks
+(optionally padded with synthetic neighbours to simulate a larger corpus),
+and runs the NLU examples as queries. Recall@k is measured against an exact
+brute-force search, next to query latency and index memory.
+
+Memory is reported as an estimate from the profile (vectors plus HNSW graph
+links). If Weaviate exposes Prometheus metrics (PROMETHEUS_MONITORING_ENABLED),
+pass --metrics-url to also report the measured heap growth.
+
+Note that PQ only compresses once a collection holds pq_training_limit
+vectors, so use --synthetic to reach that size when comparing PQ profiles.
+
+Usage:
+    python benchmarks/vector_index_benchmark.py --k 3
+    python benchmarks/vector_index_benchmark.py --profiles default,bq_compressed --synthetic 20000
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from weaviate.classes.config import Configure
+from weaviate.classes.query import MetadataQuery
+from actions.rag_components.embeddings import Embeddings
+from actions.rag_components.index_config import build_vector_index_config, load_index_profiles
+from actions.rag_components.indexing import DocumentIndexer
+from actions.rag_components.training_data import load_nlu_examples
+from actions.rag_components.vector_store import DatabaseManager
+
+POLICY_DOCS_DIR = os.path.join(project_root, "actions", "document_store", "policy_docs")
+
+
+def build_corpus(synthetic: int, noise: float, seed: int):
+    """Embed the policy chunks and add noisy synthetic neighbours"""
+    indexer = DocumentIndexer()
+    texts = []
+    for file_path in sorted(Path(POLICY_DOCS_DIR).glob("*.txt")):
+        texts.extend(doc.page_content for doc in indexer._split_documents(indexer._load_document(str(file_path))))
+    vectors = np.asarray(Embeddings.get_embeddings().embed_documents(texts), dtype=np.float32)
+
+    if synthetic:
+        rng = np.random.default_rng(seed)
+        bases = vectors[rng.integers(0, len(vectors), synthetic)]
+        extra = bases + rng.normal(0, noise, bases.shape).astype(np.float32)
+        extra /= np.linalg.norm(extra, axis=1, keepdims=True)
+        vectors = np.vstack([vectors, extra])
+    return vectors
+
+
+def exact_top_k(corpus, queries, k):
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def estimated_memory_bytes(profile, count, dim):
+    quantizer = (profile.get("quantizer") or "none").lower()
+    if quantizer == "pq":
+        vector_bytes = count * profile.get("pq_segments", dim // 4)
+    elif quantizer == "bq":
+        vector_bytes = count * dim // 8
+    else:
+        vector_bytes = count * dim * 4
+    # Layer 0 holds up to 2 * max_connections links per node, 8 bytes each
+    graph_bytes = count * profile.get("max_connections", 32) * 2 * 8
+    return vector_bytes + graph_bytes
+
+
+def read_heap_bytes(metrics_url):
+    if not metrics_url:
+        return None
+    try:
+        text = httpx.get(metrics_url, timeout=5).text
+    except httpx.HTTPError:
+        return None
+    match = re.search(r"^go_memstats_heap_inuse_bytes\s+([0-9.e+]+)", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def object_id(index):
+    return uuid.UUID(int=index + 1)
+
+
+def benchmark_profile(client, name, profile, corpus, queries, truth, k, metrics_url, keep):
+    collection_name = f"IndexBench_{re.sub(r'[^0-9A-Za-z]', '_', name).title()}"
+    if client.collections.exists(collection_name):
+        client.collections.delete(collection_name)
+
+    heap_before = read_heap_bytes(metrics_url)
+    collection = client.collections.create(
+        name=collection_name,
+        vectorizer_config=Configure.Vectorizer.none(),
+        vector_index_config=build_vector_index_config(profile)
+    )
+
+    start = time.perf_counter()
+    with collection.batch.fixed_size(batch_size=500) as batch:
+        for index, vector in enumerate(corpus):
+            batch.add_object(properties={"position": index}, vector=vector.tolist(), uuid=object_id(index))
+    insert_s = time.perf_counter() - start
+    heap_after = read_heap_bytes(metrics_url)
+
+    id_to_index = {object_id(index): index for index in range(len(corpus))}
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        response = collection.query.near_vector(
+            near_vector=query.tolist(),
+            limit=k,
+            return_metadata=MetadataQuery(distance=True)
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {id_to_index[obj.uuid] for obj in response.objects}
+        recalls.append(len(found & expected) / len(expected))
+
+    if not keep:
+        client.collections.delete(collection_name)
+
+    latencies.sort()
+    return {
+        "profile": name,
+        "recall": round(statistics.mean(recalls), 4),
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "insert_s": round(insert_s, 2),
+        "est_mem_mb": round(estimated_memory_bytes(profile, len(corpus), corpus.shape[1]) / 1e6, 2),
+        "heap_mb": round((heap_after - heap_before) / 1e6, 2) if heap_before and heap_after else "-",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector index profiles against brute force")
+    parser.add_argument("--profiles", help="Comma separated profiles (default: all in vector_index.yml)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--synthetic", type=int, default=0, help="Synthetic vectors added to the corpus")
+    parser.add_argument("--noise", type=float, default=0.05, help="Noise scale for synthetic vectors")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--metrics-url", help="Weaviate Prometheus endpoint, e.g. http://localhost:2112/metrics")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collections")
+    args = parser.parse_args()
+
+    profiles = load_index_profiles()
+    names = [name.strip() for name in args.profiles.split(",")] if args.profiles else list(profiles)
+
+    corpus = build_corpus(args.synthetic, args.noise, args.seed)
+    texts = [text for examples in load_nlu_examples().values() for text in examples]
+    queries = np.asarray(Embeddings.get_embeddings().embed_documents(texts), dtype=np.float32)
+    truth = exact_top_k(corpus, queries, args.k)
+    print(f"Corpus: {len(corpus)} vectors of dimension {corpus.shape[1]}, {len(queries)} queries, k={args.k}\n")
+
+    columns = ["profile", "recall", "p50_ms", "p95_ms", "insert_s", "est_mem_mb", "heap_mb"]
+    print("  ".join(f"{column:>14}" for column in columns))
+    client = DatabaseManager.get_client()
+    try:
+        for name in names:
+            row = benchmark_profile(client, name, profiles[name], corpus, queries, truth, args.k, args.metrics_url, args.keep)
+            print("  ".join(f"{row[column]:>14}" for column in columns))
+    finally:
+        DatabaseManager.close_client()
+
+
+if __name__ == "__main__":
+    main()
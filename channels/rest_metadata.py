@@ -0,0 +1,21 @@
+from typing import Any, Dict, Optional, Text
+
+from rasa.core.channels.rest import RestInput
+from sanic.request import Request
+
+
+class RestMetadataInput(RestInput):
+    """
+    REST channel that forwards the request's "metadata" object to the tracker.
+
+    The stock REST channel drops it, which loses the traceparent the voice
+    gateway and frontend send with each turn. It keeps the name "rest" so
+    clients keep posting to /webhooks/rest/webhook.
+    """
+
+    @classmethod
+    def name(cls) -> Text:
+        return "rest"
+
+    def get_metadata(self, request: Request) -> Optional[Dict[Text, Any]]:
+        return (request.json or {}).get("metadata")
@@ -10,36 +10,72 @@ export const LoadingScreen = ({ onSystemReady }) => {
   });
 
   useEffect(() => {
+    let interval = null;
+    let events = null;
+    let status = null;
+    let notified = false;
+
+    const applyStatus = (initializationStatus) => {
+      setInitStatus({
+        overall_ready: initializationStatus.overall_ready,
+        total_progress: initializationStatus.total_progress,
+        current_step: initializationStatus.current_step
+      });
+
+      // If system is ready and callback exists, notify parent
+      if (initializationStatus.overall_ready && onSystemReady && !notified) {
+        notified = true;
+        setTimeout(() => {
+          onSystemReady();
+        }, 1000); // Small delay to show completion
+      }
+    };
+
     const checkSystemStatus = async () => {
       try {
         const response = await fetch('http://localhost:8000/status');
         const data = await response.json();
-        
-        setInitStatus({
-          overall_ready: data.initialization_status.overall_ready,
-          total_progress: data.initialization_status.total_progress,
-          current_step: data.initialization_status.current_step
-        });
-
-        // If system is ready and callback exists, notify parent
-        if (data.initialization_status.overall_ready && onSystemReady) {
-          setTimeout(() => {
-            onSystemReady();
-          }, 1000); // Small delay to show completion
-        }
+        applyStatus(data.initialization_status);
       } catch (error) {
         console.error('Failed to fetch system status:', error);
       }
     };
 
-    // Check status immediately
-    checkSystemStatus();
+    const startPolling = () => {
+      if (interval) return;
+      // Check status immediately, then poll every 500ms
+      checkSystemStatus();
+      interval = setInterval(checkSystemStatus, 500);
+    };
 
-    // Poll for status updates every 500ms
-    const interval = setInterval(checkSystemStatus, 500);
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      // The initializer pushes the full status once, then only the parts that change
+      events = new EventSource('http://localhost:8000/status/stream');
+      events.addEventListener('status', (event) => {
+        status = JSON.parse(event.data).initialization_status;
+        applyStatus(status);
+      });
+      events.addEventListener('update', (event) => {
+        if (!status) return;
+        status = { ...status, ...JSON.parse(event.data).initialization_status };
+        applyStatus(status);
+      });
+      events.onerror = () => {
+        // Stream unavailable (e.g. an older initializer or a proxy that buffers it)
+        if (!status) {
+          events.close();
+          startPolling();
+        }
+      };
+    }
 
-    // Cleanup interval on component unmount
-    return () => clearInterval(interval);
+    // Close the stream and stop polling on unmount
+    return () => {
+      if (events) events.close();
+      if (interval) clearInterval(interval);
+    };
   }, [onSystemReady]);
 
   // Don't render if system is ready
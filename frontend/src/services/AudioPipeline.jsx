@@ -1,6 +1,39 @@
 import React, { useRef, useState } from "react";
 import { FaMicrophone } from "react-icons/fa";
 
+// When set, each turn goes through the server-side voice gateway (ASR -> Rasa -> TTS)
+const VOICE_GATEWAY_URL = import.meta.env.VITE_VOICE_GATEWAY_URL;
+
+const base64ToBlob = (data, type) => {
+  const bytes = Uint8Array.from(atob(data), (c) => c.charCodeAt(0));
+  return new Blob([bytes], { type });
+};
+
+// W3C trace context for one voice turn; every service joins the same trace
+const randomHex = (bytes) =>
+  Array.from(crypto.getRandomValues(new Uint8Array(bytes)), (b) => b.toString(16).padStart(2, "0")).join("");
+const newTraceparent = () => `00-${randomHex(16)}-${randomHex(8)}-01`;
+
+// Read a newline-delimited JSON response, calling onEvent for each event as it arrives
+const readNdjson = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+
+    let newline;
+    while ((newline = buffered.indexOf("\n")) >= 0) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (line) onEvent(JSON.parse(line));
+    }
+  }
+};
+
 const AudioPipeline = () => {
   const [transcription, setTranscription] = useState("");
   const [loading, setLoading] = useState(false);
@@ -80,9 +113,81 @@ const AudioPipeline = () => {
     }
   };
 
+  const playSegmentsInOrder = () => {
+    const queue = [];
+    let playing = false;
+
+    const playNext = () => {
+      const blob = queue.shift();
+      if (!blob) {
+        playing = false;
+        isAudioPlayingRef.current = false;
+        return;
+      }
+      playing = true;
+      isAudioPlayingRef.current = true;
+      const audio = new Audio(URL.createObjectURL(blob));
+      audio.onended = playNext;
+      audio.play().catch((err) => {
+        console.error("Audio play error:", err);
+        playNext();
+      });
+    };
+
+    return (blob) => {
+      queue.push(blob);
+      if (!playing) playNext();
+    };
+  };
+
+  const handleAudioBlobViaGateway = async (audioBlob) => {
+    const formData = new FormData();
+    formData.append("file", audioBlob, "recording.webm");
+    formData.append("sender", "test_user");
+    formData.append("lang", "Hindi");
+
+    console.log("Step 3: Sending audio to voice gateway...");
+    const res = await fetch(`${VOICE_GATEWAY_URL}/turn/`, {
+      method: "POST",
+      headers: { traceparent: newTraceparent() },
+      body: formData,
+    });
+    if (!res.ok) throw new Error(await res.text());
+
+    const enqueue = playSegmentsInOrder();
+    await readNdjson(res, (event) => {
+      if (event.type === "transcript") {
+        setTranscription(event.text);
+        console.log("Step 3: Received transcription:", event.text);
+      } else if (event.type === "audio") {
+        console.log("Step 5: Received audio segment", event.index);
+        enqueue(base64ToBlob(event.audio, event.content_type));
+      } else if (event.type === "error") {
+        throw new Error(`${event.stage}: ${event.detail}`);
+      }
+    });
+  };
+
   const handleAudioBlob = async (audioBlob) => {
+    if (VOICE_GATEWAY_URL) {
+      setLoading(true);
+      setDisabled(true);
+      try {
+        await handleAudioBlobViaGateway(audioBlob);
+      } catch (err) {
+        console.error("Processing error:", err.message);
+        setError("Error: " + err.message);
+        setTranscription("");
+      } finally {
+        setLoading(false);
+        setDisabled(false);
+      }
+      return;
+    }
+
     setLoading(true);
     setDisabled(true);
+    const traceparent = newTraceparent();
     try {
       console.log("Step 3: Sending audio to /transcribe...");
       const formData = new FormData();
@@ -90,6 +195,7 @@ const AudioPipeline = () => {
 
       const transcriptionRes = await fetch("http://localhost:3001/transcribe/", {
         method: "POST",
+        headers: { traceparent },
         body: formData,
       });
 
@@ -100,53 +206,58 @@ const AudioPipeline = () => {
       setTranscription(transcribedText);
       console.log("Step 3: Received transcription:", transcribedText);
 
+      // Start retrieval for the likely action while Rasa classifies the transcript
+      if (transcribedText) {
+        fetch("http://localhost:8000/speculate", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ sender: "test_user", text: transcribedText }),
+        }).catch(() => {});
+      }
+
       const secondPayload = {
         sender: "test_user",
         message: transcribedText,
+        metadata: { traceparent },
       };
 
       console.log("Step 4: Sending message to Rasa webhook...");
       console.log("Payload:", JSON.stringify(secondPayload));
       const secondRes = await fetch("http://localhost:5005/webhooks/rest/webhook", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", traceparent },
         body: JSON.stringify(secondPayload),
       });
 
       if (!secondRes.ok) throw new Error(await secondRes.text());
       const secondData = await secondRes.json();
 
-      for (const message of secondData) {
-        if (!message.text) continue;
+      const texts = secondData.filter((message) => message.text).map((message) => message.text);
+      if (texts.length === 0) return;
 
-        const thirdPayload = {
-          text: message.text,
-          lang: "Hindi",
-        };
+      const thirdPayload = {
+        texts,
+        lang: "Hindi",
+      };
 
-        console.log("Step 5: Sending text to TTS service...");
-        console.log("Payload:", JSON.stringify(thirdPayload));
-        const thirdRes = await fetch("http://localhost:5050/speak/", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(thirdPayload),
-        });
+      console.log("Step 5: Sending texts to TTS batch service...");
+      console.log("Payload:", JSON.stringify(thirdPayload));
+      const thirdRes = await fetch("http://localhost:5050/speak/batch/", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", traceparent },
+        body: JSON.stringify(thirdPayload),
+      });
 
-        if (!thirdRes.ok) throw new Error(await thirdRes.text());
-        const blob  = await thirdRes.blob();
-        const audioUrl = URL.createObjectURL(blob);
-        const audio = new Audio(audioUrl);
-        console.log("Step 5: Received audio URL:", audioUrl);
-        isAudioPlayingRef.current = true;
-        audio.play()
-          .catch((err) => console.error("Audio play error:", err));
-        audio.onended = () => {          
-          isAudioPlayingRef.current = false;
-          setDisabled(false);
-          console.log("Audio playback finished.");
+      if (!thirdRes.ok) throw new Error(await thirdRes.text());
+      const enqueue = playSegmentsInOrder();
+      await readNdjson(thirdRes, (event) => {
+        if (event.type === "audio") {
+          console.log("Step 5: Received audio segment", event.index);
+          enqueue(base64ToBlob(event.audio, event.content_type));
+        } else if (event.type === "error") {
+          console.error("TTS error for segment", event.index, event.detail);
         }
-        
-      }
+      });
     } catch (err) {
       console.error("Processing error:", err.message);
       setError("Error: " + err.message);
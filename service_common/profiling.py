@@ -0,0 +1,218 @@
+"""
+Sampled profiling of requests and actions, written to PROFILE_DIR.
+
+Shared by ASR, TTS and the action server. The services profile with the
+stack sampler by default; the action server sets its own defaults with
+set_defaults, which PROFILE_MODE and PROFILE_DIR still override.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Fraction of runs to profile; 0 turns profiling off
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# "sampling" snapshots all thread stacks, which also covers work handed to the
+# threadpool; "cprofile" records every call on the event loop thread
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling").lower()
+# Relative to the service's working directory (/app in the Docker images)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# Only one profile per process at a time; overlapping runs are skipped
+_active = threading.Lock()
+
+
+def set_defaults(mode: Optional[str] = None, directory: Optional[str] = None):
+    """Replace the default mode and directory of this process, unless set in the environment"""
+    global PROFILE_MODE, PROFILE_DIR
+    if mode and "PROFILE_MODE" not in os.environ:
+        PROFILE_MODE = mode.lower()
+    if directory and "PROFILE_DIR" not in os.environ:
+        PROFILE_DIR = directory
+
+
+class StackSampler:
+    """Periodically snapshot the stacks of all other threads, counting folded stacks"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        """Write the samples in the folded format read by flamegraph.pl and speedscope"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _rotate():
+    """Keep only the newest PROFILE_MAX_FILES profiles"""
+    metadata_files = sorted(
+        (name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")),
+        reverse=True
+    )
+    for name in metadata_files[PROFILE_MAX_FILES:]:
+        stem = name[:-len(".json")]
+        for extension in (".json", ".prof", ".folded"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stem + extension))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profile(kind: str, name: str, metadata: Optional[dict] = None):
+    """
+    Profile the enclosed block for a PROFILE_SAMPLE_RATE fraction of calls.
+
+    Writes <stem>.prof (pstats) or <stem>.folded (stack samples) together with
+    <stem>.json describing the run. The metadata dict may be extended inside
+    the block, e.g. with a response status.
+    """
+    if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE or not _active.acquire(blocking=False):
+        yield
+        return
+
+    metadata = metadata if metadata is not None else {}
+    profiler = None
+    sampler = None
+    start = time.time()
+    try:
+        if PROFILE_MODE == "sampling":
+            sampler = StackSampler()
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) already owns this thread
+                profiler = None
+        yield
+    finally:
+        duration = time.time() - start
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            # Names sort chronologically, which is what rotation and listing rely on
+            timestamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(start))}-{int(start * 1000) % 1000:03d}"
+            stem = f"{timestamp}-{kind}-{re.sub(r'[^0-9A-Za-z_.-]', '_', name)}-{uuid.uuid4().hex[:8]}"
+            if sampler is not None:
+                sampler.stop()
+                profile_file = stem + ".folded"
+                sampler.dump(os.path.join(PROFILE_DIR, profile_file))
+            elif profiler is not None:
+                profiler.disable()
+                profile_file = stem + ".prof"
+                profiler.dump_stats(os.path.join(PROFILE_DIR, profile_file))
+            else:
+                profile_file = None
+            if profile_file:
+                with open(os.path.join(PROFILE_DIR, stem + ".json"), "w", encoding="utf-8") as f:
+                    json.dump({
+                        "id": stem,
+                        "kind": kind,
+                        "name": name,
+                        "mode": "sampling" if sampler is not None else "cprofile",
+                        "file": profile_file,
+                        "started_at": start,
+                        "duration": round(duration, 4),
+                        "pid": os.getpid(),
+                        "metadata": metadata,
+                    }, f, default=str)
+                _rotate()
+        except Exception as e:
+            logger.warning("Failed to write profile: %s", e)
+        finally:
+            _active.release()
+
+
+def list_profiles(limit: int = 50) -> List[dict]:
+    """Metadata of the most recent profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")), reverse=True)[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(file_name: str) -> Optional[str]:
+    """Path of a profile file in PROFILE_DIR, or None if there is no such file"""
+    if not os.path.isdir(PROFILE_DIR) or file_name not in os.listdir(PROFILE_DIR):
+        return None
+    return os.path.join(PROFILE_DIR, file_name)
+
+
+def install_profiling(app):
+    """Profile a sample of a FastAPI app's requests and serve the recent profiles under /profiles/"""
+    from fastapi import HTTPException, Request
+    from fastapi.responses import FileResponse
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        if request.url.path.startswith("/profiles"):
+            return await call_next(request)
+        metadata = {"method": request.method, "path": request.url.path, "query": request.url.query}
+        with profile("request", f"{request.method}_{request.url.path}", metadata):
+            response = await call_next(request)
+            metadata["status_code"] = response.status_code
+        return response
+
+    @app.get("/profiles/")
+    async def get_profiles(limit: int = 50):
+        """List recent profiles, newest first"""
+        return {"sample_rate": PROFILE_SAMPLE_RATE, "mode": PROFILE_MODE, "profiles": list_profiles(limit)}
+
+    @app.get("/profiles/{file_name}")
+    async def download_profile(file_name: str):
+        """Download a .prof, .folded or .json profile file"""
+        path = profile_path(file_name)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return FileResponse(path, filename=file_name)
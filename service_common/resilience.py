@@ -0,0 +1,292 @@
+"""
+Circuit breakers and adaptive concurrency limits for upstream services.
+
+Shared by the action server, ASR and TTS. The Docker images of the services
+copy this package next to their own code (see their Dockerfiles).
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rendered as JSON events by the action server's structured logging, as plain text elsewhere
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class DependencyUnavailable(RuntimeError):
+    """The call was not made, or was abandoned, because the dependency is unhealthy"""
+
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable: {reason}")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class CircuitOpen(DependencyUnavailable):
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(dependency, "circuit open")
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimited(DependencyUnavailable):
+    def __init__(self, dependency: str):
+        super().__init__(dependency, "concurrency limit reached")
+
+
+class DependencyTimeout(DependencyUnavailable):
+    def __init__(self, dependency: str, timeout: float):
+        super().__init__(dependency, f"no response within {timeout:g}s")
+
+
+def _setting(name: str, key: str, default: float) -> float:
+    """Per-dependency setting from the environment, e.g. GEMINI_TIMEOUT"""
+    return float(os.getenv(f"{name.upper()}_{key}", str(default)))
+
+
+class Dependency:
+    """
+    Circuit breaker and adaptive concurrency limit for one upstream service.
+
+    The breaker opens after ``failures`` consecutive failures or timeouts and
+    rejects calls for ``reset_after`` seconds, then lets a single probe call
+    through (half open) to decide whether to close again. The concurrency
+    limit follows AIMD: it grows by 1/limit after each call that answered
+    within ``latency_target`` and halves after a failure, a timeout or a slow
+    call. Calls beyond the limit are rejected at once instead of queueing, so
+    a slow upstream cannot pile up requests and memory.
+
+    Settings can be overridden per dependency with <NAME>_TIMEOUT,
+    <NAME>_BREAKER_FAILURES, <NAME>_BREAKER_RESET, <NAME>_LIMIT_INITIAL,
+    <NAME>_LIMIT_MIN, <NAME>_LIMIT_MAX and <NAME>_LATENCY_TARGET.
+    """
+
+    def __init__(self, name: str, timeout: float = 20.0, failures: int = 5, reset_after: float = 30.0,
+                 initial_limit: float = 8, min_limit: float = 1, max_limit: float = 32,
+                 latency_target: Optional[float] = None):
+        self.name = name
+        self.timeout = _setting(name, "TIMEOUT", timeout)
+        self.failure_threshold = int(_setting(name, "BREAKER_FAILURES", failures))
+        self.reset_after = _setting(name, "BREAKER_RESET", reset_after)
+        self.min_limit = _setting(name, "LIMIT_MIN", min_limit)
+        self.max_limit = _setting(name, "LIMIT_MAX", max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, _setting(name, "LIMIT_INITIAL", initial_limit)))
+        self.latency_target = _setting(name, "LATENCY_TARGET", latency_target or self.timeout / 2)
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.in_flight = 0
+        self._probe_in_flight = False
+        self._latencies = deque(maxlen=500)
+        self.counters = {
+            "calls": 0, "successes": 0, "failures": 0, "timeouts": 0,
+            "rejected_open": 0, "rejected_limit": 0, "opened": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(
+                "Circuit for %s changed from %s to %s (limit %.2f)", self.name, self.state, state, self.limit,
+                extra={"event": "resilience.state_changed",
+                       "fields": {"dependency": self.name, "previous": self.state, "state": state,
+                                  "limit": round(self.limit, 2)}}
+            )
+            self.state = state
+
+    def _admit(self) -> bool:
+        """Reserve a slot for a call, returning whether it is the half-open probe"""
+        with self._lock:
+            probe = False
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_after - time.monotonic()
+                if remaining > 0:
+                    self.counters["rejected_open"] += 1
+                    raise CircuitOpen(self.name, remaining)
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.counters["rejected_open"] += 1
+                    raise CircuitOpen(self.name, self.reset_after)
+                self._probe_in_flight = probe = True
+            elif self.in_flight >= int(self.limit):
+                self.counters["rejected_limit"] += 1
+                raise ConcurrencyLimited(self.name)
+            self.in_flight += 1
+            self.counters["calls"] += 1
+            return probe
+
+    def _record(self, probe: bool, latency: float, ok: bool, timed_out: bool = False, release: bool = True):
+        with self._lock:
+            if release:
+                self.in_flight -= 1
+            if probe:
+                self._probe_in_flight = False
+            if latency is None:
+                return
+            self._latencies.append(latency)
+            if ok:
+                self.counters["successes"] += 1
+                self.consecutive_failures = 0
+                if self.state == HALF_OPEN:
+                    self._set_state(CLOSED)
+                if latency <= self.latency_target:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                else:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                return
+            self.counters["timeouts" if timed_out else "failures"] += 1
+            self.consecutive_failures += 1
+            self.limit = max(self.min_limit, self.limit / 2)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.counters["opened"] += 1
+                self._set_state(OPEN)
+
+    def check(self):
+        """Raise CircuitOpen or ConcurrencyLimited if a call would be rejected now, without reserving a slot"""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_after - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpen(self.name, remaining)
+            elif self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpen(self.name, self.reset_after)
+            elif self.in_flight >= int(self.limit):
+                raise ConcurrencyLimited(self.name)
+
+    def admit(self) -> bool:
+        """
+        Reserve a slot for a call made outside ``call``, e.g. by a scheduler.
+
+        Raises CircuitOpen or ConcurrencyLimited like ``call``. Pass the
+        returned value to ``finish`` once the call is over.
+        """
+        return self._admit()
+
+    def finish(self, probe: bool, latency: float, ok: bool):
+        """Record the outcome of a call reserved with ``admit`` and free its slot"""
+        if not ok:
+            self._record(probe, latency, ok=False)
+        else:
+            self._record(probe, latency, ok=latency <= self.timeout, timed_out=latency > self.timeout)
+
+    def available(self) -> bool:
+        try:
+            self.check()
+        except DependencyUnavailable:
+            return False
+        return True
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call a blocking function; its own client timeout should be set to ``timeout``"""
+        probe = self._admit()
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.finish(probe, time.monotonic() - started, ok=False)
+            raise
+        self.finish(probe, time.monotonic() - started, ok=True)
+        return result
+
+    async def acall(self, fn: Callable, *args, **kwargs):
+        """
+        Run a blocking function in a thread and wait at most ``timeout`` for it.
+
+        A call that times out is abandoned by the caller but keeps its
+        concurrency slot until the thread really finishes.
+        """
+        probe = self._admit()
+        started = time.monotonic()
+        future = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+
+        def release_when_done(task):
+            # Outcome already counted; only free the slot
+            self._record(probe, None, ok=False)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                self._record(probe, time.monotonic() - started, ok=False)
+                raise
+            self._record(probe, time.monotonic() - started, ok=False, timed_out=True, release=False)
+            future.add_done_callback(release_when_done)
+            raise DependencyTimeout(self.name, self.timeout) from None
+        except asyncio.CancelledError:
+            # The caller went away; the thread keeps its slot until it finishes
+            future.add_done_callback(release_when_done)
+            raise
+        except Exception:
+            self._record(probe, time.monotonic() - started, ok=False)
+            raise
+        self._record(probe, time.monotonic() - started, ok=True)
+        return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            retry_after = max(0.0, self.opened_at + self.reset_after - time.monotonic()) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_after": round(retry_after, 1),
+                "p50_seconds": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "p99_seconds": round(latencies[int(0.99 * (len(latencies) - 1))], 3) if latencies else None,
+                **self.counters,
+            }
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._probe_in_flight = False
+
+
+_dependencies: Dict[str, Dependency] = {}
+_registry_lock = threading.Lock()
+
+
+def dependency(name: str, **defaults) -> Dependency:
+    """The process-wide Dependency for ``name``, created with ``defaults`` on first use"""
+    with _registry_lock:
+        if name not in _dependencies:
+            _dependencies[name] = Dependency(name, **defaults)
+        return _dependencies[name]
+
+
+def snapshot() -> Dict[str, dict]:
+    """Breaker state, concurrency limit and counters of every dependency"""
+    return {name: dep.snapshot() for name, dep in list(_dependencies.items())}
+
+
+def reset_after_fork():
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for dep in _dependencies.values():
+        dep.reset_after_fork()
+
+
+# Not available on Windows, which has no fork to reset after
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def install_resilience(app):
+    """Serve the breaker state and concurrency limits of a FastAPI app's process under /resilience"""
+
+    @app.get("/resilience")
+    async def get_resilience():
+        return {"pid": os.getpid(), "dependencies": snapshot()}
@@ -0,0 +1,63 @@
+"""
+Span export and W3C trace context propagation for the ASR, TTS and gateway
+services and the action server.
+
+Each process passes its own name to ``configure_tracing`` (or sets
+OTEL_SERVICE_NAME); spans go to TRACE_EXPORT_DIR/<service>.jsonl. Without
+TRACING_ENABLED=true the global no-op tracer stays in place and spans cost
+next to nothing.
+"""
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+from opentelemetry import trace
+from opentelemetry.propagate import extract, inject
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+load_dotenv()
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Relative to the service's working directory (/app in the Docker images)
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR", os.path.join(os.getcwd(), "traces"))
+
+_configured = False
+_configure_lock = threading.Lock()
+
+# A proxy until configure_tracing installs the provider, which carries the service name
+tracer = trace.get_tracer("insurebot")
+
+
+def configure_tracing(service_name: Optional[str] = None):
+    """Export spans as JSON lines to TRACE_EXPORT_DIR/<service>.jsonl when TRACING_ENABLED=true"""
+    global _configured
+    if not TRACING_ENABLED:
+        return
+    service_name = service_name or os.getenv("OTEL_SERVICE_NAME", "insurebot")
+    with _configure_lock:
+        if _configured:
+            return
+        os.makedirs(TRACE_EXPORT_DIR, exist_ok=True)
+        out = open(os.path.join(TRACE_EXPORT_DIR, f"{service_name}.jsonl"), "a", buffering=1, encoding="utf-8")
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(
+            ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        ))
+        trace.set_tracer_provider(provider)
+        _configured = True
+
+
+def context_from_headers(headers):
+    """Parent context from the W3C traceparent header of an incoming request"""
+    traceparent = headers.get("traceparent")
+    return extract({"traceparent": traceparent}) if traceparent else None
+
+
+def current_traceparent():
+    """W3C traceparent of the current span, for outgoing requests"""
+    carrier = {}
+    inject(carrier)
+    return carrier.get("traceparent")
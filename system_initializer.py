@@ -3,11 +3,14 @@ Standalone System Initialization Service
 Runs independently of Rasa actions to prepare all components
 """
 import asyncio
+import json
 import time
 import os
 import sys
 from typing import Dict, Any
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from contextlib import asynccontextmanager
@@ -16,28 +19,83 @@ from contextlib import asynccontextmanager
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+# Seconds between keep-alive comments on an idle status stream
+STATUS_STREAM_HEARTBEAT = float(os.getenv("STATUS_STREAM_HEARTBEAT", "15"))
+
+def _component_status():
+    return {"ready": False, "progress": 0, "message": "Not started",
+            "started_at": None, "finished_at": None, "duration_seconds": None}
+
 class SystemInitializer:
     def __init__(self):
         self.initialization_status = {
-            "embeddings": {"ready": False, "progress": 0, "message": "Not started"},
-            "vector_store": {"ready": False, "progress": 0, "message": "Not started"},
-            "llm": {"ready": False, "progress": 0, "message": "Not started"},
-            "documents": {"ready": False, "progress": 0, "message": "Not started"},
+            "embeddings": _component_status(),
+            "vector_store": _component_status(),
+            "llm": _component_status(),
+            "documents": _component_status(),
             "overall_ready": False,
             "total_progress": 0,
             "current_step": "Initializing..."
         }
         self.initialization_complete = False
+        self.status_version = 0
+        self._status_changed = None
+        self.warmup_status = {"running": False, "last_run": None, "last_result": None}
+        self.reindex_status = {"running": False, "last_run": None, "last_result": None}
+        self.document_watcher = None
         
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "initialization_status": self.initialization_status,
+            "initialization_complete": self.initialization_complete,
+        }
+    
+    def _notify(self):
+        """Wake every status stream; each sends what changed since its last event"""
+        self.status_version += 1
+        if self._status_changed is not None:
+            self._status_changed.set()
+            self._status_changed = None
+    
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until the status moves past ``version``, returning False on timeout"""
+        if self._status_changed is None:
+            # Created on first use so it belongs to the server's event loop
+            self._status_changed = asyncio.Event()
+        changed = self._status_changed
+        if self.status_version != version:
+            return True
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def update_status(self, component: str = None, **fields):
+        """Change a component's status (or the overall fields without one) and notify the streams"""
+        target = self.initialization_status[component] if component else self.initialization_status
+        target.update(fields)
+        self._notify()
+    
+    def start_component(self, component: str, message: str):
+        self.initialization_status["current_step"] = message
+        self.update_status(component, message=message, progress=0, started_at=time.time(),
+                           finished_at=None, duration_seconds=None)
+    
+    def finish_component(self, component: str, ready: bool, message: str):
+        finished_at = time.time()
+        started_at = self.initialization_status[component]["started_at"] or finished_at
+        self.update_status(component, ready=ready, message=message, finished_at=finished_at,
+                           duration_seconds=round(finished_at - started_at, 3))
+    
     async def initialize_embeddings(self):
         """Initialize embedding model"""
         try:
-            self.initialization_status["embeddings"]["message"] = "Loading AI embeddings model..."
-            self.initialization_status["current_step"] = "Loading AI embeddings model..."
+            self.start_component("embeddings", "Loading AI embeddings model...")
             
             # Simulate gradual loading
             for progress in range(0, 101, 5):
-                self.initialization_status["embeddings"]["progress"] = progress
+                self.update_status("embeddings", progress=progress)
                 await asyncio.sleep(0.1)
             
             # Actually load embeddings
@@ -45,25 +103,23 @@ class SystemInitializer:
             embeddings = Embeddings.get_embeddings()
             
             if embeddings is not None:
-                self.initialization_status["embeddings"]["ready"] = True
-                self.initialization_status["embeddings"]["message"] = "✅ Embeddings model loaded"
+                self.finish_component("embeddings", True, "✅ Embeddings model loaded")
                 return True
             else:
                 raise Exception("Failed to load embeddings")
                 
         except Exception as e:
-            self.initialization_status["embeddings"]["message"] = f"❌ Error: {str(e)}"
+            self.finish_component("embeddings", False, f"❌ Error: {str(e)}")
             return False
     
     async def initialize_vector_store(self):
         """Initialize vector database connection"""
         try:
-            self.initialization_status["vector_store"]["message"] = "Connecting to knowledge base..."
-            self.initialization_status["current_step"] = "Connecting to knowledge base..."
+            self.start_component("vector_store", "Connecting to knowledge base...")
             
             # Simulate connection process
             for progress in range(0, 101, 10):
-                self.initialization_status["vector_store"]["progress"] = progress
+                self.update_status("vector_store", progress=progress)
                 await asyncio.sleep(0.05)
             
             # Actually connect to vector store
@@ -71,25 +127,23 @@ class SystemInitializer:
             client = DatabaseManager.get_client()
             
             if client is not None:
-                self.initialization_status["vector_store"]["ready"] = True
-                self.initialization_status["vector_store"]["message"] = "✅ Vector store connected"
+                self.finish_component("vector_store", True, "✅ Vector store connected")
                 return True
             else:
                 raise Exception("Failed to connect to vector store")
                 
         except Exception as e:
-            self.initialization_status["vector_store"]["message"] = f"❌ Error: {str(e)}"
+            self.finish_component("vector_store", False, f"❌ Error: {str(e)}")
             return False
     
     async def initialize_llm(self):
         """Initialize LLM connection"""
         try:
-            self.initialization_status["llm"]["message"] = "Initializing language model..."
-            self.initialization_status["current_step"] = "Initializing language model..."
+            self.start_component("llm", "Initializing language model...")
             
             # Simulate LLM initialization
             for progress in range(0, 101, 8):
-                self.initialization_status["llm"]["progress"] = progress
+                self.update_status("llm", progress=progress)
                 await asyncio.sleep(0.08)
             
             # Actually test LLM
@@ -97,25 +151,23 @@ class SystemInitializer:
             llm, response = LLM.get_instance()
             
             if response:
-                self.initialization_status["llm"]["ready"] = True
-                self.initialization_status["llm"]["message"] = f"✅ LLM initialized successfully: {response}"
+                self.finish_component("llm", True, f"✅ LLM initialized successfully: {response}")
                 return True
             else:
                 raise Exception("Failed to initialize LLM")
                 
         except Exception as e:
-            self.initialization_status["llm"]["message"] = f"❌ Error: {str(e)}"
+            self.finish_component("llm", False, f"❌ Error: {str(e)}")
             return False
     
     async def check_documents(self):
         """Check if documents are indexed"""
         try:
-            self.initialization_status["documents"]["message"] = "Checking document index..."
-            self.initialization_status["current_step"] = "Checking document index..."
+            self.start_component("documents", "Checking document index...")
             
             # Simulate document check
             for progress in range(0, 101, 15):
-                self.initialization_status["documents"]["progress"] = progress
+                self.update_status("documents", progress=progress)
                 await asyncio.sleep(0.03)
             
             # Check if documents are indexed
@@ -123,15 +175,14 @@ class SystemInitializer:
             tenants = DatabaseManager.list_tenants()
             
             if len(tenants) > 0:
-                self.initialization_status["documents"]["ready"] = True
-                self.initialization_status["documents"]["message"] = f"✅ {len(tenants)} document collections ready"
+                self.finish_component("documents", True, f"✅ {len(tenants)} document collections ready")
                 return True
             else:
-                self.initialization_status["documents"]["message"] = "⚠️ No documents indexed"
+                self.finish_component("documents", False, "⚠️ No documents indexed")
                 return True  # Not critical for basic operation
                 
         except Exception as e:
-            self.initialization_status["documents"]["message"] = f"❌ Error: {str(e)}"
+            self.finish_component("documents", False, f"❌ Error: {str(e)}")
             return False
     
     async def run_initialization(self):
@@ -152,33 +203,124 @@ class SystemInitializer:
         ready_count = sum(1 for status in self.initialization_status.values() 
                          if isinstance(status, dict) and status.get("ready", False))
         
-        self.initialization_status["total_progress"] = (ready_count / 4) * 100
-        self.initialization_status["overall_ready"] = ready_count >= 3  # Allow 1 failure
+        overall_ready = ready_count >= 3  # Allow 1 failure
+        self.initialization_complete = True
         
-        if self.initialization_status["overall_ready"]:
-            self.initialization_status["current_step"] = "✅ System ready!"
-            self.initialization_status["total_progress"] = 100  # Ensure 100% when ready
+        if overall_ready:
+            # Ensure 100% when ready
+            self.update_status(overall_ready=True, total_progress=100, current_step="✅ System ready!")
             print("✅ System initialization complete!")
         else:
-            self.initialization_status["current_step"] = "⚠️ System partially ready"
+            self.update_status(overall_ready=False, total_progress=(ready_count / 4) * 100,
+                               current_step="⚠️ System partially ready")
             print("⚠️ System initialization completed with some issues")
         
-        self.initialization_complete = True
         return self.initialization_status
+    
+    async def run_faq_warmup(self):
+        """Precompute answers for canonical FAQ questions into the response cache"""
+        if self.warmup_status["running"]:
+            return
+        self.warmup_status["running"] = True
+        try:
+            from actions.rag_components.warmup import run_warmup
+            self.warmup_status["last_result"] = await asyncio.to_thread(run_warmup)
+        except Exception as e:
+            self.warmup_status["last_result"] = {"error": str(e)}
+            print(f"⚠️ FAQ warmup failed: {e}")
+        finally:
+            self.warmup_status["running"] = False
+            self.warmup_status["last_run"] = time.time()
+    
+    async def run_faq_warmup_schedule(self, interval: float):
+        """Warm the response cache after startup, then every ``interval`` seconds (0 = once)"""
+        while not self.initialization_complete:
+            await asyncio.sleep(1)
+        if not self.initialization_status["overall_ready"]:
+            return
+        while True:
+            await self.run_faq_warmup()
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    async def run_reindex(self):
+        """Build, validate and switch to a new index version; the live index keeps serving meanwhile"""
+        if self.reindex_status["running"]:
+            return
+        self.reindex_status["running"] = True
+        try:
+            from actions.rag_components.index_versions import rebuild_index
+            self.reindex_status["last_result"] = await asyncio.to_thread(rebuild_index)
+        except Exception as e:
+            self.reindex_status["last_result"] = {"error": str(e)}
+            print(f"⚠️ Index rebuild failed: {e}")
+        finally:
+            self.reindex_status["running"] = False
+            self.reindex_status["last_run"] = time.time()
+
+    async def prepare_speculation(self):
+        """Build the intent centroids for speculative retrieval once the system is ready"""
+        while not self.initialization_complete:
+            await asyncio.sleep(1)
+        if not self.initialization_status["overall_ready"]:
+            return
+        try:
+            from actions.rag_components.speculative import SPECULATIVE_ENABLED, SpeculativeRetrieval
+            if SPECULATIVE_ENABLED:
+                await asyncio.to_thread(SpeculativeRetrieval.warm)
+        except Exception as e:
+            print(f"⚠️ Could not prepare speculative retrieval: {e}")
+    
+    async def start_document_watcher(self):
+        """Reindex policy documents as they change, once the system is ready"""
+        while not self.initialization_complete:
+            await asyncio.sleep(1)
+        if not self.initialization_status["overall_ready"]:
+            return
+        from actions.rag_components.doc_watcher import DocumentWatcher
+        self.document_watcher = DocumentWatcher()
+        self.document_watcher.start()
 
 # Global initializer instance
 system_initializer = SystemInitializer()
 
+FAQ_WARMUP_ON_STARTUP = os.getenv("FAQ_WARMUP_ON_STARTUP", "true").lower() == "true"
+FAQ_WARMUP_INTERVAL = float(os.getenv("FAQ_WARMUP_INTERVAL", "0"))
+DOC_WATCH_ENABLED = os.getenv("DOC_WATCH_ENABLED", "false").lower() == "true"
+
+# The event loop holds only weak references to tasks; keep them alive until they finish
+_background_tasks = set()
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Run initialization
     print("🌟 Starting InsureBot System Initializer...")
     
     # Run initialization in background
-    asyncio.create_task(system_initializer.run_initialization())
+    run_in_background(system_initializer.run_initialization())
+    
+    # Warm the response cache once the system is ready
+    if FAQ_WARMUP_ON_STARTUP:
+        run_in_background(system_initializer.run_faq_warmup_schedule(FAQ_WARMUP_INTERVAL))
+    
+    run_in_background(system_initializer.prepare_speculation())
+    
+    # Keep the index in step with the policy documents
+    if DOC_WATCH_ENABLED:
+        run_in_background(system_initializer.start_document_watcher())
     
     yield
     
+    if system_initializer.document_watcher is not None:
+        system_initializer.document_watcher.stop()
+    
     # Shutdown
     print("🛑 Shutting down System Initializer...")
 
@@ -214,9 +356,54 @@ async def get_system_status():
     return {
         "initialization_status": system_initializer.initialization_status,
         "initialization_complete": system_initializer.initialization_complete,
+        "warmup": system_initializer.warmup_status,
+        "reindex": system_initializer.reindex_status,
+        "document_watcher": system_initializer.document_watcher.stats if system_initializer.document_watcher else None,
         "timestamp": time.time()
     }
 
+def _status_event(event: str, version: int, data: Dict[str, Any]) -> str:
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(data)}\n\n"
+
+def _status_changes(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level entries (whole components) that differ between two readiness snapshots"""
+    return {
+        key: value for key, value in current["initialization_status"].items()
+        if previous["initialization_status"].get(key) != value
+    }
+
+@app.get("/status/stream")
+async def stream_system_status(request: Request):
+    """Server-sent events with the initialization status, pushed only when it changes
+
+    The first ``status`` event carries the full readiness snapshot (the
+    ``initialization_status`` and ``initialization_complete`` of /status);
+    each ``update`` event after it carries only the components and overall
+    fields that changed, with their progress and timings. Clients without
+    EventSource support can keep polling /status.
+    """
+    async def events():
+        version = system_initializer.status_version
+        sent = json.loads(json.dumps(system_initializer.readiness()))
+        yield _status_event("status", version, sent)
+        while not await request.is_disconnected():
+            if not await system_initializer.wait_for_change(version, STATUS_STREAM_HEARTBEAT):
+                # Keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            version = system_initializer.status_version
+            current = json.loads(json.dumps(system_initializer.readiness()))
+            changes = _status_changes(sent, current)
+            if changes or current["initialization_complete"] != sent["initialization_complete"]:
+                yield _status_event("update", version, {
+                    "initialization_status": changes,
+                    "initialization_complete": current["initialization_complete"],
+                })
+            sent = current
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/ready")
 async def check_system_ready():
     """Check if system is ready for use"""
@@ -233,22 +420,71 @@ async def check_system_ready():
             "progress": system_initializer.initialization_status["total_progress"]
         }
 
+@app.post("/warmup")
+async def trigger_warmup():
+    """Run the FAQ warmup now"""
+    if system_initializer.warmup_status["running"]:
+        return {"message": "Warmup already running"}
+    run_in_background(system_initializer.run_faq_warmup())
+    return {"message": "Warmup started"}
+
+@app.post("/reindex")
+async def trigger_reindex():
+    """Rebuild the document index as a new version and switch to it once it passes the smoke checks"""
+    if system_initializer.reindex_status["running"]:
+        return {"message": "Reindex already running"}
+    run_in_background(system_initializer.run_reindex())
+    return {"message": "Reindex started"}
+
+class SpeculateRequest(BaseModel):
+    sender: str
+    text: str
+
+@app.post("/speculate", status_code=202)
+async def speculate(request: SpeculateRequest):
+    """Start the likely action's retrieval for a fresh transcript while Rasa classifies it"""
+    if not system_initializer.initialization_status["overall_ready"]:
+        return {"accepted": False}
+    from actions.rag_components.speculative import SpeculativeRetrieval
+
+    async def run():
+        try:
+            await asyncio.to_thread(SpeculativeRetrieval.speculate, request.sender, request.text)
+        except Exception as e:
+            print(f"⚠️ Speculative retrieval failed: {e}")
+
+    run_in_background(run())
+    return {"accepted": True}
+
+@app.get("/profiles")
+async def get_profiles(limit: int = 50):
+    """List recent action profiles, newest first"""
+    from actions.rag_components.profiling import PROFILE_MODE, PROFILE_SAMPLE_RATE, list_profiles
+    return {"sample_rate": PROFILE_SAMPLE_RATE, "mode": PROFILE_MODE, "profiles": list_profiles(limit)}
+
+@app.get("/profiles/{file_name}")
+async def download_profile(file_name: str):
+    """Download a .prof, .folded or .json action profile"""
+    from actions.rag_components.profiling import profile_path
+    path = profile_path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=file_name)
+
 @app.post("/reinitialize")
 async def reinitialize_system():
-    """Force reinitialize the system"""
+    """Re-run the component checks without taking the system out of service
+
+    Readiness is left as it is while the checks run; each component is marked
+    not ready only if its check fails. Use /reindex to rebuild the documents.
+    """
+    if not system_initializer.initialization_complete:
+        return {"message": "Initialization already running"}
     system_initializer.initialization_complete = False
-    system_initializer.initialization_status = {
-        "embeddings": {"ready": False, "progress": 0, "message": "Restarting..."},
-        "vector_store": {"ready": False, "progress": 0, "message": "Restarting..."},
-        "llm": {"ready": False, "progress": 0, "message": "Restarting..."},
-        "documents": {"ready": False, "progress": 0, "message": "Restarting..."},
-        "overall_ready": False,
-        "total_progress": 0,
-        "current_step": "Reinitializing..."
-    }
+    system_initializer.update_status(current_step="Reinitializing...")
     
     # Run initialization
-    asyncio.create_task(system_initializer.run_initialization())
+    run_in_background(system_initializer.run_initialization())
     
     return {"message": "Reinitialization started"}
 
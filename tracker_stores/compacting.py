@@ -0,0 +1,218 @@
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Text
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_store import InMemoryTrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, ActiveLoop, Event, SessionStarted, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedTrackerCache:
+    """
+    Serialized trackers kept in memory up to ``max_senders``, least recently used first out.
+
+    Senders idle for longer than ``idle_seconds`` are evicted as well. With a
+    ``spill_path`` an evicted tracker is written to a local SQLite file and
+    read back the next time its sender speaks; without one it is dropped and
+    the sender starts a new conversation. Spilled trackers older than
+    ``spill_ttl`` seconds are deleted.
+    """
+
+    def __init__(self, max_senders: int = 1000, idle_seconds: float = 3600,
+                 spill_path: Optional[str] = None, spill_ttl: float = 86400):
+        self.max_senders = max_senders
+        self.idle_seconds = idle_seconds
+        self.spill_ttl = spill_ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+        if spill_path:
+            os.makedirs(os.path.dirname(os.path.abspath(spill_path)), exist_ok=True)
+            self._disk = sqlite3.connect(spill_path, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS trackers (sender_id TEXT PRIMARY KEY, tracker TEXT, updated_at REAL)"
+            )
+            self._disk.execute("DELETE FROM trackers WHERE updated_at < ?", (time.time() - spill_ttl,))
+        self.counters = {"evicted_idle": 0, "evicted_lru": 0, "spilled": 0, "restored": 0, "dropped": 0}
+
+    def _from_disk(self, sender_id: str) -> Optional[str]:
+        if self._disk is None:
+            return None
+        row = self._disk.execute(
+            "SELECT tracker, updated_at FROM trackers WHERE sender_id = ?", (sender_id,)
+        ).fetchone()
+        if row is None or row[1] < time.time() - self.spill_ttl:
+            return None
+        return row[0]
+
+    def __contains__(self, sender_id: str) -> bool:
+        return sender_id in self._memory or self._from_disk(sender_id) is not None
+
+    def __getitem__(self, sender_id: str) -> str:
+        if sender_id in self._memory:
+            serialised, _ = self._memory[sender_id]
+            self._memory[sender_id] = (serialised, time.monotonic())
+            self._memory.move_to_end(sender_id)
+            return serialised
+        serialised = self._from_disk(sender_id)
+        if serialised is None:
+            raise KeyError(sender_id)
+        # Back in memory it is the only copy again
+        self._disk.execute("DELETE FROM trackers WHERE sender_id = ?", (sender_id,))
+        self.counters["restored"] += 1
+        self[sender_id] = serialised
+        return serialised
+
+    def __setitem__(self, sender_id: str, serialised: str):
+        self._memory[sender_id] = (serialised, time.monotonic())
+        self._memory.move_to_end(sender_id)
+        self.evict()
+
+    def __delitem__(self, sender_id: str):
+        found = self._memory.pop(sender_id, None) is not None
+        if self._disk is not None:
+            found = self._disk.execute("DELETE FROM trackers WHERE sender_id = ?", (sender_id,)).rowcount > 0 or found
+        if not found:
+            raise KeyError(sender_id)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._memory)
+        if self._disk is not None:
+            for (sender_id,) in self._disk.execute("SELECT sender_id FROM trackers").fetchall():
+                if sender_id not in self._memory:
+                    yield sender_id
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def evict(self):
+        """Move idle senders, then the least recently used beyond max_senders, out of memory"""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._memory:
+            sender_id, (serialised, last_used) = next(iter(self._memory.items()))
+            if last_used < cutoff:
+                self.counters["evicted_idle"] += 1
+            elif len(self._memory) > self.max_senders:
+                self.counters["evicted_lru"] += 1
+            else:
+                break
+            del self._memory[sender_id]
+            self._spill(sender_id, serialised)
+
+    def _spill(self, sender_id: str, serialised: str):
+        if self._disk is None:
+            self.counters["dropped"] += 1
+            return
+        try:
+            self._disk.execute("INSERT OR REPLACE INTO trackers VALUES (?, ?, ?)", (sender_id, serialised, time.time()))
+            self.counters["spilled"] += 1
+        except sqlite3.Error as e:
+            self.counters["dropped"] += 1
+            logger.error(f"Could not spill tracker of {sender_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_memory": len(self._memory),
+            "in_memory_bytes": sum(len(serialised) for serialised, _ in self._memory.values()),
+            **self.counters,
+        }
+
+
+def compact_events(tracker: DialogueStateTracker, domain: Domain, max_turns: int) -> Optional[List[Event]]:
+    """
+    The events of the last ``max_turns`` user turns, preceded by the state they start from.
+
+    That state is the session start, if it lies before the cut, and one
+    SlotSet per slot that differs from its initial value, plus the active
+    loop. Returns None when there is nothing to drop.
+    """
+    events = list(tracker.events)
+    turn_starts = [index for index, event in enumerate(events) if isinstance(event, UserUttered)]
+    if len(turn_starts) <= max_turns:
+        return None
+    cut = turn_starts[-max_turns]
+    if cut > 0 and isinstance(events[cut - 1], ActionExecuted) and events[cut - 1].action_name == ACTION_LISTEN_NAME:
+        cut -= 1
+
+    dropped = events[:cut]
+    state = DialogueStateTracker.from_events(tracker.sender_id, dropped, domain.slots)
+    timestamp = events[cut].timestamp
+    prefix: List[Event] = []
+    for index in range(len(dropped) - 1, -1, -1):
+        event = dropped[index]
+        if isinstance(event, ActionExecuted) and event.action_name == ACTION_SESSION_START_NAME:
+            # Keep the session boundary so the last session is still found on retrieve
+            prefix.append(event)
+            if index + 1 < len(dropped) and isinstance(dropped[index + 1], SessionStarted):
+                prefix.append(dropped[index + 1])
+            break
+    for name, slot in state.slots.items():
+        if slot.value != slot.initial_value:
+            prefix.append(SlotSet(name, slot.value, timestamp=timestamp))
+    if state.active_loop_name:
+        prefix.append(ActiveLoop(state.active_loop_name, timestamp=timestamp))
+    return prefix + events[cut:]
+
+
+class CompactingTrackerStore(InMemoryTrackerStore):
+    """
+    In-memory tracker store with bounded memory for long-running voice sessions.
+
+    Conversations are compacted on save to their last ``max_turns`` user
+    turns plus the slots, once they have grown ``compact_slack`` turns past
+    that, so neither memory nor the tracker sent to the action server keeps
+    growing with the length of a call. Senders are held in a
+    BoundedTrackerCache: idle ones and the least recently used beyond
+    ``max_senders`` are evicted, to the ``spill_path`` SQLite file if set.
+
+    Configured in endpoints.yml:
+
+        tracker_store:
+          type: tracker_stores.compacting.CompactingTrackerStore
+          max_turns: 20
+          max_senders: 1000
+          idle_seconds: 3600
+          spill_path: .cache/trackers.sqlite3
+    """
+
+    def __init__(self, domain: Domain, event_broker: Optional[EventBroker] = None,
+                 max_turns: int = 20, compact_slack: int = 5, max_senders: int = 1000,
+                 idle_seconds: float = 3600, spill_path: Optional[Text] = None, spill_ttl: float = 86400,
+                 **kwargs: Any) -> None:
+        super().__init__(domain, event_broker, **kwargs)
+        self.max_turns = int(max_turns)
+        self.compact_slack = int(compact_slack)
+        self.store = BoundedTrackerCache(int(max_senders), float(idle_seconds), spill_path, float(spill_ttl))
+        self.compactions = 0
+
+    def compact(self, tracker: DialogueStateTracker) -> DialogueStateTracker:
+        turns = sum(1 for event in tracker.events if isinstance(event, UserUttered))
+        if turns <= self.max_turns + self.compact_slack:
+            return tracker
+        events = compact_events(tracker, self.domain, self.max_turns)
+        if events is None:
+            return tracker
+        self.compactions += 1
+        return DialogueStateTracker.from_events(
+            tracker.sender_id, events, self.domain.slots,
+            max_event_history=tracker._max_event_history, sender_source=tracker.sender_source
+        )
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        # Stream the full tracker: the broker only sees events that are new since the last save
+        await self.stream_events(tracker)
+        self.store[tracker.sender_id] = self.serialise_tracker(self.compact(tracker))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"compactions": self.compactions, **self.store.stats()}